@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call cost of research_guard on non-research tools.
+
+research_guard is registered with matcher "*", so every Read/Edit/Grep/Glob
+pays for it. This compares:
+
+In-process (hook already imported, e.g. under stan_hookd):
+- legacy order: parse JSON → load_tools_config() → pass through
+- fast path:    main() with the tool-name pre-filter
+
+Per process (what Claude Code actually pays per tool call):
+- interpreter floor: `python3 -c pass`
+- research_guard on a Read call (fast path)
+- research_guard on a WebSearch call (full path: config + state)
+- optional: an older copy of research_guard.py via --baseline
+
+Usage:
+    python3 benchmarks/research_guard_bench.py [--runs 30] [--baseline OLD.py] [--json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR))
+
+import research_guard
+
+READ_PAYLOAD = json.dumps({
+    "session_id": "bench",
+    "hook_event_name": "PreToolUse",
+    "tool_name": "Read",
+    "tool_input": {"file_path": "/project/src/app/components/Button.tsx"},
+})
+WEBSEARCH_PAYLOAD = json.dumps({
+    "session_id": "bench",
+    "hook_event_name": "PreToolUse",
+    "tool_name": "WebSearch",
+    "tool_input": {"query": "react docs useEffect cleanup"},
+})
+
+CONFIG_YAML = "tools:\n  graphiti: false\n  context7: true\n  firecrawl: false\n"
+
+
+def make_project(root: Path) -> Path:
+    """Project with .stan/config.yaml and a nested working directory."""
+    (root / ".stan").mkdir()
+    (root / ".stan" / "config.yaml").write_text(CONFIG_YAML)
+    cwd = root / "src" / "app" / "components"
+    cwd.mkdir(parents=True)
+    return cwd
+
+
+def legacy_passthrough(raw):
+    """What research_guard did for a Read call before the pre-filter."""
+    input_data = json.loads(raw)
+    input_data.get("tool_name", "")
+    research_guard.load_tools_config()
+    return json.dumps(research_guard.allow())
+
+
+def fast_passthrough(raw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        research_guard.main(raw)
+
+
+def time_in_process(fn, raw, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(raw)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def time_process(argv, payload, cwd, runs, env):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, input=payload, capture_output=True, text=True, cwd=cwd, env=env, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(sorted(samples)[int(len(samples) * 0.95) - 1], 3),
+        "runs": len(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--baseline", help="older research_guard.py to compare against")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = make_project(Path(tmp))
+        env = dict(os.environ, STAN_STATE_DIR=tmp)
+        hook = [sys.executable, str(HOOKS_DIR / "research_guard.py")]
+
+        old_cwd = os.getcwd()
+        os.chdir(cwd)
+        try:
+            in_process_runs = args.runs * 20
+            results["in_process_legacy_read"] = summarize(time_in_process(legacy_passthrough, READ_PAYLOAD, in_process_runs))
+            results["in_process_fast_read"] = summarize(time_in_process(fast_passthrough, READ_PAYLOAD, in_process_runs))
+        finally:
+            os.chdir(old_cwd)
+
+        results["process_interpreter_floor"] = summarize(
+            time_process([sys.executable, "-c", "pass"], "", cwd, args.runs, env))
+        results["process_fast_read"] = summarize(time_process(hook, READ_PAYLOAD, cwd, args.runs, env))
+        results["process_full_websearch"] = summarize(time_process(hook, WEBSEARCH_PAYLOAD, cwd, args.runs, env))
+        if args.baseline:
+            results["process_baseline_read"] = summarize(
+                time_process([sys.executable, args.baseline], READ_PAYLOAD, cwd, args.runs, env))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<30} {'median ms':>10} {'p95 ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<30} {stats['median_ms']:>10.3f} {stats['p95_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,70 @@
 """
 Credential Guard (PreToolUse Hook)
 
-Blocks git add/commit when staged files contain secrets.
+Blocks git add/commit when staged files contain secrets, git push
+when the outgoing commits add any, and Edit/Write/MultiEdit calls whose
+new text contains one. Clean writes are remembered by the resulting
+blob SHA, so the commit-time scan can skip those files.
 Uses 905 regex patterns from secrets-patterns-db.
 
 Source: taming-stan credential protection, adapted for autonomous-stan.
 """
+import codecs
+import dataclasses
 import json
+import selectors
 import sys
 import os
 import subprocess
 import re
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib"))
-from secret_patterns import detect_secret, has_keyword_with_value
+from atomic_state import read_json, update_json
+from config import get_secret_scan_config
+from scan_cache import ScanCache, blob_sha, cache_version, scan_cached
+from secret_entropy import ENTROPY_FINDING, EntropySettings
+from secret_scan import (
+    KEYWORD_FINDING, TIER_ENTROPY, TIERS, MAX_SCAN_BYTES, DiffPosition, scan_blob, scan_blobs, scan_text,
+    scan_tiered,
+)
 
 STRIKE_FILE = os.path.join(os.getcwd(), ".stan", "credential_strikes.json")
+SCAN_CACHE_FILE = os.path.join(os.getcwd(), ".stan", "secret_scan_cache")
 MAX_STRIKES = 3
 
+# git add flags that stage everything git status reports
+BULK_ADD_FLAGS = {"-A", "--all", "-u", "--update", "--no-ignore-removal"}
+UPDATE_ONLY_FLAGS = {"-u", "--update"}
 
-def allow():
-    return {
+# Staged diff is read and scanned in line-aligned chunks of about this size
+DIFF_CHUNK_BYTES = 256 * 1024
+# Total budget for streaming + scanning the staged diff (hook timeout is 20s)
+DIFF_SCAN_TIMEOUT = 10
+# Restrict the diff to unknown paths via pathspecs up to this many
+MAX_DIFF_PATHSPECS = 200
+
+# git push options that take a separate value argument
+PUSH_VALUE_OPTIONS = {"-o", "--push-option", "--repo", "--receive-pack", "--exec"}
+# Submodule entries in a tree point at commits, not blobs
+GITLINK_MODE = "160000"
+
+# Tools whose payload is scanned at write time
+EDIT_TOOLS = ("Edit", "Write", "MultiEdit")
+# Heuristic findings: at write time only a warning (token=None, pin: 1234, ...)
+HEURISTIC_FINDINGS = (KEYWORD_FINDING, ENTROPY_FINDING)
+
+
+def allow(message=None):
+    result = {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
             "permissionDecision": "allow"
         }
     }
+    if message:
+        result["hookSpecificOutput"]["message"] = message
+    return result
 
 
 def deny(msg):
@@ -39,66 +78,686 @@ def deny(msg):
     }
 
 
+def ask(msg):
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "ask",
+            "permissionDecisionReason": msg
+        }
+    }
+
+
 def get_strikes():
-    try:
-        with open(STRIKE_FILE) as f:
-            return json.load(f).get("count", 0)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return 0
+    data = read_json(STRIKE_FILE, {})
+    return data.get("count", 0) if isinstance(data, dict) else 0
 
 
-def add_strike():
-    count = get_strikes() + 1
-    os.makedirs(os.path.dirname(STRIKE_FILE), exist_ok=True)
-    with open(STRIKE_FILE, "w") as f:
-        json.dump({"count": count}, f)
-    return count
+def _bump_strikes(data):
+    data["count"] = data.get("count", 0) + 1
+    return data["count"]
 
 
-def get_staged_content():
-    """Get content of staged files via git diff --cached."""
+def add_strike():
+    return update_json(STRIKE_FILE, _bump_strikes)
+
+
+def stream_staged_diff(paths=None, deadline=None, chunk_bytes=None):
+    """
+    Yield `git diff --cached -U0` in line-aligned text chunks, straight from the pipe.
+
+    Only about one chunk is held in memory: a single line longer than four
+    chunks is cut. Stopping the iteration early kills git.
+
+    Raises:
+        TimeoutError: deadline (time.monotonic()) passed before git finished
+        RuntimeError: git failed (e.g. not a repository)
+    """
+    chunk_bytes = chunk_bytes or DIFF_CHUNK_BYTES
+    cmd = ["git", "diff", "--cached", "--diff-filter=ACMR", "-U0"]
+    if paths:
+        # --raw paths are relative to the repository root, not to cwd
+        cmd += ["--", *(f":(top,literal){path}" for path in paths)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    selector = selectors.DefaultSelector()
+    selector.register(proc.stdout, selectors.EVENT_READ)
+    pending = ""
+    try:
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and (remaining <= 0 or not selector.select(remaining)):
+                raise TimeoutError
+            data = os.read(proc.stdout.fileno(), 65536)
+            if not data:
+                break
+            pending += decoder.decode(data)
+            while len(pending) >= chunk_bytes:
+                cut = pending.rfind("\n", 0, chunk_bytes)
+                if cut == -1:
+                    cut = pending.find("\n", chunk_bytes, 4 * chunk_bytes)
+                if cut == -1:
+                    if len(pending) < 4 * chunk_bytes:
+                        break
+                    yield pending[:4 * chunk_bytes]
+                    pending = pending[4 * chunk_bytes:]
+                    continue
+                yield pending[:cut]
+                pending = pending[cut + 1:]
+        pending += decoder.decode(b"", final=True)
+        if pending.endswith("\n"):
+            pending = pending[:-1]
+        if pending:
+            yield pending
+        proc.wait()
+        if proc.returncode != 0:
+            raise RuntimeError(f"git diff exited with {proc.returncode}")
+    finally:
+        selector.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
+def scan_staged_diff(paths=None, timeout=DIFF_SCAN_TIMEOUT, budget_ms=None, tiers=TIERS, entropy=None):
+    """
+    Stream and scan the staged diff tier by tier, stopping at the first findings.
+
+    Args:
+        budget_ms: latency budget for tiers after the token formats (None = no limit)
+        tiers: confidence tiers to run (see secret_patterns.TIERS, TIER_ENTROPY)
+        entropy: EntropySettings for TIER_ENTROPY (None = defaults)
+
+    Returns:
+        (findings, status, completed_tiers) with status "complete", "partial"
+        (budget ran out, some tiers skipped), "stopped" (found enough to deny,
+        rest unscanned), "timeout" or "error" (git failed).
+    """
+    start = time.monotonic()
+    budget_deadline = None if budget_ms is None else start + budget_ms / 1000
+    position = DiffPosition()
+    findings = []
+    completed = set(tiers)
+    chunks = stream_staged_diff(paths, deadline=start + timeout)
+    try:
+        for chunk in chunks:
+            result = scan_tiered(chunk, position=position, deadline=budget_deadline, tiers=tiers,
+                                 entropy=entropy)
+            findings.extend(result.findings)
+            completed &= set(result.completed)
+            if findings:
+                return findings, "stopped", sorted(completed)
+    except TimeoutError:
+        return findings, "timeout", []
+    except (RuntimeError, OSError):
+        return findings, "error", []
+    finally:
+        chunks.close()
+    return findings, "complete" if completed == set(tiers) else "partial", sorted(completed)
+
+
+def get_staged_raw():
+    """`git diff --cached --raw` (old/new blob per path), or None if git failed."""
     try:
         result = subprocess.run(
-            ["git", "diff", "--cached", "--diff-filter=ACMR", "-U0"],
+            ["git", "diff", "--cached", "--raw", "-z", "--no-abbrev", "--diff-filter=ACMR"],
             capture_output=True, text=True, timeout=5
         )
-        return result.stdout if result.returncode == 0 else ""
     except Exception:
-        return ""
-
-
-def get_file_content(filepath):
-    """Read file content for checking before git add."""
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def get_staged_blobs(raw=None):
+    """
+    Staged (path, blob_sha) pairs via git diff --cached --raw.
+
+    Returns:
+        List of pairs, or None if git failed.
+    """
+    raw = get_staged_raw() if raw is None else raw
+    if raw is None:
+        return None
+
+    blobs = []
+    fields = raw.split("\0")
+    i = 0
+    while i + 1 < len(fields):
+        meta = fields[i].split()
+        if len(meta) < 5:
+            break
+        # Renames/copies carry source and destination path
+        paths = 2 if meta[4][:1] in ("R", "C") else 1
+        blobs.append((fields[i + paths], meta[3]))
+        i += 1 + paths
+    return blobs
+
+
+def get_changed_paths(pathspecs, include_untracked=True):
+    """
+    Paths a bulk `git add` would stage, via git status --porcelain -z.
+
+    Only modified, type-changed and (optionally) untracked files; deleted
+    paths and symlinks are skipped.
+
+    Returns:
+        Paths relative to the cwd, or None if git failed (not a repo).
+    """
+    try:
+        root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            capture_output=True, text=True, timeout=5
+        )
+        result = subprocess.run(
+            ["git", "status", "--porcelain", "-z",
+             "--untracked-files=" + ("all" if include_untracked else "no"), "--", *pathspecs],
+            capture_output=True, text=True, timeout=5
+        )
+    except Exception:
+        return None
+    if root.returncode != 0 or result.returncode != 0:
+        return None
+
+    top = root.stdout.strip()
+    paths = []
+    entries = result.stdout.split("\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        status, path = entry[:2], entry[3:]
+        if status[0] in ("R", "C"):
+            i += 1  # Original path of a staged rename/copy follows
+        if status[1] in ("M", "T", "A") or (status == "??" and include_untracked):
+            full = os.path.join(top, path)
+            if not os.path.islink(full):
+                paths.append(os.path.relpath(full))
+    return paths
+
+
+def get_add_targets(args):
+    """
+    Files a `git add` will stage.
+
+    Plain file arguments are used as given. Bulk adds (`.`, `-A`, `-u`,
+    directories, globs) are resolved to only the changed paths via
+    git status, so just the delta gets scanned.
+
+    Returns:
+        List of paths, or None if the targets could not be determined.
+    """
+    pathspecs = [a for a in args if not a.startswith("-")]
+    flags = set(a for a in args if a.startswith("-"))
+    bulk = bool(flags & BULK_ADD_FLAGS)
+    if not pathspecs and not bulk:
+        return []
+    if not bulk and all(os.path.isfile(p) for p in pathspecs):
+        return pathspecs
+    return get_changed_paths(pathspecs, include_untracked=not flags & UPDATE_ONLY_FLAGS)
+
+
+def get_file_bytes(filepath):
+    """
+    Read raw file content for checking before git add.
+
+    Returns:
+        Bytes (b"" if unreadable), or None if larger than MAX_SCAN_BYTES.
+    """
     try:
-        with open(filepath) as f:
+        if os.path.getsize(filepath) > MAX_SCAN_BYTES:
+            return None
+        with open(filepath, "rb") as f:
             return f.read()
     except Exception:
-        return ""
+        return b""
 
 
-def scan_for_secrets(content):
-    """Scan content for secrets. Returns list of (pattern_name, match) tuples."""
-    findings = []
-    for line in content.split("\n"):
-        # Skip removed lines in diffs
-        if line.startswith("-") and not line.startswith("---"):
-            continue
-        # Check added lines
-        check_line = line
-        if line.startswith("+"):
-            check_line = line[1:]
+def run_git(args, deadline, stdin=b""):
+    """
+    Run git with the time left until deadline; stdout bytes, or None on failure.
 
-        result = detect_secret(check_line)
-        if result:
-            pattern_name, match = result
-            findings.append((pattern_name, match[:40] + "..." if len(match) > 40 else match))
+    Raises:
+        subprocess.TimeoutExpired if git did not finish before the deadline
+    """
+    try:
+        result = subprocess.run(
+            ["git", *args], input=stdin, capture_output=True,
+            timeout=max(deadline - time.monotonic(), 0.1)
+        )
+    except subprocess.TimeoutExpired:
+        raise
+    except Exception:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def get_push_revisions(args):
+    """
+    rev-list arguments for the commits a `git push` would send.
+
+    The pushed sources (refspec sources, --all/--tags, else HEAD) minus
+    everything the remote's tracking refs already contain — `@{u}..HEAD`
+    for the common case, and a brand-new branch still only counts the
+    commits no remote has yet.
+
+    Returns:
+        List of rev-list arguments, [] if the push only deletes refs.
+    """
+    positional, sources = [], []
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg in PUSH_VALUE_OPTIONS:
+            skip_value = True
+        elif arg in ("--all", "--branches", "--mirror"):
+            sources.append("--branches")
+        elif arg == "--tags":
+            sources.append("--tags")
+        elif not arg.startswith("-"):
+            positional.append(arg)
+
+    remote, refspecs = (positional[0], positional[1:]) if positional else (None, [])
+    for refspec in refspecs:
+        source = refspec.lstrip("+").split(":", 1)[0]
+        if source:  # ":branch" deletes, nothing is sent
+            sources.append(f"--glob={source}" if "*" in source else source)
+    if not sources:
+        if refspecs:
+            return []
+        sources.append("HEAD")
+
+    # A URL or path instead of a remote name: compare against every remote
+    named = remote is not None and not any(c in remote for c in "/:")
+    return sources + ["--not", f"--remotes={remote}" if named else "--remotes"]
+
+
+def get_outgoing_blobs(revisions, cache, deadline):
+    """
+    Blobs added or modified by outgoing commits not yet verified clean.
+
+    Returns:
+        (commits, [(commit, path, blob_sha), ...]) or None if git failed.
+        commits lists every unverified outgoing commit.
+    """
+    listing = run_git(["rev-list", *revisions], deadline)
+    if listing is None:
+        return None
+    commits = [c for c in listing.decode().split() if not cache.is_clean(f"commit:{c}")]
+    if not commits:
+        return [], []
+
+    # --no-renames: a renamed file is an added blob, which the cache knows.
+    # -m: merges are diffed against each parent (without it diff-tree prints
+    # nothing for them, and content added in the merge itself is never seen)
+    raw = run_git(["diff-tree", "--stdin", "-r", "--root", "-m", "--raw", "-z", "--no-abbrev",
+                   "--no-renames", "--diff-filter=AMT"],
+                  deadline, "\n".join(commits).encode() + b"\n")
+    if raw is None:
+        return None
+
+    blobs = []
+    seen = set()
+    commit = None
+    fields = raw.decode("utf-8", "surrogateescape").split("\0")
+    i = 0
+    while i < len(fields):
+        field = fields[i]
+        i += 1
+        if field.startswith(":"):
+            meta = field[1:].split()
+            path = fields[i] if i < len(fields) else ""
+            i += 1
+            if commit and len(meta) >= 4 and meta[1] != GITLINK_MODE:
+                entry = (commit, path, meta[3])
+                if entry not in seen:  # merges list a blob once per parent
+                    seen.add(entry)
+                    blobs.append(entry)
+        elif field.strip():
+            commit = field.strip()
+    return commits, blobs
+
+
+def read_blobs(shas, deadline):
+    """
+    Contents of blobs up to MAX_SCAN_BYTES via git cat-file.
+
+    Returns:
+        ({sha: bytes}, {sha of oversized blobs}) or None if git failed.
+    """
+    if not shas:
+        return {}, set()
+    request = "\n".join(shas).encode() + b"\n"
+    sizes = run_git(["cat-file", "--batch-check=%(objectname) %(objectsize)"], deadline, request)
+    if sizes is None:
+        return None
+    small, oversized = [], set()
+    for line in sizes.decode().splitlines():
+        parts = line.split()
+        if len(parts) != 2 or not parts[1].isdigit():
+            continue
+        if int(parts[1]) > MAX_SCAN_BYTES:
+            oversized.add(parts[0])
+        else:
+            small.append(parts[0])
+    if not small:
+        return {}, oversized
+
+    data = run_git(["cat-file", "--batch"], deadline, "\n".join(small).encode() + b"\n")
+    if data is None:
+        return None
+    contents = {}
+    pos = 0
+    while pos < len(data):
+        newline = data.find(b"\n", pos)
+        if newline < 0:
+            break
+        header = data[pos:newline].split()
+        pos = newline + 1
+        if len(header) != 3 or not header[2].isdigit():
+            continue  # "<sha> missing"
+        size = int(header[2])
+        contents[header[0].decode()] = data[pos:pos + size]
+        pos += size + 1
+    return contents, oversized
+
+
+def scan_outgoing_commits(args, cache, timeout=DIFF_SCAN_TIMEOUT):
+    """
+    Scan the blobs introduced by the commits a `git push` would send.
+
+    Each blob is scanned once under its SHA (clean blobs from git add or an
+    earlier push are lookups), and fully clean commits are remembered as
+    "commit:<sha>", so the cost scales with new content, not history.
+
+    The git calls and the scan share one deadline.
+
+    Returns:
+        (findings, paths of blobs over MAX_SCAN_BYTES, status) with status
+        "complete" or "timeout" (findings so far), or None if the outgoing
+        commits could not be determined.
+    """
+    deadline = time.monotonic() + timeout
+    revisions = get_push_revisions(args)
+    if not revisions:
+        return [], [], "complete"
+    try:
+        outgoing = get_outgoing_blobs(revisions, cache, deadline)
+        if outgoing is None:
+            return None
+        commits, blobs = outgoing
+
+        paths = {}
+        for _, path, sha in blobs:
+            paths.setdefault(sha, path)
+        unknown = [sha for sha in paths if cache.get(sha) is None]
+        loaded = read_blobs(unknown, deadline)
+    except subprocess.TimeoutExpired:
+        return [], [], "timeout"
+    if loaded is None:
+        return None
+    contents, oversized = loaded
+
+    pending = [sha for sha in unknown if sha in contents]
+    scanned = scan_blobs([(paths[sha], contents[sha]) for sha in pending],
+                         entropy=entropy_settings(), deadline=deadline)
+    status = "complete" if len(scanned) == len(pending) else "timeout"
+    for sha, findings in zip(pending, scanned):
+        if findings is None:
+            oversized.add(sha)
+        else:
+            cache.put(sha, findings)
+
+    findings, dirty = [], set(oversized)
+    for sha, path in paths.items():
+        found = cache.get(sha, path)
+        if found:
+            findings.extend(found)
+            dirty.add(sha)
+        elif found is None:
+            dirty.add(sha)
+    for commit in set(commits) - {commit for commit, _, sha in blobs if sha in dirty}:
+        cache.put(f"commit:{commit}", [])
+    return findings, sorted(paths[sha] for sha in oversized), status
+
+
+def entropy_settings(settings=None):
+    """EntropySettings from secret_scan config, None if the entropy tier is off."""
+    settings = settings or get_secret_scan_config()
+    if not settings.entropy:
+        return None
+    return EntropySettings(settings.entropy_threshold, settings.entropy_min_length)
+
+
+def scan_tiers(settings=None):
+    """Tiers configured for commit/push scans, plus TIER_ENTROPY if enabled."""
+    settings = settings or get_secret_scan_config()
+    return TIERS[:settings.tiers] + ((TIER_ENTROPY,) if settings.entropy else ())
+
+
+def open_scan_cache():
+    """
+    Scan cache of this project (.stan/secret_scan_cache).
+
+    Verdicts depend on the tiers and entropy settings, so changing them
+    starts a fresh cache (a blob clean without the entropy tier may not be
+    with it).
+    """
+    settings = get_secret_scan_config()
+    return ScanCache(SCAN_CACHE_FILE, version=cache_version(scan_tiers(settings), entropy_settings(settings)))
+
+
+def scan_for_secrets(content, path=None, cache=None):
+    """
+    Scan a diff (or a file's content when path is given) for secrets.
+
+    Skips removed diff lines and runs the patterns over the whole buffer
+    of remaining lines at once. With a cache, identical content is only
+    scanned once.
+
+    Returns:
+        List of Finding(pattern, match, path, line), in line order.
+    """
+    return scan_cached(content, path, cache)
+
+
+def scan_files(files, cache=None):
+    """
+    Scan files before git add, each cached under its git blob SHA.
+
+    Cache misses are scanned in parallel (see secret_scan.scan_blobs).
+    Binary files count as clean; files over MAX_SCAN_BYTES are left to
+    the commit-time diff scan.
+
+    Returns:
+        (findings in argument order, paths skipped as too large)
+    """
+    order = list(dict.fromkeys(files))
+    results, pending, skipped = {}, [], []
+    for filepath in order:
+        data = get_file_bytes(filepath)
+        if data is None:
+            skipped.append(filepath)
+            continue
+        sha = blob_sha(data)
+        cached = cache.get(sha, filepath) if cache is not None else None
+        if cached is not None:
+            results[filepath] = cached
+        else:
+            pending.append((filepath, sha, data))
+
+    scanned = scan_blobs([(filepath, data) for filepath, _, data in pending], entropy=entropy_settings())
+    for (filepath, sha, _), findings in zip(pending, scanned):
+        if findings is None:
+            skipped.append(filepath)
+            continue
+        results[filepath] = findings
+        if cache is not None:
+            cache.put(sha, findings)
+
+    return [f for filepath in order for f in results.get(filepath, [])], skipped
+
+
+def unscanned_staged_paths(cache, raw):
+    """
+    Staged paths whose blob is not known clean (e.g. from git add).
+
+    Returns:
+        List of paths ([] = everything staged is clean), or None if the
+        staged blobs could not be listed.
+    """
+    blobs = get_staged_blobs(raw)
+    if blobs is None:
+        return None
+    return [path for path, sha in blobs if not cache.is_clean(sha)]
+
+
+def scan_staged_cached(cache, raw=None, paths=None):
+    """
+    scan_staged_diff() with a verdict cache keyed on the staged state.
+
+    The raw listing (old and new blob per path) pins the diff exactly, so a
+    retried commit/push on unchanged staging is a lookup (status "cached").
+    Partial, timed-out or failed scans are not cached.
+
+    Returns:
+        (findings, status, completed_tiers), see scan_staged_diff()
+    """
+    settings = get_secret_scan_config()
+    tiers = scan_tiers(settings)
+    key = None
+    if raw is not None:
+        state = "\0".join(paths or []) + "\0\0" + raw + "\0" + ",".join(map(str, tiers))
+        key = "staged:" + blob_sha(state.encode("utf-8", "surrogateescape"))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, "cached", list(tiers)
+    findings, status, completed = scan_staged_diff(paths, budget_ms=settings.budget_ms, tiers=tiers,
+                                                   entropy=entropy_settings(settings))
+    if key is not None and status in ("complete", "stopped"):
+        cache.put(key, findings)
+    return findings, status, completed
+
+
+def scan_incomplete_message(findings, seconds, what="staged changes", inspect="git diff --cached"):
+    return (
+        f"🔐 CREDENTIAL GUARD: Scan incomplete — {what} were not fully "
+        f"checked within {seconds}s ({len(findings)} finding(s) so far).\n"
+        f"Inspect `{inspect}` for secrets before confirming."
+    )
+
+
+def partial_scan_message(completed):
+    skipped = [tier for tier in scan_tiers() if tier not in completed]
+    return (
+        f"🔐 CREDENTIAL GUARD: Secret scan within budget — tiers "
+        f"{', '.join(map(str, completed)) or 'none'} completed, "
+        f"{', '.join(map(str, skipped))} skipped (secret_scan.budget_ms)."
+    )
+
+
+def apply_edits(text, edits):
+    """
+    Replay Edit/MultiEdit replacements on a file's text.
+
+    Returns:
+        (new text, [(first line, text of the lines it touched), ...] per
+        replacement, as of that edit), or None if an old_string is missing
+        and the tool call will fail anyway.
+    """
+    regions = []
+    for edit in edits:
+        old, new = edit.get("old_string", ""), edit.get("new_string", "")
+        if not old and not text:
+            pieces = ["", ""]  # MultiEdit creating a new file
+        elif not old or old not in text:
+            return None
+        else:
+            pieces = text.split(old) if edit.get("replace_all") else text.split(old, 1)
+
+        text = new.join(pieces)
+        offset = 0
+        for piece in pieces[:-1]:
+            start = offset + len(piece)
+            end = start + len(new)
+            offset = end
+            line_start = text.rfind("\n", 0, start) + 1
+            line_end = text.find("\n", end)
+            regions.append((text.count("\n", 0, line_start) + 1,
+                            text[line_start:line_end if line_end >= 0 else len(text)]))
+    return text, regions
+
+
+def scan_regions(path, regions):
+    """Scan the touched lines of an edit, with line numbers of the file."""
+    entropy = entropy_settings()
+    findings = []
+    for first_line, region in regions:
+        for finding in scan_text(region, path, entropy=entropy):
+            findings.append(dataclasses.replace(finding, line=finding.line + first_line - 1))
+    return findings
 
-        if has_keyword_with_value(check_line):
-            findings.append(("keyword_with_value", check_line.strip()[:60]))
 
+def scan_file_edit(tool_name, tool_input, cache):
+    """
+    Scan only the new text of an Edit/Write/MultiEdit call.
+
+    Write content is scanned as the whole file. Edits scan just the lines
+    they touch. When the result is clean and the rest of the file is known
+    clean, the blob SHA of the file after the edit is stored as clean:
+    a later git add/commit of exactly that content needs no scan.
+
+    Returns:
+        Findings (file line numbers where known)
+    """
+    path = tool_input.get("file_path", "")
+    if tool_name == "Write":
+        content = tool_input.get("content", "")
+        sha = blob_sha(content.encode("utf-8", "surrogateescape"))
+        findings = cache.get(sha, path)
+        if findings is None:
+            findings = scan_text(content, path, entropy=entropy_settings())
+            cache.put(sha, findings)
+        return findings
+
+    edits = tool_input.get("edits", []) if tool_name == "MultiEdit" else [tool_input]
+    edits = [e for e in edits if isinstance(e, dict)]
+    before = get_file_bytes(path) if os.path.exists(path) else b""
+    try:
+        replayed = apply_edits(before.decode("utf-8"), edits) if before is not None else None
+    except UnicodeDecodeError:
+        replayed = None
+    if replayed is None:
+        # Content around the edit unknown: the new strings on their own
+        return scan_text("\n".join(e.get("new_string", "") for e in edits), path, entropy=entropy_settings())
+
+    after, regions = replayed
+    findings = scan_regions(path, regions)
+    if not findings:
+        data = after.encode("utf-8")
+        sha = blob_sha(data)
+        if not before or cache.is_clean(blob_sha(before)):
+            cache.put(sha, [])
+        elif cache.get(sha) is None:
+            # First edit of a file not seen before: one full scan sets the baseline
+            full = scan_blob(path, data, entropy_settings())
+            if full is not None:
+                cache.put(sha, full)
     return findings
 
 
+def format_locations(findings, limit=5):
+    """'file:line' of the first findings, for deny messages."""
+    locations = []
+    for finding in findings:
+        if finding.location and finding.location not in locations:
+            locations.append(finding.location)
+    return ", ".join(locations[:limit])
+
+
 def parse_git_command(command):
     """Extract git subcommand and args."""
     parts = command.strip().split()
@@ -109,41 +768,95 @@ def parse_git_command(command):
     return parts[1], parts[2:]
 
 
-def main():
-    try:
-        hook_input = json.load(sys.stdin)
-    except Exception:
-        print(json.dumps(allow()))
-        return
-
+def evaluate(hook_input):
+    """Run the credential checks for one parsed hook payload and return the decision."""
     tool_name = hook_input.get("tool_name", "")
+    if tool_name in EDIT_TOOLS:
+        return check_file_edit(tool_name, hook_input.get("tool_input", {}))
     if tool_name != "Bash":
-        print(json.dumps(allow()))
-        return
+        return allow()
 
     command = hook_input.get("tool_input", {}).get("command", "")
     subcmd, args = parse_git_command(command)
 
     if not subcmd:
-        print(json.dumps(allow()))
-        return
+        return allow()
+
+    if subcmd not in ("commit", "add", "push"):
+        return allow()
+
+    cache = open_scan_cache()
+    try:
+        return check_git_command(subcmd, args, cache)
+    finally:
+        cache.save()
+
 
+def check_file_edit(tool_name, tool_input):
+    """
+    Deny an Edit/Write/MultiEdit whose new text contains a secret.
+
+    Only token formats, vendor patterns and multi-line blocks deny and
+    count as a strike. Keyword and entropy heuristics match ordinary code
+    too often to block a write; they are reported as a warning and are
+    checked again at commit time.
+    """
+    cache = open_scan_cache()
+    try:
+        findings = scan_file_edit(tool_name, tool_input, cache)
+    finally:
+        cache.save()
+    if not findings:
+        return allow()
+
+    hard = [f for f in findings if f.pattern not in HEURISTIC_FINDINGS]
+    if not hard:
+        patterns = ", ".join(sorted(set(f.pattern for f in findings[:5])))
+        return allow(
+            f"🔐 CREDENTIAL GUARD: possible secret in {tool_name} of "
+            f"{format_locations(findings, limit=3) or tool_input.get('file_path', '')} ({patterns}). "
+            f"If this is a real value, use environment variables or .env files instead."
+        )
+    findings = hard
+
+    strikes = add_strike()
+    patterns = ", ".join(sorted(set(f.pattern for f in findings[:5])))
+    return deny(
+        f"🔐 CREDENTIAL GUARD: {len(findings)} potential secret(s) in {tool_name} of "
+        f"{format_locations(findings, limit=3) or tool_input.get('file_path', '')}\n"
+        f"Patterns: {patterns}\n"
+        f"Strike {strikes}/{MAX_STRIKES}. Use environment variables or .env files instead."
+    )
+
+
+def check_git_command(subcmd, args, cache):
+    """Scan what a git add/commit/push would record or send."""
     # Check git commit — scan staged content
     if subcmd == "commit":
-        staged = get_staged_content()
-        if not staged:
-            print(json.dumps(allow()))
-            return
-
-        findings = scan_for_secrets(staged)
+        raw = get_staged_raw()
+        paths = unscanned_staged_paths(cache, raw)
+        if paths == []:
+            return allow()
+        if paths is not None and len(paths) > MAX_DIFF_PATHSPECS:
+            paths = None
+
+        findings, status, completed = scan_staged_cached(cache, raw, paths)
+        if status == "timeout" and not findings:
+            return ask(scan_incomplete_message(findings, DIFF_SCAN_TIMEOUT))
+        if status == "partial":
+            return allow(partial_scan_message(completed))
         if findings:
             strikes = add_strike()
-            patterns = ", ".join(set(f[0] for f in findings[:5]))
+            count = f"{len(findings)}+" if status in ("stopped", "timeout") else str(len(findings))
+            patterns = ", ".join(sorted(set(f.pattern for f in findings[:5])))
             msg = (
-                f"🔐 CREDENTIAL GUARD: {len(findings)} potential secret(s) in staged files!\n"
+                f"🔐 CREDENTIAL GUARD: {count} potential secret(s) in staged files!\n"
                 f"Patterns: {patterns}\n"
-                f"Strike {strikes}/{MAX_STRIKES}."
             )
+            locations = format_locations(findings)
+            if locations:
+                msg += f"Locations: {locations}\n"
+            msg += f"Strike {strikes}/{MAX_STRIKES}."
             if strikes >= MAX_STRIKES:
                 msg += "\n\n🛑 3 STRIKES: Session blocked for credential violations."
                 msg += "\nReview ALL staged files. Use `git diff --cached` to inspect."
@@ -151,47 +864,75 @@ def main():
             else:
                 msg += "\n\nRemove secrets before committing."
                 msg += "\nUse: git reset HEAD <file> to unstage."
-            print(json.dumps(deny(msg)))
-            return
+            return deny(msg)
 
     # Check git add — scan file content before staging
     if subcmd == "add":
-        files = [a for a in args if not a.startswith("-") and a != "."]
-        # For `git add .` or `git add -A`, we can't pre-scan efficiently
-        # Let the commit hook catch it
-        if not files or "." in args or "-A" in args:
-            print(json.dumps(allow()))
-            return
-
-        all_findings = []
-        for filepath in files:
-            content = get_file_content(filepath)
-            findings = scan_for_secrets(content)
-            if findings:
-                all_findings.extend([(filepath, f) for f in findings])
+        files = get_add_targets(args)
+        # Outside a repo git add fails anyway; the commit hook is the backstop
+        if not files:
+            return allow()
+
+        all_findings, _ = scan_files(files, cache)
 
         if all_findings:
             strikes = add_strike()
-            file_names = ", ".join(set(f[0] for f in all_findings[:3]))
+            file_names = format_locations(all_findings, limit=3)
             msg = (
                 f"🔐 CREDENTIAL GUARD: Secrets detected in: {file_names}\n"
                 f"Strike {strikes}/{MAX_STRIKES}. Remove secrets before staging."
             )
-            print(json.dumps(deny(msg)))
-            return
+            return deny(msg)
 
-    # Check git push — one more chance to catch
+    # Check git push — scan what the outgoing commits add
     if subcmd == "push":
-        staged = get_staged_content()
-        findings = scan_for_secrets(staged) if staged else []
+        outgoing = scan_outgoing_commits(args, cache)
+        if outgoing is not None:
+            findings, skipped, status = outgoing
+            if findings:
+                patterns = ", ".join(sorted(set(f.pattern for f in findings[:5])))
+                msg = (
+                    f"🔐 CREDENTIAL GUARD: {len(findings)} potential secret(s) in commits being pushed!\n"
+                    f"Patterns: {patterns}\n"
+                )
+                locations = format_locations(findings)
+                if locations:
+                    msg += f"Locations: {locations}\n"
+                msg += "Remove them from the commits (amend/rebase) before pushing."
+                return deny(msg)
+            if status == "timeout":
+                return ask(scan_incomplete_message(findings, DIFF_SCAN_TIMEOUT, "the pushed commits",
+                                                   "git log -p @{u}..HEAD"))
+            if skipped:
+                return allow(
+                    f"🔐 CREDENTIAL GUARD: {len(skipped)} file(s) over {MAX_SCAN_BYTES // 1024} KB "
+                    f"in the pushed commits were not scanned: {', '.join(skipped[:5])}"
+                )
+            return allow()
+
+        # git could not list the outgoing commits (no commits yet, bad ref): staged check only
+        findings, status, completed = scan_staged_cached(cache, get_staged_raw())
+        if status == "timeout" and not findings:
+            return ask(scan_incomplete_message(findings, DIFF_SCAN_TIMEOUT))
+        if status == "partial":
+            return allow(partial_scan_message(completed))
         if findings:
-            print(json.dumps(deny(
+            return deny(
                 f"🔐 CREDENTIAL GUARD: {len(findings)} secret(s) still staged! "
                 f"Clean up before pushing."
-            )))
-            return
+            )
+
+    return allow()
+
+
+def main():
+    try:
+        hook_input = json.load(sys.stdin)
+    except Exception:
+        print(json.dumps(allow()))
+        return
 
-    print(json.dumps(allow()))
+    print(json.dumps(evaluate(hook_input)))
 
 
 if __name__ == "__main__":
@@ -10,6 +10,8 @@ Enforces git workflow rules:
 Triggers: Bash (when command contains git)
 """
 import json, sys, os, re, shlex
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib"))
+from atomic_state import read_json, update_json
 STATE_FILE = os.path.join(os.getcwd(), ".stan", "session.json")
 
 def register_hook(name):
@@ -18,19 +20,11 @@ def register_hook(name):
 
 def read_state():
     """Read session state from .stan/session.json."""
-    try:
-        with open(STATE_FILE) as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return read_json(STATE_FILE, {})
 
 def write_state(key, value):
-    """Write a key to session state."""
-    state = read_state()
-    state[key] = value
-    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f)
+    """Write a key to session state (locked read-modify-write)."""
+    update_json(STATE_FILE, lambda state: state.update({key: value}))
 
 # Conventional Commits types
 COMMIT_TYPES = ["feat", "fix", "docs", "style", "refactor", "perf", "test", "build", "ci", "chore"]
@@ -212,13 +206,8 @@ def extract_commit_message(args: list, raw_command: str = None) -> str | None:
 
     return message
 
-def main():
-    try:
-        hook_input = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        print(json.dumps(allow()))
-        return
-
+def evaluate(hook_input: dict) -> dict:
+    """Run the git workflow checks for one parsed hook payload and return the decision."""
     register_hook("git-workflow")
 
     tool_name = hook_input.get("tool_name", "")
@@ -226,8 +215,7 @@ def main():
 
     # Only process Bash commands
     if tool_name != "Bash":
-        print(json.dumps(allow()))
-        return
+        return allow()
 
     command = tool_input.get("command", "")
 
@@ -236,8 +224,7 @@ def main():
 
     # Not a git command, allow
     if git_cmd is None:
-        print(json.dumps(allow()))
-        return
+        return allow()
 
     operation = git_cmd.get("operation")
     args = git_cmd.get("args", [])
@@ -248,8 +235,7 @@ def main():
         if message:
             is_valid, error = validate_conventional_commit(message)
             if not is_valid:
-                print(json.dumps(deny(error)))
-                return
+                return deny(error)
 
     # Check branch protection for push
     if operation == "push":
@@ -279,16 +265,23 @@ def main():
             if confirmed.get("key") == confirm_key:
                 # Already confirmed, clear and allow
                 write_state("protected_push_confirmed", {})
-                print(json.dumps(allow()))
-                return
+                return allow()
 
             # First attempt, store for confirmation
             write_state("protected_push_confirmed", {"key": confirm_key})
-            print(json.dumps(deny(error)))
-            return
+            return deny(error)
 
     # All checks passed
-    print(json.dumps(allow()))
+    return allow()
+
+def main():
+    try:
+        hook_input = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        print(json.dumps(allow()))
+        return
+
+    print(json.dumps(evaluate(hook_input)))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Crash- and concurrency-safe state files for STAN hooks.
+
+Claude Code runs the PreToolUse hooks of a matcher group in parallel
+(stan_gate, git_guard, credential_guard, research_guard), and several of
+them keep JSON state under .stan/ or /tmp. Writing such a file in place
+lets a parallel reader see half a document, and two unlocked
+read-modify-write cycles drop one of the updates.
+
+- write_atomic() writes a temp file in the same directory, fsyncs it and
+  renames it over the target: readers see the old or the new content,
+  never a mix.
+- locked() takes an flock on a sibling "<name>.lock" file (the target
+  itself is replaced on every write, so it cannot carry the lock).
+- update_json() combines both into one read-modify-write cycle.
+
+Lock waits are bounded by LOCK_TIMEOUT. A hook that cannot get the lock
+in time goes ahead without it: the write stays atomic, at worst one
+concurrent update is lost, but no hook ever hangs on a stuck holder.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Union
+
+# Longest wait for another process's lock
+LOCK_TIMEOUT = 2.0
+
+_RETRY_INTERVAL = 0.005
+
+
+def lock_path(path: Union[str, Path]) -> Path:
+    """Lock file guarding path."""
+    path = Path(path)
+    return path.with_name(path.name + ".lock")
+
+
+def acquire(lock_file: Union[str, Path], shared: bool = False,
+            timeout: float = LOCK_TIMEOUT) -> Optional[int]:
+    """
+    flock lock_file (created if missing).
+
+    Returns:
+        Open fd holding the lock, or None if not acquired within timeout
+    """
+    try:
+        fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return None
+    mode = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(fd, mode)
+            return fd
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return None
+            time.sleep(_RETRY_INTERVAL)
+
+
+def release(fd: Optional[int]) -> None:
+    if fd is not None:
+        os.close(fd)  # closing releases the flock
+
+
+@contextmanager
+def locked(path: Union[str, Path], shared: bool = False,
+           timeout: float = LOCK_TIMEOUT) -> Iterator[bool]:
+    """
+    Hold the advisory lock for path for the duration of the block.
+
+    Yields:
+        True if the lock was acquired, False if the wait timed out
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = acquire(lock_path(path), shared, timeout)
+    try:
+        yield fd is not None
+    finally:
+        release(fd)
+
+
+def write_atomic(path: Union[str, Path], data: Union[str, bytes]) -> os.stat_result:
+    """
+    Replace path with data via temp file + fsync + rename.
+
+    Returns:
+        Stat of the written file (taken before the rename, so it describes
+        this write even if another process replaces path right after)
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fchmod(f.fileno(), 0o644)
+            os.fsync(f.fileno())
+            stat = os.fstat(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    return stat
+
+
+def read_json(path: Union[str, Path], default: Any = None) -> Any:
+    """Parsed JSON of path; default if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: Union[str, Path], value: Any, **dumps_kwargs) -> os.stat_result:
+    """Atomically write value as JSON."""
+    return write_atomic(path, json.dumps(value, **dumps_kwargs))
+
+
+def update_json(path: Union[str, Path], update: Callable[[dict], Any],
+                timeout: float = LOCK_TIMEOUT, **dumps_kwargs) -> Any:
+    """
+    Locked read-modify-write of a JSON object file.
+
+    update receives the current dict ({} if missing, unreadable or not an
+    object) and modifies it in place; its return value is passed through.
+    """
+    with locked(path, timeout=timeout):
+        state = read_json(path, {})
+        if not isinstance(state, dict):
+            state = {}
+        result = update(state)
+        write_json(path, state, **dumps_kwargs)
+    return result
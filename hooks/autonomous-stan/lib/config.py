@@ -181,6 +181,27 @@ class ToolsConfig:
     # Each tool is a simple bool: installed or not
 
 
+@dataclass
+class SecretScanConfig:
+    """Secret scan depth for credential_guard at commit/push time."""
+    budget_ms: Optional[int] = None  # None = always run every tier
+    tiers: int = 3                   # 1 = token formats, 2 = + vendor patterns, 3 = + keyword heuristic
+    entropy: bool = False            # Optional tier: high-entropy tokens without a known format
+    entropy_threshold: float = 5.0   # Bits per char for tokens of 64+ chars (scaled for shorter ones)
+    entropy_min_length: int = 20     # Shorter tokens are never checked
+
+    def __post_init__(self):
+        if self.tiers not in (1, 2, 3):
+            self.tiers = 3
+        if self.budget_ms is not None and (not isinstance(self.budget_ms, int) or self.budget_ms <= 0):
+            self.budget_ms = None
+        self.entropy = bool(self.entropy)
+        if not isinstance(self.entropy_threshold, (int, float)) or not 0 < self.entropy_threshold <= 8:
+            self.entropy_threshold = 5.0
+        if not isinstance(self.entropy_min_length, int) or self.entropy_min_length < 8:
+            self.entropy_min_length = 20
+
+
 @dataclass
 class StanConfig:
     """Complete STAN configuration."""
@@ -188,6 +209,7 @@ class StanConfig:
     language: LanguageConfig = field(default_factory=LanguageConfig)
     project: ProjectConfig = field(default_factory=ProjectConfig)
     tools: ToolsConfig = field(default_factory=ToolsConfig)
+    secret_scan: SecretScanConfig = field(default_factory=SecretScanConfig)
 
 
 # --- Load / Save ---
@@ -217,6 +239,7 @@ def load_config() -> Optional[StanConfig]:
         language_data = data.get("language", {})
         project_data = data.get("project", {})
         tools_data = data.get("tools", {})
+        secret_scan_data = data.get("secret_scan") or {}
 
         return StanConfig(
             user=UserConfig(
@@ -235,6 +258,13 @@ def load_config() -> Optional[StanConfig]:
                 graphiti=bool(tools_data.get("graphiti", False)),
                 context7=bool(tools_data.get("context7", False)),
                 firecrawl=bool(tools_data.get("firecrawl", False))
+            ),
+            secret_scan=SecretScanConfig(
+                budget_ms=secret_scan_data.get("budget_ms"),
+                tiers=secret_scan_data.get("tiers", 3),
+                entropy=secret_scan_data.get("entropy", False),
+                entropy_threshold=secret_scan_data.get("entropy_threshold", 5.0),
+                entropy_min_length=secret_scan_data.get("entropy_min_length", 20)
             )
         )
     except Exception:
@@ -299,6 +329,14 @@ tools:
   graphiti: {graphiti}       # Long-term knowledge graph (Graphiti MCP)
   context7: {context7}       # Live library docs (Context7 MCP)
   firecrawl: {firecrawl}     # Web scraping/search (Firecrawl MCP)
+
+# --- Secret Scan (credential_guard, git commit/push) ---
+secret_scan:
+  budget_ms: {budget_ms}      # Time budget per scan, null = always run every tier
+  tiers: {tiers}              # 1 = token formats, 2 = + vendor patterns, 3 = + keyword heuristic
+  entropy: {entropy}          # Also flag high-entropy tokens without a known format
+  entropy_threshold: {entropy_threshold}  # Bits per char at 64+ chars, hex tokens are skipped
+  entropy_min_length: {entropy_min_length}  # Minimum token length for the entropy check
 """.format(
             name=config.user.name,
             skill_level=config.user.skill_level,
@@ -308,7 +346,12 @@ tools:
             output_folder=config.project.output_folder,
             graphiti=str(config.tools.graphiti).lower(),
             context7=str(config.tools.context7).lower(),
-            firecrawl=str(config.tools.firecrawl).lower()
+            firecrawl=str(config.tools.firecrawl).lower(),
+            budget_ms="null" if config.secret_scan.budget_ms is None else config.secret_scan.budget_ms,
+            tiers=config.secret_scan.tiers,
+            entropy=str(config.secret_scan.entropy).lower(),
+            entropy_threshold=config.secret_scan.entropy_threshold,
+            entropy_min_length=config.secret_scan.entropy_min_length
         )
 
         with open(config_file, "w") as f:
@@ -518,6 +561,14 @@ def get_tools_config() -> ToolsConfig:
     return ToolsConfig()
 
 
+def get_secret_scan_config() -> SecretScanConfig:
+    """Get secret scan depth/budget. Defaults to a full scan if not configured."""
+    config = load_config()
+    if config:
+        return config.secret_scan
+    return SecretScanConfig()
+
+
 def has_graphiti() -> bool:
     """Check if Graphiti MCP was declared as available at init time."""
     return get_tools_config().graphiti
@@ -85,8 +85,19 @@ def read_frontmatter(file_path: Path) -> Optional[dict]:
     if not file_path.exists():
         return None
 
-    content = file_path.read_text(encoding='utf-8')
+    return parse_frontmatter(file_path.read_text(encoding='utf-8'))
+
 
+def parse_frontmatter(content: str) -> Optional[dict]:
+    """
+    Parse YAML frontmatter from markdown text that is already in memory.
+
+    Args:
+        content: Full markdown document
+
+    Returns:
+        Dict with frontmatter data or None if no frontmatter
+    """
     if not content.startswith('---'):
         return None
 
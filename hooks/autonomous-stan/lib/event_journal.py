@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Append-only event journal for STAN hooks (.stan/events.jsonl).
+
+Test runs, file edits and tool errors are appended as one fixed-schema
+JSON line each:
+
+    {"ts": 1760000000.123, "kind": "test", "subject": "pytest -q", "ok": false}
+
+Appending never reads or rewrites the file. Readers scan backwards from
+the end (tail) and stop once they have enough events or cross `since`,
+so the cost follows the window asked for, not the history length.
+
+Once the journal grows past COMPACT_BYTES, the next append compacts it.
+Everything but the newest KEEP_EVENTS events is folded into summary
+counters (.stan/events_summary.json), and the journal is rewritten with
+only the tail. The tail is also capped at half of COMPACT_BYTES, so the
+next compaction is at least that many appended bytes away.
+
+Compaction holds an exclusive flock on .stan/events.lock; appends take it
+shared. Lock waits are bounded: a busy lock only skips or postpones the
+compaction, and an append that times out writes without the lock. To
+keep such an event, compaction carries bytes appended to the old file
+after its snapshot over into the new one (before and after the rename),
+and the unlocked appender re-appends its line if the file was swapped
+and the line did not make it across.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from atomic_state import acquire, release, write_atomic
+
+KINDS = ("test", "edit", "error")
+
+JOURNAL_FILE = "events.jsonl"
+SUMMARY_FILE = "events_summary.json"
+LOCK_FILE = "events.lock"
+
+# Compact once the journal exceeds this size, keeping the newest events
+# (at most KEEP_EVENTS, and no more than half of COMPACT_BYTES)
+COMPACT_BYTES = 256 * 1024
+KEEP_EVENTS = 1000
+
+# Subjects are cut so one line stays well below PIPE_BUF (atomic append)
+MAX_SUBJECT = 512
+
+# Longest wait for the journal lock before going ahead without it
+LOCK_TIMEOUT = 0.5
+
+_READ_BLOCK = 8192
+
+
+@dataclass(frozen=True)
+class Event:
+    """One journal line."""
+    ts: float
+    kind: str
+    subject: str
+    ok: Optional[bool] = None
+
+    def to_line(self) -> bytes:
+        return (json.dumps({"ts": round(self.ts, 3), "kind": self.kind,
+                            "subject": self.subject, "ok": self.ok},
+                           separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+    @classmethod
+    def from_line(cls, line: bytes) -> Optional["Event"]:
+        """Parse a line; None for partial or foreign lines."""
+        try:
+            data = json.loads(line)
+            return cls(float(data["ts"]), data["kind"], data["subject"], data.get("ok"))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+def stan_dir(root: Optional[str] = None) -> Path:
+    return Path(root or os.getcwd()) / ".stan"
+
+
+def journal_path(root: Optional[str] = None) -> Path:
+    return stan_dir(root) / JOURNAL_FILE
+
+
+def append(kind: str, subject: str, ok: Optional[bool] = None,
+           root: Optional[str] = None, now: Optional[float] = None) -> Event:
+    """
+    Append one event (a single O_APPEND write) and compact if the journal got too big.
+
+    Args:
+        kind: "test", "edit" or "error"
+        subject: Command, file path or error type
+        ok: Outcome for test runs, None otherwise
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown event kind '{kind}'. Valid: {', '.join(KINDS)}")
+    event = Event(time.time() if now is None else now, kind, subject[:MAX_SUBJECT], ok)
+    directory = stan_dir(root)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    path = directory / JOURNAL_FILE
+    line = event.to_line()
+    lock = acquire(directory / LOCK_FILE, shared=True, timeout=LOCK_TIMEOUT)
+    try:
+        written = _append_bytes(path, line)
+    finally:
+        release(lock)
+    if lock is None:
+        written = _recover_unlocked(path, line, written)
+
+    if written.st_size > COMPACT_BYTES:
+        compact(root)
+    return event
+
+
+def _append_bytes(path: Path, data: bytes) -> os.stat_result:
+    """One O_APPEND write; stat of the file written to."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        return os.fstat(fd)
+    finally:
+        os.close(fd)
+
+
+def _recover_unlocked(path: Path, line: bytes, written: os.stat_result) -> os.stat_result:
+    """
+    Make sure a line appended without the lock is in the current journal.
+
+    If a compaction swapped the file after our open, the line went into the
+    old file. Compaction carries such bytes over; if ours is not there,
+    append it again.
+    """
+    try:
+        current = path.stat()
+    except FileNotFoundError:
+        current = None
+    if current is not None and current.st_ino == written.st_ino:
+        return written
+    try:
+        if line in path.read_bytes():
+            return current
+    except FileNotFoundError:
+        pass
+    return _append_bytes(path, line)
+
+
+def _reverse_lines(path: Path) -> Iterator[bytes]:
+    """Lines of path from last to first, read in blocks from the end."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            step = min(_READ_BLOCK, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)  # may continue in the previous block
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+def iter_reverse(kinds: Optional[Iterable[str]] = None, since: Optional[float] = None,
+                 root: Optional[str] = None) -> Iterator[Event]:
+    """Events from newest to oldest, optionally filtered by kind, stopping before `since`."""
+    kinds = set(kinds) if kinds else None
+    for line in _reverse_lines(journal_path(root)):
+        event = Event.from_line(line)
+        if event is None:
+            continue
+        if since is not None and event.ts < since:
+            return
+        if kinds is None or event.kind in kinds:
+            yield event
+
+
+def tail(limit: Optional[int] = None, kinds: Optional[Iterable[str]] = None,
+         since: Optional[float] = None, root: Optional[str] = None) -> list[Event]:
+    """
+    Newest events in chronological order.
+
+    Args:
+        limit: At most this many events
+        kinds: Only these kinds
+        since: Only events at or after this timestamp
+    """
+    events = []
+    for event in iter_reverse(kinds, since, root):
+        events.append(event)
+        if limit is not None and len(events) >= limit:
+            break
+    events.reverse()
+    return events
+
+
+def last(kind: str, subject: Optional[str] = None, root: Optional[str] = None) -> Optional[Event]:
+    """Most recent event of a kind (and subject)."""
+    for event in iter_reverse((kind,), root=root):
+        if subject is None or event.subject == subject:
+            return event
+    return None
+
+
+def _empty_summary() -> dict:
+    return {"events": 0, "until": None, "tests": {"runs": 0, "failed": 0}, "edits": {}, "errors": {}}
+
+
+def summary(root: Optional[str] = None) -> dict:
+    """Counters for all events folded away by compaction."""
+    try:
+        data = json.loads((stan_dir(root) / SUMMARY_FILE).read_text())
+    except (OSError, ValueError):
+        return _empty_summary()
+    return data if isinstance(data, dict) else _empty_summary()
+
+
+def _fold(counters: dict, event: Event):
+    counters["events"] += 1
+    counters["until"] = max(counters["until"] or event.ts, event.ts)
+    if event.kind == "test":
+        counters["tests"]["runs"] += 1
+        counters["tests"]["failed"] += event.ok is False
+    elif event.kind == "edit":
+        counters["edits"][event.subject] = counters["edits"].get(event.subject, 0) + 1
+    else:
+        counters["errors"][event.subject] = counters["errors"].get(event.subject, 0) + 1
+
+
+def compact(root: Optional[str] = None, keep: Optional[int] = None) -> int:
+    """
+    Fold all but the newest `keep` events into the summary and rewrite the journal.
+
+    The kept tail is cut further to fit half of COMPACT_BYTES.
+
+    Returns:
+        Number of events folded (0 if nothing to do or the lock is busy)
+    """
+    keep = KEEP_EVENTS if keep is None else keep
+    directory = stan_dir(root)
+    lock = acquire(directory / LOCK_FILE, timeout=LOCK_TIMEOUT)
+    if lock is None:
+        return 0
+    try:
+        path = directory / JOURNAL_FILE
+        try:
+            journal = open(path, "rb")
+        except FileNotFoundError:
+            return 0
+        with journal:
+            return _compact_open(root, path, journal, keep)
+    finally:
+        release(lock)
+
+
+def _compact_open(root: Optional[str], path: Path, journal, keep: int) -> int:
+    """compact() on the open old journal, which may still receive unlocked appends."""
+    events = [event for event in map(Event.from_line, journal.read().splitlines())
+              if event is not None]
+    split, size = len(events), 0
+    while split > 0 and len(events) - split < keep:
+        size += len(events[split - 1].to_line())
+        if size > COMPACT_BYTES // 2:
+            break
+        split -= 1
+    if split == 0:
+        return 0
+    old, kept = events[:split], events[split:]
+
+    counters = summary(root)
+    for event in old:
+        _fold(counters, event)
+    write_atomic(path.parent / SUMMARY_FILE, json.dumps(counters, indent=2))
+    # Carry over what appends that missed the lock wrote since the snapshot
+    write_atomic(path, b"".join(event.to_line() for event in kept) + journal.read())
+    late = journal.read()
+    if late:
+        _append_bytes(path, late)
+    return len(old)
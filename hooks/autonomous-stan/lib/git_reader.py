@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+STAN Git Reader - Git-Metadaten ohne git-Prozess
+
+stan_gate fragt bei jedem Commit-Befehl Git-Dir, Branch und gestagte
+Pfade ab. Jeder `git`-Fork kostet auf ausgelasteten CI-Runnern 10–50 ms;
+dieses Modul liest dieselben Informationen direkt aus dem Repository:
+
+- Git-Dir: `.git`-Verzeichnis oder `.git`-Datei (Worktree, `gitdir:`),
+  gemeinsames Dir über `commondir`
+- HEAD/Branch: `HEAD`, lose Refs, `packed-refs`
+- gestagte Pfade: Index (v2/v3) gegen den HEAD-Tree; Teilbäume, deren
+  Cache-Tree-Eintrag (Index-Extension TREE) dem HEAD-Tree entspricht,
+  werden gar nicht erst gelesen. Objekte lose oder aus Packfiles
+  (inklusive OFS/REF-Deltas)
+
+Alles, was nicht sicher verstanden wird (Split-/Sparse-Index, Index v4,
+SHA-256, Reftable, GIT_DIR & Co. in der Umgebung, fehlende Objekte),
+wirft GitUnsupported — der Aufrufer fällt dann auf `git` zurück.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Umgebungsvariablen, die Git-Dir, Index oder Objekte umlenken
+GIT_ENV_OVERRIDES = (
+    "GIT_DIR", "GIT_WORK_TREE", "GIT_INDEX_FILE", "GIT_OBJECT_DIRECTORY",
+    "GIT_COMMON_DIR", "GIT_ALTERNATE_OBJECT_DIRECTORIES",
+)
+
+# Symbolische Refs werden höchstens so tief verfolgt (wie git: 5)
+MAX_SYMREF_DEPTH = 5
+
+_OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA, _REF_DELTA = 6, 7
+
+_INDEX_EXTENDED = 0x4000
+_INTENT_TO_ADD = 0x2000
+# Pflicht-Extensions (Kleinbuchstabe am Anfang), die hier nicht unterstützt sind
+_REQUIRED_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+
+class GitUnsupported(Exception):
+    """Repository-Zustand, den der Reader nicht sicher lesen kann."""
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Ein Index-Eintrag (nur was für den Vergleich mit HEAD nötig ist)."""
+    path: str
+    mode: str
+    sha: str
+    stage: int = 0
+    intent_to_add: bool = False
+
+
+def find_repo(start: Optional[str] = None) -> Optional["GitRepo"]:
+    """
+    Sucht wie git von start (Default: cwd) aufwärts nach `.git`.
+
+    Returns:
+        GitRepo, oder None wenn kein Repository gefunden wurde
+
+    Raises:
+        GitUnsupported: Umgebung oder `.git` nicht sicher auswertbar
+    """
+    if any(os.environ.get(name) for name in GIT_ENV_OVERRIDES):
+        raise GitUnsupported("git environment override")
+    directory = Path(start or os.getcwd()).absolute()
+    for candidate in (directory, *directory.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return GitRepo(candidate, dot_git)
+        if dot_git.is_file():
+            return GitRepo(candidate, _read_gitdir_file(dot_git))
+        if dot_git.exists() or dot_git.is_symlink():
+            raise GitUnsupported(f"unexpected {dot_git}")
+    return None
+
+
+def _read_gitdir_file(dot_git: Path) -> Path:
+    """Ziel einer `.git`-Datei (`gitdir: <pfad>`, relativ zur Datei)."""
+    try:
+        content = dot_git.read_text().strip()
+    except (OSError, UnicodeDecodeError) as e:
+        raise GitUnsupported(f"unreadable {dot_git}") from e
+    if not content.startswith("gitdir:"):
+        raise GitUnsupported(f"no gitdir in {dot_git}")
+    return (dot_git.parent / content[len("gitdir:"):].strip()).resolve()
+
+
+class GitRepo:
+    """Lesezugriff auf ein Repository (Worktree-Wurzel + Git-Dir)."""
+
+    def __init__(self, worktree: Path, git_dir: Path):
+        self.worktree = worktree
+        self.git_dir = git_dir
+        if not (git_dir / "HEAD").is_file():
+            raise GitUnsupported(f"not a git dir: {git_dir}")
+        commondir = git_dir / "commondir"
+        if commondir.is_file():
+            self.common_dir = (git_dir / commondir.read_text().strip()).resolve()
+        else:
+            self.common_dir = git_dir
+        self._check_config()
+        self._packs: Optional[List[Tuple[mmap.mmap, mmap.mmap]]] = None
+
+    @property
+    def is_linked_worktree(self) -> bool:
+        """True für `git worktree add`-Worktrees (eigenes Git-Dir unter worktrees/)."""
+        return self.git_dir != self.common_dir
+
+    def _check_config(self):
+        """SHA-256-Repos und Reftable haben andere Formate."""
+        try:
+            config = (self.common_dir / "config").read_text(errors="replace").lower()
+        except OSError:
+            return
+        for setting in ("objectformat", "refstorage"):
+            if setting in config:
+                raise GitUnsupported(f"extensions.{setting}")
+
+    # -- Refs --------------------------------------------------------------
+
+    def _read_ref(self, name: str) -> Optional[str]:
+        """Inhalt einer Ref (SHA oder "ref: ..."), None wenn es sie nicht gibt."""
+        base = self.git_dir if name == "HEAD" else self.common_dir
+        try:
+            return (base / name).read_text().strip()
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeDecodeError) as e:
+            raise GitUnsupported(f"unreadable ref {name}") from e
+        try:
+            with open(self.common_dir / "packed-refs") as f:
+                for line in f:
+                    if line.startswith(("#", "^")):
+                        continue
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == name:
+                        return parts[0]
+        except FileNotFoundError:
+            pass
+        return None
+
+    def head(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (Ref-Name oder None wenn detached, Commit-SHA oder None wenn unborn).
+        """
+        name, value = "HEAD", self._read_ref("HEAD")
+        ref = None
+        for _ in range(MAX_SYMREF_DEPTH):
+            if value is None:
+                return ref, None
+            if not value.startswith("ref:"):
+                break
+            ref = name = value[4:].strip()
+            value = self._read_ref(name)
+        else:
+            raise GitUnsupported("symref loop")
+        if len(value) != 40 or not all(c in "0123456789abcdef" for c in value):
+            raise GitUnsupported(f"bad ref value for {name}")
+        return ref, value
+
+    def branch(self) -> Optional[str]:
+        """Wie `git rev-parse --abbrev-ref HEAD`: Branch, "HEAD" wenn detached, None wenn unborn."""
+        ref, sha = self.head()
+        if sha is None:
+            return None
+        if ref is None:
+            return "HEAD"
+        return ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+
+    # -- Objekte -----------------------------------------------------------
+
+    def read_object(self, sha: str) -> Tuple[str, bytes]:
+        """(Typ, Inhalt) eines Objekts, lose oder aus einem Packfile."""
+        loose = self.common_dir / "objects" / sha[:2] / sha[2:]
+        try:
+            raw = zlib.decompress(loose.read_bytes())
+        except FileNotFoundError:
+            return self._read_packed(bytes.fromhex(sha))
+        except zlib.error as e:
+            raise GitUnsupported(f"corrupt object {sha}") from e
+        header, _, data = raw.partition(b"\0")
+        return header.split(b" ", 1)[0].decode(), data
+
+    def _load_packs(self) -> List[Tuple[mmap.mmap, mmap.mmap]]:
+        if self._packs is None:
+            self._packs = []
+            pack_dir = self.common_dir / "objects" / "pack"
+            for idx in sorted(pack_dir.glob("pack-*.idx")) if pack_dir.is_dir() else []:
+                with open(idx, "rb") as f_idx, open(idx.with_suffix(".pack"), "rb") as f_pack:
+                    index = mmap.mmap(f_idx.fileno(), 0, access=mmap.ACCESS_READ)
+                    pack = mmap.mmap(f_pack.fileno(), 0, access=mmap.ACCESS_READ)
+                if index[:8] != b"\xfftOc\x00\x00\x00\x02":
+                    raise GitUnsupported(f"pack index version of {idx.name}")
+                self._packs.append((index, pack))
+        return self._packs
+
+    def _read_packed(self, sha: bytes) -> Tuple[str, bytes]:
+        for index, pack in self._load_packs():
+            offset = _pack_offset(index, sha)
+            if offset is not None:
+                return self._unpack(pack, offset)
+        raise GitUnsupported(f"object {sha.hex()} not found")
+
+    def _unpack(self, pack: mmap.mmap, offset: int) -> Tuple[str, bytes]:
+        """Objekt an offset; Deltas werden rekursiv auf ihre Basis angewendet."""
+        byte = pack[offset]
+        kind, size, shift = (byte >> 4) & 7, byte & 15, 4
+        pos = offset + 1
+        while byte & 0x80:
+            byte = pack[pos]
+            pos += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+
+        if kind == _OFS_DELTA:
+            byte = pack[pos]
+            pos += 1
+            distance = byte & 0x7F
+            while byte & 0x80:
+                byte = pack[pos]
+                pos += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+            base_type, base = self._unpack(pack, offset - distance)
+            return base_type, _apply_delta(base, _inflate(pack, pos, size))
+        if kind == _REF_DELTA:
+            base_type, base = self.read_object(pack[pos:pos + 20].hex())
+            return base_type, _apply_delta(base, _inflate(pack, pos + 20, size))
+        if kind not in _OBJECT_TYPES:
+            raise GitUnsupported(f"pack object type {kind}")
+        return _OBJECT_TYPES[kind], _inflate(pack, pos, size)
+
+    def tree_entries(self, sha: str) -> List[Tuple[str, str, str]]:
+        """[(mode, name, sha), ...] eines Tree-Objekts."""
+        kind, data = self.read_object(sha)
+        if kind != "tree":
+            raise GitUnsupported(f"{sha} is a {kind}, not a tree")
+        entries = []
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            entries.append((data[pos:space].decode(), data[space + 1:nul].decode("utf-8", "surrogateescape"),
+                            data[nul + 1:nul + 21].hex()))
+            pos = nul + 21
+        return entries
+
+    def commit_tree(self, sha: str) -> str:
+        """Tree-SHA eines Commits."""
+        kind, data = self.read_object(sha)
+        if kind != "commit" or not data.startswith(b"tree "):
+            raise GitUnsupported(f"{sha} is not a commit")
+        return data[5:45].decode()
+
+    # -- Index -------------------------------------------------------------
+
+    def read_index(self) -> Tuple[List[IndexEntry], Dict[str, str]]:
+        """
+        Index-Einträge plus gültige Cache-Tree-Einträge ({"src/": tree-SHA}).
+
+        Raises:
+            GitUnsupported: Index v4, Split-/Sparse-Index, kaputter Index
+        """
+        try:
+            data = (self.git_dir / "index").read_bytes()
+        except FileNotFoundError:
+            return [], {}
+        if data[:4] != b"DIRC" or len(data) < 32:
+            raise GitUnsupported("bad index header")
+        version, count = struct.unpack(">II", data[4:12])
+        if version not in (2, 3):
+            raise GitUnsupported(f"index version {version}")
+
+        entries = []
+        pos = 12
+        for _ in range(count):
+            mode, = struct.unpack(">I", data[pos + 24:pos + 28])
+            sha = data[pos + 40:pos + 60].hex()
+            flags, = struct.unpack(">H", data[pos + 60:pos + 62])
+            extended = 0
+            header = 62
+            if flags & _INDEX_EXTENDED:
+                extended, = struct.unpack(">H", data[pos + 62:pos + 64])
+                header = 64
+            nul = data.index(b"\0", pos + header)
+            path = data[pos + header:nul].decode("utf-8", "surrogateescape")
+            entries.append(IndexEntry(path, format(mode, "o"), sha, (flags >> 12) & 3,
+                                      bool(extended & _INTENT_TO_ADD)))
+            # Einträge sind mit 1–8 NUL-Bytes auf ein Vielfaches von 8 aufgefüllt
+            pos += (header + len(data[pos + header:nul]) + 8) & ~7
+
+        cache_tree = {}
+        end = len(data) - 20
+        while pos + 8 <= end:
+            signature = data[pos:pos + 4]
+            size, = struct.unpack(">I", data[pos + 4:pos + 8])
+            body = data[pos + 8:pos + 8 + size]
+            if signature == b"TREE":
+                _parse_cache_tree(body, cache_tree)
+            elif signature in _REQUIRED_EXTENSIONS:
+                raise GitUnsupported(_REQUIRED_EXTENSIONS[signature])
+            elif not b"A"[0] <= signature[0] <= b"Z"[0]:
+                raise GitUnsupported(f"index extension {signature!r}")
+            pos += 8 + size
+        return entries, cache_tree
+
+    def staged_paths(self) -> List[str]:
+        """
+        Wie `git diff --cached --name-only --no-renames`: Pfade, deren
+        Index-Stand vom HEAD-Commit abweicht (neu, geändert, gelöscht, unmerged).
+        """
+        entries, cache_tree = self.read_index()
+        _, head = self.head()
+        if head is None:
+            return sorted({e.path for e in entries if not e.intent_to_add})
+
+        head_files: Dict[str, Tuple[str, str]] = {}
+        unchanged_dirs = set()
+
+        def walk(tree: str, prefix: str):
+            if cache_tree.get(prefix) == tree:
+                unchanged_dirs.add(prefix)
+                return
+            for mode, name, sha in self.tree_entries(tree):
+                if mode == "40000":
+                    walk(sha, f"{prefix}{name}/")
+                else:
+                    head_files[prefix + name] = (mode, sha)
+
+        walk(self.commit_tree(head), "")
+
+        staged = set()
+        for entry in entries:
+            if entry.intent_to_add or _in_dirs(entry.path, unchanged_dirs):
+                continue
+            in_head = head_files.pop(entry.path, None)
+            if entry.stage or in_head != (entry.mode, entry.sha):
+                staged.add(entry.path)
+        staged.update(head_files)  # Im HEAD, aber nicht mehr im Index
+        return sorted(staged)
+
+
+def _in_dirs(path: str, dirs: set) -> bool:
+    """Liegt path in einem der Verzeichnisse ("" = Wurzel, sonst mit "/")?"""
+    if not dirs:
+        return False
+    if "" in dirs:
+        return True
+    pos = path.find("/")
+    while pos >= 0:
+        if path[:pos + 1] in dirs:
+            return True
+        pos = path.find("/", pos + 1)
+    return False
+
+
+def _parse_cache_tree(body: bytes, result: Dict[str, str]):
+    """TREE-Extension: gültige Einträge als {verzeichnis/: tree-SHA}."""
+    pos = 0
+
+    def node(prefix: str):
+        nonlocal pos
+        nul = body.index(b"\0", pos)
+        name = body[pos:nul].decode("utf-8", "surrogateescape")
+        newline = body.index(b"\n", nul)
+        entry_count, subtrees = (int(x) for x in body[nul + 1:newline].split(b" "))
+        pos = newline + 1
+        path = f"{prefix}{name}/" if name else prefix
+        if entry_count >= 0:
+            result[path] = body[pos:pos + 20].hex()
+            pos += 20
+        for _ in range(subtrees):
+            node(path)
+
+    try:
+        if body:
+            node("")
+    except (ValueError, IndexError) as e:
+        raise GitUnsupported("bad cache tree") from e
+
+
+def _pack_offset(index: mmap.mmap, sha: bytes) -> Optional[int]:
+    """Offset von sha im Pack laut .idx (v2), None wenn nicht enthalten."""
+    first = sha[0]
+    low = struct.unpack(">I", index[8 + 4 * (first - 1):12 + 4 * (first - 1)])[0] if first else 0
+    high, = struct.unpack(">I", index[8 + 4 * first:12 + 4 * first])
+    total, = struct.unpack(">I", index[8 + 4 * 255:12 + 4 * 255])
+    names = 8 + 256 * 4
+
+    class _Names:
+        def __getitem__(self, i):
+            return index[names + 20 * i:names + 20 * i + 20]
+
+        def __len__(self):
+            return total
+
+    position = bisect_left(_Names(), sha, low, high)
+    if position >= high or _Names()[position] != sha:
+        return None
+    offsets = names + 24 * total  # nach Namen (20) und CRCs (4)
+    offset, = struct.unpack(">I", index[offsets + 4 * position:offsets + 4 * position + 4])
+    if offset & 0x80000000:
+        large = offsets + 4 * total + 8 * (offset & 0x7FFFFFFF)
+        offset, = struct.unpack(">Q", index[large:large + 8])
+    return offset
+
+
+def _inflate(pack: mmap.mmap, pos: int, size: int) -> bytes:
+    """zlib-Strom ab pos entpacken (Länge im Pack unbekannt, Ergebnis size Bytes)."""
+    decompressor = zlib.decompressobj()
+    out = []
+    step = max(size, 4096)
+    try:
+        while not decompressor.eof and pos < len(pack):
+            out.append(decompressor.decompress(pack[pos:pos + step]))
+            pos += step
+    except zlib.error as e:
+        raise GitUnsupported("corrupt pack entry") from e
+    data = b"".join(out)
+    if len(data) != size:
+        raise GitUnsupported("pack entry size mismatch")
+    return data
+
+
+def _varint(delta: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = delta[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Git-Delta (Copy/Insert-Befehle) auf base anwenden."""
+    source_size, pos = _varint(delta, 0)
+    target_size, pos = _varint(delta, pos)
+    if source_size != len(base):
+        raise GitUnsupported("delta base size mismatch")
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    size |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise GitUnsupported("reserved delta opcode")
+    if len(out) != target_size:
+        raise GitUnsupported("delta result size mismatch")
+    return bytes(out)
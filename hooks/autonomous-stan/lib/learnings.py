@@ -14,6 +14,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from atomic_state import write_json
+
 STAN_DIR = Path.home() / ".stan"
 LEARNINGS_DIR = STAN_DIR / "learnings"
 
@@ -44,10 +46,9 @@ def load_file(path: Path) -> list:
 
 
 def save_file(path: Path, data: list):
-    """Speichere JSON-Datei."""
+    """Speichere JSON-Datei (atomar via Temp-Datei + Rename)."""
     ensure_dirs()
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    write_json(path, data, indent=2, ensure_ascii=False)
 
 
 def save_learning(
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+STAN Scan Cache - Content-adressierter Cache für Secret-Scans
+
+Derselbe Inhalt wird bei `git add`, `git commit` und `git push` gescannt.
+Der Cache merkt sich pro Inhalt (Git-Blob-SHA bzw. Content-Hash) das
+Ergebnis: leer = sauber, sonst die Findings. Wiederholte Scans desselben
+Inhalts sind damit ein Dict-Lookup.
+
+Datei: .stan/secret_scan_cache (JSON)
+- version: Hash über Detektoren (Pattern-DB, Keyword-Heuristik,
+  Block-Scanner, Entropie), Scan-Konfiguration (Tiers, Entropie-Stufe)
+  und Cache-Format — ändert sich etwas davon, wird der komplette Cache
+  verworfen
+- entries: key → [[pattern, maskierter Treffer, pfad, zeile], ...],
+  in LRU-Reihenfolge (ältester zuerst), begrenzt auf max_entries
+
+Lesezugriffe ändern die Reihenfolge nur im Speicher; geschrieben wird sie
+erst, wenn neue Einträge dazukommen. Ein komplett gecachter Scan schreibt
+die Datei also nicht neu.
+
+Es landen nie Klartext-Secrets im Cache: alle Treffer werden maskiert.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from atomic_state import locked, read_json, write_json
+from secret_entropy import EntropySettings
+from secret_patterns import mask_secret
+from secret_scan import Finding, scan_text, scanner_version
+
+CACHE_FILE_NAME = "secret_scan_cache"
+CACHE_FORMAT = 1
+MAX_ENTRIES = 4096
+
+
+def blob_sha(data: bytes) -> str:
+    """Git-Blob-SHA-1 von data (wie `git hash-object`)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def get_cache_file(root: Optional[str] = None) -> Path:
+    """Cache-Datei im .stan/ des Projekts (Default: cwd)."""
+    return Path(root or os.getcwd()) / ".stan" / CACHE_FILE_NAME
+
+
+def cache_version(tiers: Sequence[int] = (), entropy: Optional[EntropySettings] = None) -> str:
+    """
+    Version der Verdicts: Detektoren + Scan-Konfiguration + Cache-Format.
+
+    Ein Blob, der ohne Entropie-Stufe sauber war, ist es mit ihr nicht
+    unbedingt — daher gehören Tiers und Entropie-Einstellungen dazu.
+    """
+    config = ",".join(map(str, tiers))
+    config += f";entropy={entropy.threshold}/{entropy.min_length}" if entropy else ";entropy=off"
+    h = hashlib.sha256(f"{scanner_version()}\0{config}".encode("utf-8"))
+    return f"{h.hexdigest()}:{CACHE_FORMAT}"
+
+
+class ScanCache:
+    """
+    LRU-Cache Inhalt → Findings, gebunden an eine Pattern-DB-Version.
+
+    get() liefert None (unbekannt), [] (sauber) oder die Findings.
+    Änderungen werden erst mit save() geschrieben.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = MAX_ENTRIES,
+                 version: Optional[str] = None):
+        self.path = Path(path) if path else get_cache_file()
+        self.max_entries = max_entries
+        self.version = version or cache_version()
+        self.entries: OrderedDict = OrderedDict()
+        self.changed = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            self.changed = True  # Veraltet: beim nächsten save() überschreiben
+            return
+        entries = data.get("entries")
+        if isinstance(entries, dict):
+            self.entries = OrderedDict(entries)
+
+    def get(self, key: str, path: Optional[str] = None) -> Optional[List[Finding]]:
+        """
+        Findings zu key, None wenn unbekannt. Markiert key als zuletzt benutzt
+        (nur im Speicher — ein reiner Lookup löst kein save() aus).
+
+        path: für Datei-Keys — derselbe Blob kann unter anderem Pfad liegen.
+        """
+        stored = self.entries.get(key)
+        if stored is None:
+            return None
+        self.entries.move_to_end(key)
+        if path is not None:
+            return [Finding(pattern, match, path, line) for pattern, match, _, line in stored]
+        return [Finding(*item) for item in stored]
+
+    def is_clean(self, key: str) -> bool:
+        """True nur wenn key bekannt und sauber ist."""
+        return self.get(key) == []
+
+    def put(self, key: str, findings: List[Finding]):
+        """Speichert das Ergebnis für key (maskiert) und verdrängt die ältesten Einträge."""
+        self.entries[key] = [
+            [f.pattern, mask_secret(f.match), f.path, f.line] for f in findings
+        ]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.changed = True
+
+    def save(self):
+        """
+        Schreibt den Cache atomar; Fehler (read-only, voll) werden ignoriert.
+
+        Unter dem Lock werden Einträge, die ein paralleler Hook seit dem
+        Laden geschrieben hat, übernommen statt überschrieben.
+        """
+        if not self.changed:
+            return
+        try:
+            with locked(self.path):
+                self._merge_from_disk()
+                write_json(self.path, {"version": self.version, "entries": self.entries})
+            self.changed = False
+        except OSError:
+            pass
+
+    def _merge_from_disk(self):
+        """Fremde Einträge aus der Datei vor die eigenen stellen (eigene gelten als neuer)."""
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return
+        entries = data.get("entries")
+        if not isinstance(entries, dict):
+            return
+        merged = OrderedDict((key, value) for key, value in entries.items() if key not in self.entries)
+        merged.update(self.entries)
+        while len(merged) > self.max_entries:
+            merged.popitem(last=False)
+        self.entries = merged
+
+
+def content_key(content: str, path: Optional[str] = None) -> str:
+    """
+    Cache-Key für einen Scan von content.
+
+    Dateien (path gesetzt) werden über ihren Git-Blob-SHA adressiert, damit
+    Blob-SHAs aus `git diff --raw`/`git status` direkt nachschlagbar sind.
+    Diffs bekommen ein eigenes Präfix — gleiche Bytes, andere Zeilenzuordnung.
+    """
+    sha = blob_sha(content.encode("utf-8", "surrogateescape"))
+    return sha if path is not None else f"diff:{sha}"
+
+
+def scan_cached(content: str, path: Optional[str] = None, cache: Optional[ScanCache] = None,
+                key: Optional[str] = None) -> List[Finding]:
+    """
+    scan_text() mit Cache. Bei Treffern aus dem Cache sind die Matches maskiert.
+
+    Args:
+        key: Vorberechneter Key (z.B. Blob-SHA der Rohbytes), sonst content_key()
+    """
+    if cache is None:
+        return scan_text(content, path)
+    key = key or content_key(content, path)
+    cached = cache.get(key, path)
+    if cached is not None:
+        return cached
+    findings = scan_text(content, path)
+    cache.put(key, findings)
+    return findings
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+STAN Secret Blocks - mehrzeilige Secrets als ein Treffer
+
+Private Keys (PEM) und GCP-Service-Account-JSON verteilen sich über viele
+Zeilen. Zeilenweise schlägt nur die Kopfzeile an, und jede Base64-Zeile im
+Rumpf läuft einzeln durch alle Patterns. Dieser Zustandsautomat geht die
+Zeilen einmal durch, verfolgt offene Blöcke und meldet jeden Block genau
+einmal (an seiner ersten Zeile). Die Zeilen des Blocks nimmt der Scanner
+danach aus dem Pattern-Scan heraus.
+
+Der Zustand (offener Block) lässt sich über zeilenweise geschnittene
+Stücke weiterreichen, siehe BlockScanner.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+PRIVATE_KEY_BLOCK = "private_key_block"
+SERVICE_ACCOUNT_KEY = "gcp_service_account_key"
+
+# Bei Änderungen am Zustandsautomaten erhöhen (Scan-Cache-Version)
+BLOCK_SCANNER_VERSION = 1
+
+# Längere "Blöcke" sind kein Key mehr: Block an dieser Stelle schließen
+MAX_BLOCK_LINES = 400
+
+_PEM_BEGIN = re.compile(r"-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY(?: BLOCK)?-----", re.IGNORECASE)
+_PEM_END = re.compile(r"-----END (?:[A-Z0-9]+ )*PRIVATE KEY(?: BLOCK)?-----", re.IGNORECASE)
+# Rumpfzeile: Base64 (auch in Quotes mit "\n", String-Verkettung, YAML-Einrückung)
+# oder PEM-Header wie "Proc-Type: 4,ENCRYPTED" / "Version: GnuPG"
+_PEM_BODY = re.compile(
+    r"""\s*["'`]?(?:[A-Za-z0-9+/=]*|[A-Za-z][A-Za-z-]*: .*?)(?:\\n)?["'`]?\s*[,+;\\)]?\s*"""
+)
+_SERVICE_ACCOUNT = re.compile(r'"type"\s*:\s*"service_account"')
+# Ohne eins davon kann kein Block beginnen: Stück ohne Zeilenschleife überspringen
+_BLOCK_START = re.compile(r'PRIVATE KEY|"service_account"', re.IGNORECASE)
+
+
+@dataclass
+class Block:
+    """Ein mehrzeiliger Treffer: Zeilen first..last (inklusive) des Puffers."""
+    name: str
+    first: int
+    last: int
+    header: str
+    reported: bool = True  # False: Fortsetzung eines schon gemeldeten Blocks
+    complete: bool = True  # False: am Stückende noch offen
+
+    @property
+    def summary(self) -> str:
+        """Kopfzeile plus Umfang, für Finding.match (enthält kein Key-Material)."""
+        size = self.last - self.first + 1
+        return f"{self.header} ({size}{'' if self.complete else '+'} lines)"
+
+
+class BlockScanner:
+    """
+    Zustandsautomat über Zeilen: idle → offener PEM-/Service-Account-Block → idle.
+
+    scan() kann mehrfach mit aufeinanderfolgenden Stücken aufgerufen werden;
+    ein am Stückende offener Block wird im nächsten Stück fortgesetzt und
+    dort nicht noch einmal gemeldet.
+    """
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.header = ""
+        self.length = 0
+        self.reported = False
+
+    def _open(self, kind: str, header: str):
+        self.kind, self.header, self.length, self.reported = kind, header, 1, False
+
+    def _opens(self, line: str) -> bool:
+        begin = _PEM_BEGIN.search(line)
+        if begin and not _PEM_END.search(line, begin.end()):
+            self._open(PRIVATE_KEY_BLOCK, begin.group(0))
+            return True
+        account = _SERVICE_ACCOUNT.search(line)
+        if account and "}" not in line[account.end():]:
+            self._open(SERVICE_ACCOUNT_KEY, account.group(0))
+            return True
+        return False
+
+    def _continues(self, line: str) -> Optional[bool]:
+        """True: Zeile gehört zum Block, False: Block endet mit ihr, None: Block endet davor."""
+        if self.length >= MAX_BLOCK_LINES:
+            return None
+        if self.kind == PRIVATE_KEY_BLOCK:
+            if _PEM_END.search(line):
+                return False
+            return True if _PEM_BODY.fullmatch(line) else None
+        return False if line.lstrip().startswith("}") else True
+
+    def scan(self, lines: List[str]) -> List[Block]:
+        """
+        Blöcke in lines; Zeilenindizes relativ zu diesem Stück.
+
+        Gemeldet werden nur Blöcke ab zwei Zeilen — eine einzelne Kopfzeile
+        finden die normalen Patterns.
+        """
+        blocks = []
+        if self.kind is None and not _BLOCK_START.search("\n".join(lines)):
+            return blocks
+        first = 0 if self.kind else None
+        number = 0
+        while number < len(lines):
+            line = lines[number]
+            if self.kind is None:
+                if self._opens(line):
+                    first = number
+                number += 1
+                continue
+
+            state = self._continues(line)
+            if state is None:
+                self._close(blocks, first, number - 1)
+                continue  # Zeile im Ruhezustand neu prüfen
+            self.length += 1
+            if state is False:
+                self._close(blocks, first, number)
+            number += 1
+
+        if self.kind is not None and first is not None:
+            self._emit(blocks, first, len(lines) - 1, complete=False)
+        return blocks
+
+    def _emit(self, blocks: List[Block], first: int, last: int, complete: bool = True):
+        """Block(teil) first..last aufnehmen, falls er mehr als die Kopfzeile umfasst."""
+        continuation = self.reported or first == 0 and self.length > last + 1
+        if continuation:
+            if last >= first:
+                blocks.append(Block(self.kind, first, last, self.header, reported=False, complete=complete))
+        elif last > first:
+            blocks.append(Block(self.kind, first, last, self.header, complete=complete))
+            self.reported = True
+
+    def _close(self, blocks: List[Block], first: int, last: int):
+        self._emit(blocks, first, last)
+        self.kind = None
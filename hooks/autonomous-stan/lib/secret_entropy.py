@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+STAN Secret Entropy - Shannon-Entropie für Tokens ohne bekanntes Format
+
+Die Patterns finden nur Secrets mit Vendor-Format. Zufällige Tokens
+(generierte Passwörter, Session-Keys, Base64-Blobs) fallen durch. Diese
+optionale Stufe zieht in einem Durchlauf über den Puffer alle langen
+Base64/Hex-artigen Tokens heraus und berechnet ihre Entropie gebündelt:
+
+- mit NumPy: ein Histogramm-Array pro Batch (bincount über Token-ID × Byte)
+- ohne NumPy: Counter pro Token (gleiche Werte, langsamer)
+
+Ein Token aus n Zeichen hat höchstens log2(n) Bit pro Zeichen: der
+Schwellwert gilt für Tokens ab 64 Zeichen und wird für kürzere mit
+log2(min(n, 64)) / 6 skaliert — sonst könnte ein 20-Zeichen-Token nie
+anschlagen. Reine Hex-Tokens (auch mit Bindestrichen) bleiben außen vor:
+Git-SHAs, UUIDs und Prüfsummen sind von Hex-Secrets nicht zu unterscheiden,
+Hex-Keys mit Vendor-Format finden die Patterns.
+"""
+
+import math
+import re
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from secret_patterns import mask_secret
+
+# NumPy ist optional: ohne läuft die gleiche Rechnung pro Token in Python
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+ENTROPY_FINDING = "high_entropy_string"
+
+# Bei Änderungen an Token-Auswahl oder Schwellwert-Logik erhöhen (Scan-Cache-Version)
+ENTROPY_VERSION = 2
+
+# Bit pro Zeichen für ein Token ab 64 Zeichen (Base64-Maximum: 6). Zufällige
+# Tokens erreichen ~85 % des Maximums log2(min(n, 64)), Bezeichner und Pfade
+# meist unter 82 %.
+ENTROPY_THRESHOLD = 5.0
+MIN_TOKEN_LENGTH = 20
+_BASE64_BITS = 6.0
+# Obergrenze pro NumPy-Batch: Histogramm = BATCH_TOKENS × 256 Zähler
+BATCH_TOKENS = 4096
+
+_TOKEN_CHARS = r"[A-Za-z0-9+/_\-]"
+_HEX = re.compile(r"[0-9a-fA-F]+(?:-[0-9a-fA-F]+)*")
+
+
+@dataclass(frozen=True)
+class EntropySettings:
+    """Schwellwert (Bit/Zeichen ab 64 Zeichen Länge) und Mindestlänge."""
+    threshold: float = ENTROPY_THRESHOLD
+    min_length: int = MIN_TOKEN_LENGTH
+
+
+@lru_cache(maxsize=8)
+def _token_pattern(min_length: int) -> re.Pattern:
+    """Kandidaten-Regex: min_length Token-Zeichen am Stück, optional "="-Padding."""
+    return re.compile(f"{_TOKEN_CHARS}{{{min_length},}}={{0,2}}")
+
+
+def shannon_entropy(token: str) -> float:
+    """Shannon-Entropie in Bit pro Zeichen."""
+    if not token:
+        return 0.0
+    size = len(token)
+    return -sum(count / size * math.log2(count / size) for count in Counter(token).values())
+
+
+def _entropies_numpy(tokens: List[str]) -> List[float]:
+    """Entropie aller Tokens über ein (Tokens × 256)-Histogramm je Batch."""
+    result = []
+    for begin in range(0, len(tokens), BATCH_TOKENS):
+        batch = tokens[begin:begin + BATCH_TOKENS]
+        lengths = np.fromiter(map(len, batch), dtype=np.int64, count=len(batch))
+        data = np.frombuffer("".join(batch).encode("ascii"), dtype=np.uint8).astype(np.int64)
+        ids = np.repeat(np.arange(len(batch), dtype=np.int64), lengths)
+        counts = np.bincount(ids * 256 + data, minlength=len(batch) * 256).reshape(len(batch), 256)
+        p = counts / lengths[:, None]
+        logs = np.log2(np.where(p > 0, p, 1.0))
+        result.extend((-(p * logs).sum(axis=1)).tolist())
+    return result
+
+
+def token_entropies(tokens: List[str]) -> List[float]:
+    """Entropie je Token, mit NumPy gebündelt, sonst einzeln."""
+    if not tokens:
+        return []
+    if NUMPY_AVAILABLE:
+        return _entropies_numpy(tokens)
+    return [shannon_entropy(token) for token in tokens]
+
+
+def _threshold_for(token: str, threshold: float) -> Optional[float]:
+    """
+    Schwelle für token: auf die maximal mögliche Entropie log2(min(n, 64)) skaliert.
+
+    None für Hex-Tokens (Hashes, UUIDs) — die werden nicht gemeldet.
+    """
+    body = token.rstrip("=")
+    if _HEX.fullmatch(body):
+        return None
+    return threshold * math.log2(min(len(body), 64)) / _BASE64_BITS
+
+
+def entropy_hits(buffer: str, starts: List[int], settings: Optional[EntropySettings] = None,
+                 skip: Optional[dict] = None) -> dict:
+    """
+    Zeilenindex → (ENTROPY_FINDING, maskierter Token) für hoch-entropische Tokens.
+
+    Ein Durchlauf über den Puffer sammelt die Kandidaten, die Entropie wird
+    gebündelt berechnet. Pro Zeile zählt der erste Token über der Schwelle.
+
+    Args:
+        skip: bereits entschiedene Zeilen (Treffer früherer Stufen)
+    """
+    settings = settings or EntropySettings()
+    skip = skip or {}
+    tokens, lines = [], []
+    for match in _token_pattern(settings.min_length).finditer(buffer):
+        number = bisect_right(starts, match.start()) - 1
+        if number in skip:
+            continue
+        tokens.append(match.group(0))
+        lines.append(number)
+
+    hits = {}
+    for token, number, entropy in zip(tokens, lines, token_entropies(tokens)):
+        if number in hits:
+            continue
+        required = _threshold_for(token, settings.threshold)
+        if required is not None and entropy >= required:
+            hits[number] = (ENTROPY_FINDING, mask_secret(token))
+    return hits
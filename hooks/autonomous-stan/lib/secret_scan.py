@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+STAN Secret Scan - Puffer-Scanner über ganze Diffs/Dateien
+
+Statt detect_secret() + has_keyword_with_value() für jede Zeile einzeln
+aufzurufen, läuft jedes Kandidaten-Pattern einmal über den gesamten Puffer
+der geprüften Zeilen. Treffer-Offsets werden über einen Zeilenstart-Index
+auf Datei und Zeile zurückgerechnet.
+
+Ergebnis ist identisch zur zeilenweisen Prüfung:
+- pro Zeile gewinnt das erste Pattern in Listenreihenfolge
+- Treffer, die über ein Zeilenende reichen, werden für ihre Startzeile
+  zeilenweise nachgeprüft
+- zeilengebundene Patterns (^, $, Lookarounds) laufen immer zeilenweise
+
+scan_tiered() scannt stattdessen Stufe für Stufe (Token-Formate, Vendor-
+Patterns, Keyword-Heuristik, optional Entropie) gegen ein Zeitbudget und
+meldet, welche Stufen vollständig gelaufen sind.
+"""
+
+import os
+import re
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+import hashlib
+from functools import partial
+from typing import List, Optional, Tuple
+
+from secret_blocks import BLOCK_SCANNER_VERSION, MAX_BLOCK_LINES, BlockScanner
+from secret_entropy import ENTROPY_VERSION, EntropySettings, entropy_hits
+from secret_patterns import (
+    KEYWORD_HEURISTIC_VERSION,
+    KEYWORD_VALUE,
+    TIER_ENTROPY,
+    TIER_FORMAT,
+    TIER_KEYWORD,
+    TIERS,
+    anchor_positions,
+    lowered,
+    get_pattern,
+    find_keyword_values,
+    line_bound_patterns,
+    mask_secret,
+    patterns_hash,
+    required_literals,
+    tier_patterns,
+)
+
+KEYWORD_FINDING = "keyword_with_value"
+
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+# Dateien über dieser Größe werden nicht vorab gescannt (Commit-Scan übernimmt)
+MAX_SCAN_BYTES = 1024 * 1024
+# Wie git: NUL-Byte in den ersten 8000 Bytes = Binärdatei
+BINARY_SNIFF_BYTES = 8000
+# Ab so vielen Dateien lohnt der Prozess-Pool
+PARALLEL_MIN_FILES = 4
+MAX_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class Finding:
+    """Ein Secret-Treffer mit Herkunft."""
+    pattern: str
+    match: str
+    path: Optional[str] = None
+    line: Optional[int] = None
+
+    @property
+    def location(self) -> str:
+        """'pfad:zeile' soweit bekannt, sonst ''."""
+        if self.path and self.line:
+            return f"{self.path}:{self.line}"
+        return self.path or ""
+
+
+@dataclass
+class TieredScan:
+    """Ergebnis von scan_tiered(): Findings plus vollständig gelaufene Stufen."""
+    findings: List[Finding] = field(default_factory=list)
+    completed: List[int] = field(default_factory=list)
+    requested: Tuple[int, ...] = TIERS
+
+    @property
+    def complete(self) -> bool:
+        """True wenn jede angeforderte Stufe ganz gelaufen ist."""
+        return set(self.requested) <= set(self.completed)
+
+    @property
+    def skipped(self) -> List[int]:
+        """Angeforderte, aber nicht (ganz) gelaufene Stufen."""
+        return [tier for tier in self.requested if tier not in self.completed]
+
+
+@dataclass
+class DiffPosition:
+    """Stand beim stückweisen Lesen eines Diffs: aktuelle Datei, nächste Zeile, offener Block."""
+    path: Optional[str] = None
+    line: Optional[int] = None
+    blocks: BlockScanner = field(default_factory=BlockScanner)
+
+
+def build_buffer(content: str, path: Optional[str] = None,
+                 position: Optional[DiffPosition] = None) -> Tuple[List[str], List[Tuple[Optional[str], Optional[int]]]]:
+    """
+    Zerlegt Inhalt in die zu prüfenden Zeilen plus deren Herkunft.
+
+    Mit path ist content eine Datei: jede Zeile zählt (Zeilennummern ab 1).
+    Ohne path ist content ein Diff: entfernte Zeilen ("-", nicht "---")
+    fallen weg, führendes "+" wird abgeschnitten, "+++ b/<pfad>" und
+    Hunk-Header liefern Datei und Zeilennummer der neuen Version.
+    position setzt einen in Stücken gelesenen Diff fort und wird fortgeschrieben.
+
+    Returns:
+        (zeilen, herkunft) mit herkunft[i] = (pfad, zeilennummer oder None)
+    """
+    if path is not None:
+        lines = content.split("\n")
+        return lines, [(path, number) for number in range(1, len(lines) + 1)]
+
+    lines, origins = [], []
+    current_path, next_line = (position.path, position.line) if position else (None, None)
+    for line in content.split("\n"):
+        if line.startswith("+++ "):
+            target = line[4:]
+            current_path = target[2:] if target.startswith("b/") else None
+            next_line = None
+        else:
+            hunk = _HUNK_HEADER.match(line)
+            if hunk:
+                next_line = int(hunk.group(1))
+
+        if line.startswith("-") and not line.startswith("---"):
+            continue
+
+        if next_line is not None and line[:1] in ("+", " ") and not line.startswith("+++ "):
+            origin = (current_path, next_line)
+            next_line += 1
+        else:
+            origin = (current_path, None)
+
+        lines.append(line[1:] if line.startswith("+") else line)
+        origins.append(origin)
+
+    if position is not None:
+        position.path, position.line = current_path, next_line
+    return lines, origins
+
+
+def _line_starts(buffer: str) -> List[int]:
+    """Offset jedes Zeilenanfangs im Puffer."""
+    starts = [0]
+    find = buffer.find
+    pos = find("\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find("\n", pos + 1)
+    return starts
+
+
+def _matching_lines(pattern, buffer: str, starts: List[int], fallback):
+    """
+    Erste Treffer von pattern pro Zeile, über einen einzigen Puffer.
+
+    Ein Treffer, der über das Zeilenende reicht, würde zeilenweise nicht
+    existieren oder anders aussehen: dann prüft fallback(index, start, end) genau
+    diese Zeile. Danach geht es immer in der nächsten Zeile weiter.
+
+    Yields:
+        (zeilenindex, treffertext)
+    """
+    size = len(buffer)
+    pos = 0
+    while pos <= size:
+        match = pattern.search(buffer, pos)
+        if match is None:
+            return
+        index = bisect_right(starts, match.start()) - 1
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else size
+        if match.end() <= end:
+            yield index, match.group(0)
+        else:
+            text = fallback(index, starts[index], end)
+            if text is not None:
+                yield index, text
+        pos = end + 1
+
+
+def _lines_containing(text_lower: str, starts: List[int], literal: str):
+    """Zeilenindizes (aufsteigend, einmalig), in denen literal vorkommt."""
+    last = -1
+    pos = text_lower.find(literal)
+    while pos != -1:
+        number = bisect_right(starts, pos) - 1
+        if number != last:
+            yield number
+            last = number
+        next_start = starts[number + 1] if number + 1 < len(starts) else len(text_lower)
+        pos = text_lower.find(literal, max(pos + 1, next_start))
+
+
+def _secret_hits(buffer: str, text_lower: str, lines: List[str], starts: List[int],
+                 indices: Optional[frozenset] = None, hits: Optional[dict] = None,
+                 deadline: Optional[float] = None) -> Tuple[dict, bool]:
+    """
+    Zeilenindex → (pattern_name, maskierter Treffer), erstes Pattern gewinnt.
+
+    Args:
+        indices: nur diese Patterns (eine Stufe), None = alle
+        hits: Treffer früherer Stufen — diese Zeilen sind schon entschieden
+        deadline: time.monotonic(), danach wird zwischen zwei Patterns abgebrochen
+
+    Returns:
+        (hits, vollständig)
+    """
+    hits = {} if hits is None else hits
+    size = len(buffer)
+    line_bound = line_bound_patterns()
+    literals = required_literals()
+    positions, unanchored = anchor_positions(buffer, text_lower)
+    candidates = positions.keys() | unanchored
+    if indices is not None:
+        candidates &= indices
+
+    def line_end(number):
+        return starts[number + 1] - 1 if number + 1 < len(starts) else size
+
+    for index in sorted(candidates):
+        if len(hits) == len(lines):
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            return hits, False
+        pattern, name = get_pattern(index)
+        literal = literals[index] if index in unanchored else None
+
+        if literal is not None:
+            # Zeilen ohne Pflicht-Literal können nicht matchen
+            for number in _lines_containing(text_lower, starts, literal):
+                if number in hits:
+                    continue
+                if index in line_bound:
+                    match = pattern.search(lines[number])
+                else:
+                    match = pattern.search(buffer, starts[number], line_end(number))
+                if match:
+                    hits[number] = (name, mask_secret(match.group(0)))
+
+        elif index in line_bound:
+            for number, line in enumerate(lines):
+                if number not in hits:
+                    match = pattern.search(line)
+                    if match:
+                        hits[number] = (name, mask_secret(match.group(0)))
+
+        elif index in unanchored:
+            def fallback(number, start, end, pattern=pattern):
+                # Ohne ^/$/Lookarounds ist pos/endpos exakt wie der Zeilen-Slice
+                match = pattern.search(buffer, start, end)
+                return match.group(0) if match else None
+
+            for number, text in _matching_lines(pattern, buffer, starts, fallback):
+                if number not in hits:
+                    hits[number] = (name, mask_secret(text))
+
+        else:
+            # Treffer beginnen genau am Anker: nur dort probieren
+            done = -1
+            for pos in positions[index]:
+                number = bisect_right(starts, pos) - 1
+                if number == done or number in hits:
+                    continue
+                match = pattern.match(buffer, pos)
+                if match is None:
+                    continue
+                done = number
+                end = line_end(number)
+                if match.end() > end:
+                    match = pattern.search(buffer, starts[number], end)
+                    if match is None:
+                        continue
+                hits[number] = (name, mask_secret(match.group(0)))
+    return hits, True
+
+
+def _block_hits(lines: List[str], position: Optional[DiffPosition] = None) -> dict:
+    """
+    Mehrzeilige Blöcke (Private Keys, Service-Account-JSON) als Treffer an
+    ihrer ersten Zeile. Die Blockzeilen werden in lines geleert, damit kein
+    Pattern auf jede Base64-Zeile einzeln anschlägt.
+    """
+    scanner = position.blocks if position is not None else BlockScanner()
+    hits = {}
+    for block in scanner.scan(lines):
+        for number in range(block.first, block.last + 1):
+            lines[number] = ""
+        if block.reported:
+            hits[block.first] = (block.name, block.summary)
+    return hits
+
+
+def _keyword_lines(buffer: str) -> set:
+    """Zeilenindizes, für die has_keyword_with_value() anschlagen würde."""
+    return {number for number, _, _ in find_keyword_values(buffer)}
+
+
+def scan_text(content: str, path: Optional[str] = None, position: Optional[DiffPosition] = None,
+              entropy: Optional[EntropySettings] = None) -> List[Finding]:
+    """
+    Scannt einen Diff (path=None) oder Dateiinhalt auf Secrets.
+
+    Diffs dürfen in zeilenweise geschnittenen Stücken kommen: dieselbe
+    position über alle Stücke weiterreichen (siehe build_buffer).
+    Mit entropy werden Zeilen ohne Pattern-Treffer zusätzlich auf
+    hoch-entropische Tokens geprüft.
+
+    Mehrzeilige Private Keys und Service-Account-JSON zählen als ein Treffer
+    an ihrer ersten Zeile (siehe secret_blocks).
+
+    Returns:
+        Findings in Zeilenreihenfolge; pro Zeile höchstens ein Block-/Pattern-/
+        Entropie-Treffer und ein keyword_with_value-Treffer.
+    """
+    lines, origins = build_buffer(content, path, position)
+    blocks = _block_hits(lines, position)
+    buffer = "\n".join(lines)
+    starts = _line_starts(buffer)
+
+    buffer_lower = lowered(buffer)
+
+    hits, _ = _secret_hits(buffer, buffer_lower, lines, starts, hits=blocks)
+    if entropy is not None:
+        hits.update(entropy_hits(buffer, starts, entropy, skip=hits))
+    keywords = _keyword_lines(buffer)
+    return _findings(lines, origins, hits, keywords)
+
+
+def _findings(lines: List[str], origins: list, hits: dict, keywords: set) -> List[Finding]:
+    """Treffer und Keyword-Zeilen als Findings in Zeilenreihenfolge."""
+    findings = []
+    for number in sorted(hits.keys() | keywords):
+        file_path, line_number = origins[number]
+        if number in hits:
+            name, masked = hits[number]
+            findings.append(Finding(name, masked, file_path, line_number))
+        if number in keywords:
+            findings.append(Finding(KEYWORD_FINDING, lines[number].strip()[:60], file_path, line_number))
+    return findings
+
+
+def scan_tiered(content: str, path: Optional[str] = None, position: Optional[DiffPosition] = None,
+                deadline: Optional[float] = None, tiers: Tuple[int, ...] = TIERS,
+                stop_on_findings: bool = True, entropy: Optional[EntropySettings] = None) -> TieredScan:
+    """
+    Scannt Stufe für Stufe: Token-Formate, Vendor-Patterns, Keyword-Heuristik
+    und — nur wenn in tiers angefordert — TIER_ENTROPY mit entropy (Default-Schwelle).
+
+    TIER_FORMAT läuft immer ganz (billig, über Anker). Jede weitere Stufe nur,
+    solange deadline (time.monotonic()) nicht erreicht ist; eine Stufe, die
+    mittendrin abbricht, zählt nicht als gelaufen. Mit stop_on_findings endet
+    der Scan nach der ersten Stufe mit Treffern — die reichen für ein Deny.
+
+    Pro Zeile gewinnt die niedrigste Stufe, innerhalb einer Stufe das erste
+    Pattern in Listenreihenfolge. Die Menge der Trefferzeilen ist bei
+    vollständigem Scan dieselbe wie bei scan_text().
+    """
+    lines, origins = build_buffer(content, path, position)
+    blocks = _block_hits(lines, position)
+    buffer = "\n".join(lines)
+    starts = _line_starts(buffer)
+    buffer_lower = lowered(buffer)
+
+    result = TieredScan(requested=tuple(tiers))
+    # Blöcke sind so eindeutig wie Token-Formate: Teil von TIER_FORMAT
+    hits, keywords = blocks, set()
+    for tier in sorted(tiers):
+        if tier != TIER_FORMAT and deadline is not None and time.monotonic() >= deadline:
+            break
+        if tier == TIER_KEYWORD:
+            keywords = _keyword_lines(buffer)
+        elif tier == TIER_ENTROPY:
+            hits.update(entropy_hits(buffer, starts, entropy, skip=hits))
+        else:
+            hits, finished = _secret_hits(buffer, buffer_lower, lines, starts, tier_patterns(tier), hits,
+                                          None if tier == TIER_FORMAT else deadline)
+            if not finished:
+                break
+        result.completed.append(tier)
+        if stop_on_findings and (hits or keywords):
+            break
+
+    result.findings = _findings(lines, origins, hits, keywords)
+    return result
+
+
+def scanner_version() -> str:
+    """
+    Version aller Detektoren: Pattern-DB, Keyword-Heuristik, Block-Scanner, Entropie.
+
+    Ändert sich einer davon, gelten gecachte Ergebnisse nicht mehr.
+    """
+    h = hashlib.sha256(patterns_hash().encode())
+    for part in (KEYWORD_HEURISTIC_VERSION, KEYWORD_VALUE.pattern,
+                 BLOCK_SCANNER_VERSION, MAX_BLOCK_LINES, ENTROPY_VERSION):
+        h.update(b"\0" + str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+def is_binary(data: bytes) -> bool:
+    """Binär-Heuristik von git: NUL-Byte am Anfang."""
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+def decode_text(data: bytes) -> str:
+    """Zu scannender Text; nicht als UTF-8 lesbare Dateien gelten als leer."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return ""
+
+
+def scan_blob(path: str, data: bytes, entropy: Optional[EntropySettings] = None) -> Optional[List[Finding]]:
+    """
+    Scannt einen Dateiinhalt (Rohbytes).
+
+    Returns:
+        Findings, [] für Binärdateien, None wenn größer als MAX_SCAN_BYTES
+    """
+    if len(data) > MAX_SCAN_BYTES:
+        return None
+    if is_binary(data):
+        return []
+    return scan_text(decode_text(data), path, entropy=entropy)
+
+
+def _scan_blob_job(item: Tuple[str, bytes], entropy: Optional[EntropySettings] = None) -> Optional[List[Finding]]:
+    return scan_blob(*item, entropy=entropy)
+
+
+def scan_blobs(items: List[Tuple[str, bytes]], workers: Optional[int] = None,
+               entropy: Optional[EntropySettings] = None,
+               deadline: Optional[float] = None) -> List[Optional[List[Finding]]]:
+    """
+    scan_blob() für viele Dateien, ab PARALLEL_MIN_FILES in einem Prozess-Pool.
+
+    Ergebnisse kommen in der Reihenfolge von items zurück, egal welcher
+    Worker zuerst fertig ist. Steht kein Pool zur Verfügung (kein fork,
+    keine Semaphoren), wird sequentiell gescannt.
+
+    Args:
+        deadline: time.monotonic()-Zeitpunkt; danach wird abgebrochen und
+            die Liste ist kürzer als items (nur die fertigen Ergebnisse
+            vom Anfang)
+    """
+    workers = workers or min(MAX_WORKERS, os.cpu_count() or 1, len(items))
+    if workers > 1 and len(items) >= PARALLEL_MIN_FILES:
+        try:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+            # fork: Worker erben die hier einmal geladene Pattern-DB
+            anchor_positions("")
+            context = multiprocessing.get_context("fork")
+            # Mit Deadline einzeln verteilen: beim Abbruch läuft pro Worker
+            # höchstens noch ein Blob zu Ende
+            chunksize = 1 if deadline is not None else max(1, len(items) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                results = []
+                try:
+                    for found in pool.map(partial(_scan_blob_job, entropy=entropy), items,
+                                          timeout=timeout, chunksize=chunksize):
+                        results.append(found)
+                except TimeoutError:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                return results
+        except Exception:
+            pass
+    results = []
+    for path, data in items:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        results.append(scan_blob(path, data, entropy))
+    return results
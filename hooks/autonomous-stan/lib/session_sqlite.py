@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+SQLite backend for STAN session state (STAN_SESSION_BACKEND=sqlite).
+
+The JSON backend rewrites the whole state file for every mutation. Here,
+the collections that grow over a session live in their own tables:
+
+- test_history       one row per test run, indexed by command
+- pending_learnings  one row per learning
+- error_counts       one row per error type (UPSERT increments)
+- task_sync          STAN task id -> Claude task id, indexed both ways
+
+Everything else (iteration_count, current_task, ...) is a JSON value in
+the kv table. Appends and point lookups touch only their rows. The
+database runs in WAL mode, so readers never block the writer, and lock
+waits are bounded by BUSY_TIMEOUT_MS.
+
+A new store imports the JSON session file next to it once (see
+session_state.migrate_json_to_sqlite). The UPSERTs need SQLite 3.24;
+with an older library session_state stays on the JSON backend.
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# Longest wait for another process's write lock
+BUSY_TIMEOUT_MS = 2000
+
+# INSERT ... ON CONFLICT DO UPDATE (UPSERT)
+MIN_SQLITE_VERSION = (3, 24, 0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS test_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    exit_code INTEGER,
+    passed INTEGER NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS test_history_command ON test_history (command, id);
+CREATE TABLE IF NOT EXISTS pending_learnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content TEXT NOT NULL,
+    context TEXT NOT NULL DEFAULT '',
+    timestamp TEXT,
+    saved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS error_counts (
+    error_type TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_sync (
+    stan_id TEXT PRIMARY KEY,
+    claude_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS task_sync_claude ON task_sync (claude_id);
+"""
+
+# Keys that session_state.get()/set() map onto tables instead of kv
+TABLE_KEYS = ("test_history", "pending_learnings", "error_counts", "task_sync_state")
+
+# Open stores per (database, pid): connections must not cross a fork
+_STORES: dict[tuple[Path, int], "SqliteStore"] = {}
+
+
+def is_supported() -> bool:
+    """True if the linked SQLite library has everything this backend uses."""
+    return sqlite3.sqlite_version_info >= MIN_SQLITE_VERSION
+
+
+def database_path(session_file: Path) -> Path:
+    """SQLite file for a JSON session file path (same name, .sqlite3)."""
+    return session_file.with_suffix(".sqlite3")
+
+
+def open_store(session_file: Path) -> "SqliteStore":
+    """Cached store for the session behind session_file."""
+    key = (database_path(session_file), os.getpid())
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = SqliteStore(session_file)
+    return store
+
+
+def close_all() -> None:
+    """Close all stores opened by this process."""
+    for (_, pid), store in list(_STORES.items()):
+        if pid == os.getpid():
+            store.close()
+    _STORES.clear()
+
+
+class SqliteStore:
+    """Session state in one SQLite database (WAL)."""
+
+    name = "sqlite"
+
+    def __init__(self, session_file: Path):
+        self.path = database_path(session_file)
+        self.conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_MS / 1000,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.depth = 0
+        self.imported = False
+        self._init_schema(session_file)
+
+    def _init_schema(self, session_file: Path):
+        """Create tables; on a new database, import the JSON session file."""
+        with self.transaction():
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+            if self._kv_get("session_id") is not None:
+                return
+            state = _read_json(session_file)
+            if state is not None:
+                self.import_state(state)
+                self.imported = True
+            if self._kv_get("session_id") is None:
+                self._kv_set("session_id", session_file.stem.replace("stan-session-", ""))
+            if self._kv_get("started_at") is None:
+                self._kv_set("started_at", datetime.now().isoformat())
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """One write transaction (BEGIN IMMEDIATE); nested calls join it."""
+        if self.depth:
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.depth = 1
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+        finally:
+            self.depth = 0
+
+    # -- Generic keys -------------------------------------------------------
+
+    def _kv_get(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _kv_set(self, key: str, value: Any):
+        self.conn.execute(
+            "INSERT INTO kv (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, default=str)),
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "test_history":
+            return self._test_history()
+        if key == "pending_learnings":
+            return self.pending_learnings()
+        if key == "error_counts":
+            return dict(self.conn.execute("SELECT error_type, count FROM error_counts"))
+        if key == "task_sync_state":
+            return self._task_sync_state(default)
+        value = self._kv_get(key)
+        return default if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        if key in TABLE_KEYS:
+            with self.transaction():
+                self._replace_table(key, value)
+            return
+        self._kv_set(key, value)
+
+    def _replace_table(self, key: str, value: Any):
+        """set() of a table-backed key: replace its rows."""
+        if key == "test_history":
+            self.conn.execute("DELETE FROM test_history")
+            for entry in value or []:
+                self._insert_test_result(entry)
+        elif key == "pending_learnings":
+            self.conn.execute("DELETE FROM pending_learnings")
+            for entry in value or []:
+                self.add_pending_learning(entry)
+        elif key == "error_counts":
+            self.conn.execute("DELETE FROM error_counts")
+            self.conn.executemany("INSERT INTO error_counts VALUES (?, ?)", (value or {}).items())
+        else:
+            value = value or {}
+            self.conn.execute("DELETE FROM task_sync")
+            self.conn.executemany("INSERT INTO task_sync VALUES (?, ?)",
+                                  value.get("stan_to_claude", {}).items())
+            self._kv_set("task_sync_synced_at", value.get("synced_at"))
+
+    def import_state(self, state: dict) -> None:
+        """Load a JSON-layout state dict (migration from the JSON backend)."""
+        with self.transaction():
+            for key, value in state.items():
+                self.set(key, value)
+
+    # -- Test history -------------------------------------------------------
+
+    def _insert_test_result(self, entry: dict):
+        self.conn.execute(
+            "INSERT INTO test_history (command, exit_code, passed, timestamp) VALUES (?, ?, ?, ?)",
+            (entry.get("command", ""), entry.get("exit_code"), int(bool(entry.get("passed"))),
+             entry.get("timestamp")),
+        )
+
+    def append_test_result(self, entry: dict, keep: int) -> None:
+        with self.transaction():
+            self._insert_test_result(entry)
+            self.conn.execute(
+                "DELETE FROM test_history WHERE id <= "
+                "(SELECT id FROM test_history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (keep,),
+            )
+
+    @staticmethod
+    def _test_row(row) -> dict:
+        command, exit_code, passed, timestamp = row
+        return {"command": command, "exit_code": exit_code, "passed": bool(passed),
+                "timestamp": timestamp}
+
+    def _test_history(self) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT command, exit_code, passed, timestamp FROM test_history ORDER BY id")
+        return [self._test_row(row) for row in rows]
+
+    def last_test_result(self, command: Optional[str] = None) -> Optional[dict]:
+        if command:
+            row = self.conn.execute(
+                "SELECT command, exit_code, passed, timestamp FROM test_history "
+                "WHERE command = ? ORDER BY id DESC LIMIT 1", (command,)).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT command, exit_code, passed, timestamp FROM test_history "
+                "ORDER BY id DESC LIMIT 1").fetchone()
+        return self._test_row(row) if row else None
+
+    # -- Pending learnings --------------------------------------------------
+
+    def add_pending_learning(self, entry: dict) -> None:
+        self.conn.execute(
+            "INSERT INTO pending_learnings (content, context, timestamp, saved) VALUES (?, ?, ?, ?)",
+            (entry.get("content", ""), entry.get("context", ""), entry.get("timestamp"),
+             int(bool(entry.get("saved")))),
+        )
+
+    def pending_learnings(self) -> list[dict]:
+        rows = self.conn.execute(
+            "SELECT content, context, timestamp, saved FROM pending_learnings ORDER BY id")
+        return [{"content": content, "context": context, "timestamp": timestamp, "saved": bool(saved)}
+                for content, context, timestamp, saved in rows]
+
+    def mark_learning_saved(self, index: int) -> None:
+        if index < 0:
+            return
+        self.conn.execute(
+            "UPDATE pending_learnings SET saved = 1 WHERE id = "
+            "(SELECT id FROM pending_learnings ORDER BY id LIMIT 1 OFFSET ?)",
+            (index,),
+        )
+
+    def clear_pending_learnings(self) -> None:
+        self.conn.execute("DELETE FROM pending_learnings")
+
+    # -- Error counts -------------------------------------------------------
+
+    def increment_error(self, error_type: str) -> int:
+        with self.transaction():
+            # No RETURNING (SQLite 3.35+): read back inside the same transaction
+            self.conn.execute(
+                "INSERT INTO error_counts (error_type, count) VALUES (?, 1) "
+                "ON CONFLICT (error_type) DO UPDATE SET count = count + 1",
+                (error_type,),
+            )
+            count = self.error_count(error_type)
+            self._kv_set("last_error_type", error_type)
+        return count
+
+    def error_count(self, error_type: str) -> int:
+        row = self.conn.execute(
+            "SELECT count FROM error_counts WHERE error_type = ?", (error_type,)).fetchone()
+        return row[0] if row else 0
+
+    def reset_error_count(self, error_type: str) -> None:
+        self.conn.execute("DELETE FROM error_counts WHERE error_type = ?", (error_type,))
+
+    def reset_all_errors(self) -> None:
+        with self.transaction():
+            self.conn.execute("DELETE FROM error_counts")
+            self._kv_set("last_error_type", None)
+
+    # -- Task sync ----------------------------------------------------------
+
+    def _task_sync_state(self, default: Any) -> Any:
+        synced_at = self._kv_get("task_sync_synced_at")
+        mapping = dict(self.conn.execute("SELECT stan_id, claude_id FROM task_sync"))
+        if not mapping and synced_at is None:
+            return default
+        return {
+            "stan_to_claude": mapping,
+            "claude_to_stan": {claude: stan for stan, claude in mapping.items()},
+            "synced_at": json.loads(synced_at) if synced_at else None,
+        }
+
+    def claude_task_for(self, stan_id: str) -> Optional[str]:
+        """Point lookup in the task-sync map."""
+        row = self.conn.execute(
+            "SELECT claude_id FROM task_sync WHERE stan_id = ?", (stan_id,)).fetchone()
+        return row[0] if row else None
+
+    def stan_task_for(self, claude_id: str) -> Optional[str]:
+        """Reverse point lookup in the task-sync map."""
+        row = self.conn.execute(
+            "SELECT stan_id FROM task_sync WHERE claude_id = ?", (claude_id,)).fetchone()
+        return row[0] if row else None
+
+
+def _read_json(session_file: Path) -> Optional[dict]:
+    """JSON session state to migrate, None if there is none (or it is unreadable)."""
+    try:
+        with open(session_file) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
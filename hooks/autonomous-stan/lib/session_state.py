@@ -4,18 +4,49 @@
 import json
 import os
 import hashlib
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
+
+import atomic_state
 
 # Session file location
 SESSION_DIR = Path("/tmp")
 
+# Storage backend, selected per process via STAN_SESSION_BACKEND
+BACKEND_ENV = "STAN_SESSION_BACKEND"
+BACKENDS = ("json", "sqlite")
+
+# Test runs kept in test_history
+TEST_HISTORY_LIMIT = 100
+
+# Parsed state per session file, valid while (inode, mtime_ns, size) is
+# unchanged. Writes replace the file (new inode), so a write by another
+# hook process changes the stat key and forces a re-read.
+_STATE_CACHE: dict[Path, tuple[tuple[int, int, int], dict]] = {}
+
+
+def _get_parent_pid() -> int:
+    """PID of the process that started the hook.
+
+    stan_hookd runs hooks in a forked worker, so the client shim passes
+    its own parent PID via STAN_HOOK_PPID to keep session IDs stable.
+    """
+    override = os.environ.get("STAN_HOOK_PPID")
+    if override and override.isdigit():
+        return int(override)
+    return os.getppid()
+
 
 def _get_session_id() -> str:
     """Generate a session ID based on CWD and parent PID."""
-    cwd = os.getcwd()
-    ppid = os.getppid()
+    return _session_id_for(os.getcwd(), _get_parent_pid())
+
+
+@lru_cache(maxsize=32)
+def _session_id_for(cwd: str, ppid: int) -> str:
     key = f"{cwd}:{ppid}"
     return hashlib.md5(key.encode()).hexdigest()[:12]
 
@@ -26,24 +57,135 @@ def get_session_file() -> Path:
     return SESSION_DIR / f"stan-session-{session_id}.json"
 
 
-def _load_state() -> dict:
-    """Load session state from file."""
-    session_file = get_session_file()
-    if not session_file.exists():
+def _stat_key(session_file: Path) -> Optional[tuple[int, int, int]]:
+    """(inode, mtime_ns, size) of the session file, None if it does not exist."""
+    try:
+        stat = session_file.stat()
+    except OSError:
+        return None
+    return _key_of(stat)
+
+
+def _key_of(stat: os.stat_result) -> tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _read_state(session_file: Path) -> dict:
+    """
+    Load session state from file.
+
+    The parsed state is cached per file and reused until the file's
+    (inode, mtime_ns, size) changes. The returned dict is shared with the cache:
+    callers that mutate it must persist the change with _save_state().
+    """
+    key = _stat_key(session_file)
+    if key is None:
+        _STATE_CACHE.pop(session_file, None)
         return _create_default_state()
 
+    cached = _STATE_CACHE.get(session_file)
+    if cached and cached[0] == key:
+        return cached[1]
+
     try:
         with open(session_file, "r") as f:
-            return json.load(f)
+            state = json.load(f)
     except (json.JSONDecodeError, IOError):
+        _STATE_CACHE.pop(session_file, None)
         return _create_default_state()
+    _STATE_CACHE[session_file] = (key, state)
+    return state
+
+
+def _write_state(session_file: Path, state: dict) -> None:
+    """Atomically replace the session file and cache the written state."""
+    _STATE_CACHE.pop(session_file, None)
+    content = json.dumps(state, indent=2, default=str)
+    stat = atomic_state.write_atomic(session_file, content)
+    # Cache what a re-read would return (default=str may have converted values)
+    _STATE_CACHE[session_file] = (_key_of(stat), json.loads(content))
+
+
+class _Transaction:
+    """State of an open transaction() for one session file."""
+
+    def __init__(self, session_file: Path, state: dict):
+        self.session_file = session_file
+        self.state = state
+        self.dirty = False
+
+
+_ACTIVE: Optional[_Transaction] = None
+
+
+def _current_transaction(session_file: Path) -> Optional[_Transaction]:
+    if _ACTIVE is not None and _ACTIVE.session_file == session_file:
+        return _ACTIVE
+    return None
+
+
+def _load_state() -> dict:
+    """Load session state (the in-memory state inside a transaction)."""
+    session_file = get_session_file()
+    active = _current_transaction(session_file)
+    if active is not None:
+        return active.state
+    return _read_state(session_file)
 
 
 def _save_state(state: dict) -> None:
-    """Save session state to file."""
+    """Save session state to file (deferred to commit inside a transaction)."""
     session_file = get_session_file()
-    with open(session_file, "w") as f:
-        json.dump(state, f, indent=2, default=str)
+    active = _current_transaction(session_file)
+    if active is not None:
+        active.state = state
+        active.dirty = True
+        return
+    _write_state(session_file, state)
+
+
+@contextmanager
+def _json_transaction() -> Iterator[None]:
+    """
+    transaction() for the JSON backend: one load, at most one write.
+
+    The session file's advisory lock is held from the load to the write,
+    so parallel hook processes do not overwrite each other's updates.
+    """
+    global _ACTIVE
+    session_file = get_session_file()
+    if _current_transaction(session_file) is not None:
+        yield
+        return
+
+    with atomic_state.locked(session_file):
+        outer = _ACTIVE
+        active = _ACTIVE = _Transaction(session_file, _read_state(session_file))
+        try:
+            yield
+        except BaseException:
+            # Helpers may have mutated the cached dict in place
+            _STATE_CACHE.pop(session_file, None)
+            raise
+        else:
+            if active.dirty:
+                _write_state(session_file, active.state)
+        finally:
+            _ACTIVE = outer
+
+
+def _mutation(method):
+    """Run a JsonBackend method as one locked read-modify-write."""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with _json_transaction():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def clear_cache() -> None:
+    """Drop all cached session states (next read goes to disk)."""
+    _STATE_CACHE.clear()
 
 
 def _create_default_state() -> dict:
@@ -60,17 +202,169 @@ def _create_default_state() -> dict:
     }
 
 
+class JsonBackend:
+    """Default backend: the whole session state as one JSON file."""
+
+    name = "json"
+
+    def transaction(self):
+        return _json_transaction()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return _load_state().get(key, default)
+
+    @_mutation
+    def set(self, key: str, value: Any) -> None:
+        state = _load_state()
+        state[key] = value
+        _save_state(state)
+
+    @_mutation
+    def append_test_result(self, entry: dict, keep: int) -> None:
+        state = _load_state()
+        history = state.get("test_history", [])
+        history.append(entry)
+        state["test_history"] = history[-keep:]
+        _save_state(state)
+
+    def last_test_result(self, command: Optional[str] = None) -> Optional[dict]:
+        history = self.get("test_history", [])
+        if not history:
+            return None
+        if command:
+            for entry in reversed(history):
+                if entry.get("command") == command:
+                    return entry
+            return None
+        return history[-1]
+
+    @_mutation
+    def add_pending_learning(self, entry: dict) -> None:
+        state = _load_state()
+        pending = state.get("pending_learnings", [])
+        pending.append(entry)
+        state["pending_learnings"] = pending
+        _save_state(state)
+
+    def pending_learnings(self) -> list[dict]:
+        return self.get("pending_learnings", [])
+
+    @_mutation
+    def mark_learning_saved(self, index: int) -> None:
+        state = _load_state()
+        pending = state.get("pending_learnings", [])
+        if 0 <= index < len(pending):
+            pending[index]["saved"] = True
+            state["pending_learnings"] = pending
+            _save_state(state)
+
+    @_mutation
+    def clear_pending_learnings(self) -> None:
+        state = _load_state()
+        state["pending_learnings"] = []
+        _save_state(state)
+
+    @_mutation
+    def increment_error(self, error_type: str) -> int:
+        state = _load_state()
+        counts = state.get("error_counts", {})
+        counts[error_type] = counts.get(error_type, 0) + 1
+        state["error_counts"] = counts
+        state["last_error_type"] = error_type
+        _save_state(state)
+        return counts[error_type]
+
+    def error_count(self, error_type: str) -> int:
+        return self.get("error_counts", {}).get(error_type, 0)
+
+    @_mutation
+    def reset_error_count(self, error_type: str) -> None:
+        state = _load_state()
+        counts = state.get("error_counts", {})
+        if error_type in counts:
+            del counts[error_type]
+            state["error_counts"] = counts
+            _save_state(state)
+
+    @_mutation
+    def reset_all_errors(self) -> None:
+        state = _load_state()
+        state["error_counts"] = {}
+        state["last_error_type"] = None
+        _save_state(state)
+
+
+_JSON_BACKEND = JsonBackend()
+
+
+def get_backend_name() -> str:
+    """
+    Configured backend: STAN_SESSION_BACKEND=json (default) or sqlite.
+
+    sqlite falls back to json if the SQLite library is too old for it.
+    """
+    name = os.environ.get(BACKEND_ENV, "json").strip().lower()
+    if name == "sqlite":
+        import session_sqlite
+        return name if session_sqlite.is_supported() else "json"
+    return name if name in BACKENDS else "json"
+
+
+def _backend():
+    """Storage backend for the current session."""
+    if get_backend_name() == "sqlite":
+        import session_sqlite
+        return session_sqlite.open_store(get_session_file())
+    return _JSON_BACKEND
+
+
+def migrate_json_to_sqlite(session_file: Optional[Path] = None) -> bool:
+    """
+    Copy a JSON session file into the SQLite store next to it.
+
+    Runs automatically when the SQLite backend opens a new store; the
+    JSON file is left untouched, so switching back to the JSON backend
+    resumes from the state at migration time.
+
+    Returns:
+        True if a JSON state was imported
+    """
+    import session_sqlite
+    return session_sqlite.open_store(session_file or get_session_file()).imported
+
+
+def transaction():
+    """
+    Batch several session_state calls into one load and at most one write.
+
+    Inside the block, all module functions (get, set, record_test_result,
+    increment_error, ...) work on one in-memory state (JSON) or one
+    database transaction (SQLite). On normal exit changes are written
+    once, and only if something changed. If the block raises, the changes
+    are discarded. A nested transaction on the same session joins the
+    outer one.
+
+    Usage:
+        with session_state.transaction():
+            record_test_result(command, exit_code)
+            increment_error("test_failure")
+    """
+    return _backend().transaction()
+
+
 def get(key: str, default: Any = None) -> Any:
-    """Get a value from session state."""
-    state = _load_state()
-    return state.get(key, default)
+    """
+    Get a value from session state.
+
+    Lists and dicts are shared with the read cache; copy them before
+    modifying them outside of set().
+    """
+    return _backend().get(key, default)
 
 
 def set(key: str, value: Any) -> None:
     """Set a value in session state."""
-    state = _load_state()
-    state[key] = value
-    _save_state(state)
+    _backend().set(key, value)
 
 
 def record_test_result(command: str, exit_code: int) -> dict:
@@ -84,32 +378,21 @@ def record_test_result(command: str, exit_code: int) -> dict:
     Returns:
         Dict with 'passed' and 'red_to_green' keys
     """
-    state = _load_state()
-    history = state.get("test_history", [])
-
     passed = exit_code == 0
+    backend = _backend()
 
-    # Check for red-to-green
-    red_to_green = False
-    if passed and history:
-        # Look for previous run of same command
-        for prev in reversed(history):
-            if prev.get("command") == command:
-                if not prev.get("passed"):
-                    red_to_green = True
-                break
-
-    # Add to history
-    history.append({
-        "command": command,
-        "exit_code": exit_code,
-        "passed": passed,
-        "timestamp": datetime.now().isoformat(),
-    })
+    with backend.transaction():
+        # Red-to-green: the previous run of the same command failed
+        previous = backend.last_test_result(command) if passed else None
+        red_to_green = previous is not None and not previous.get("passed")
 
-    # Keep last 100 entries
-    state["test_history"] = history[-100:]
-    _save_state(state)
+        # Keep last TEST_HISTORY_LIMIT entries
+        backend.append_test_result({
+            "command": command,
+            "exit_code": exit_code,
+            "passed": passed,
+            "timestamp": datetime.now().isoformat(),
+        }, keep=TEST_HISTORY_LIMIT)
 
     return {
         "passed": passed,
@@ -127,17 +410,7 @@ def get_last_test_result(command: Optional[str] = None) -> Optional[dict]:
     Returns:
         Last test result or None
     """
-    history = get("test_history", [])
-    if not history:
-        return None
-
-    if command:
-        for entry in reversed(history):
-            if entry.get("command") == command:
-                return entry
-        return None
-
-    return history[-1]
+    return _backend().last_test_result(command)
 
 
 def add_pending_learning(content: str, context: str = "") -> None:
@@ -148,42 +421,27 @@ def add_pending_learning(content: str, context: str = "") -> None:
         content: Learning content
         context: Additional context
     """
-    state = _load_state()
-    pending = state.get("pending_learnings", [])
-
-    pending.append({
+    _backend().add_pending_learning({
         "content": content,
         "context": context,
         "timestamp": datetime.now().isoformat(),
         "saved": False,
     })
 
-    state["pending_learnings"] = pending
-    _save_state(state)
-
 
 def get_pending_learnings() -> list[dict]:
     """Get all pending (unsaved) learnings."""
-    pending = get("pending_learnings", [])
-    return [l for l in pending if not l.get("saved")]
+    return [l for l in _backend().pending_learnings() if not l.get("saved")]
 
 
 def mark_learning_saved(index: int) -> None:
     """Mark a learning as saved."""
-    state = _load_state()
-    pending = state.get("pending_learnings", [])
-
-    if 0 <= index < len(pending):
-        pending[index]["saved"] = True
-        state["pending_learnings"] = pending
-        _save_state(state)
+    _backend().mark_learning_saved(index)
 
 
 def clear_pending_learnings() -> None:
     """Clear all pending learnings."""
-    state = _load_state()
-    state["pending_learnings"] = []
-    _save_state(state)
+    _backend().clear_pending_learnings()
 
 
 def save_pending_learnings() -> int:
@@ -220,40 +478,22 @@ def increment_error(error_type: str) -> int:
     Returns:
         New count for this error type
     """
-    state = _load_state()
-    counts = state.get("error_counts", {})
-
-    counts[error_type] = counts.get(error_type, 0) + 1
-    state["error_counts"] = counts
-    state["last_error_type"] = error_type
-    _save_state(state)
-
-    return counts[error_type]
+    return _backend().increment_error(error_type)
 
 
 def get_error_count(error_type: str) -> int:
     """Get error count for a type."""
-    counts = get("error_counts", {})
-    return counts.get(error_type, 0)
+    return _backend().error_count(error_type)
 
 
 def reset_error_count(error_type: str) -> None:
     """Reset error count for a type."""
-    state = _load_state()
-    counts = state.get("error_counts", {})
-
-    if error_type in counts:
-        del counts[error_type]
-        state["error_counts"] = counts
-        _save_state(state)
+    _backend().reset_error_count(error_type)
 
 
 def reset_all_errors() -> None:
     """Reset all error counts."""
-    state = _load_state()
-    state["error_counts"] = {}
-    state["last_error_type"] = None
-    _save_state(state)
+    _backend().reset_all_errors()
 
 
 def get_iteration_count() -> int:
@@ -268,18 +508,15 @@ def increment_iteration() -> int:
     Returns:
         New iteration count
     """
-    state = _load_state()
-    count = state.get("iteration_count", 0) + 1
-    state["iteration_count"] = count
-    _save_state(state)
+    with transaction():
+        count = get("iteration_count", 0) + 1
+        set("iteration_count", count)
     return count
 
 
 def reset_iteration_count() -> None:
     """Reset iteration counter (e.g., when task changes)."""
-    state = _load_state()
-    state["iteration_count"] = 0
-    _save_state(state)
+    set("iteration_count", 0)
 
 
 def set_current_task(task_id: str | None) -> None:
@@ -288,13 +525,10 @@ def set_current_task(task_id: str | None) -> None:
 
     Resets iteration count when task changes.
     """
-    state = _load_state()
-    current = state.get("current_task")
-
-    if current != task_id:
-        state["current_task"] = task_id
-        state["iteration_count"] = 0  # Reset on task change
-        _save_state(state)
+    with transaction():
+        if get("current_task") != task_id:
+            set("current_task", task_id)
+            set("iteration_count", 0)  # Reset on task change
 
 
 def get_current_task() -> str | None:
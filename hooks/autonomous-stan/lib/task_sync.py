@@ -79,8 +79,8 @@ class TaskSyncState:
     def from_dict(cls, data: dict) -> "TaskSyncState":
         """Create from dictionary."""
         state = cls()
-        state.stan_to_claude = data.get("stan_to_claude", {})
-        state.claude_to_stan = data.get("claude_to_stan", {})
+        state.stan_to_claude = dict(data.get("stan_to_claude", {}))
+        state.claude_to_stan = dict(data.get("claude_to_stan", {}))
         state.synced_at = data.get("synced_at")
         return state
 
@@ -12,32 +12,24 @@ system message, inspired by Superpowers' Systematic Debugging.
 Unlike taming-stan's retry-guard (which counts tool crashes),
 this detects COGNITIVE loops where the agent keeps trying the
 same approach with minor variations.
+
+Edits, test runs and tool errors are appended to the event journal
+(.stan/events.jsonl); loop detection reads only the journal tail
+back to the last passing test.
 """
 import json
 import sys
-import os
 import time
-import hashlib
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "lib"))
+import event_journal
 
-STATE_FILE = os.path.join(os.getcwd(), ".stan", "loop_state.json")
 EDIT_THRESHOLD = 3
 TIME_WINDOW = 600  # 10 minutes
 
 
-def load_state():
-    try:
-        with open(STATE_FILE) as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"edits": {}, "test_failures": 0, "last_test_pass": True}
-
-
-def save_state(state):
-    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f)
-
-
 def is_test_command(command):
     """Detect test commands."""
     test_indicators = [
@@ -55,6 +47,17 @@ def is_edit_related(tool_name):
     return tool_name in ("Edit", "Write", "MultiEdit")
 
 
+def find_loop_files(now):
+    """Files edited EDIT_THRESHOLD+ times since the last passing test (within TIME_WINDOW)."""
+    edits = Counter()
+    for event in event_journal.iter_reverse(("test", "edit"), since=now - TIME_WINDOW):
+        if event.kind == "test" and event.ok:
+            break
+        if event.kind == "edit":
+            edits[event.subject] += 1
+    return [(path, count) for path, count in edits.most_common() if count >= EDIT_THRESHOLD]
+
+
 def main():
     try:
         hook_input = json.load(sys.stdin)
@@ -66,27 +69,15 @@ def main():
     tool_input = hook_input.get("tool_input", {})
     tool_error = hook_input.get("tool_error")
 
-    state = load_state()
     now = time.time()
 
+    if tool_error:
+        event_journal.append("error", tool_name or "unknown", ok=False, now=now)
+
     # Track file edits
     if is_edit_related(tool_name):
         filepath = tool_input.get("file_path", tool_input.get("path", "unknown"))
-        edits = state.get("edits", {})
-
-        if filepath not in edits:
-            edits[filepath] = {"count": 0, "first_edit": now, "last_edit": now}
-
-        entry = edits[filepath]
-        # Reset if outside time window
-        if now - entry["first_edit"] > TIME_WINDOW:
-            entry = {"count": 0, "first_edit": now, "last_edit": now}
-
-        entry["count"] += 1
-        entry["last_edit"] = now
-        edits[filepath] = entry
-        state["edits"] = edits
-        save_state(state)
+        event_journal.append("edit", filepath, now=now)
         print(json.dumps({"continue": True}))
         return
 
@@ -103,26 +94,14 @@ def main():
             output = hook_input.get("tool_result", {}).get("output", "")
             exit_code = 1 if ("FAILED" in output or "Error" in output) else 0
 
+        # A passing test ends the edit streak (loop detection stops there)
+        event_journal.append("test", command, ok=exit_code == 0, now=now)
         if exit_code == 0:
-            # Test passed — reset all edit counters
-            state["edits"] = {}
-            state["test_failures"] = 0
-            state["last_test_pass"] = True
-            save_state(state)
             print(json.dumps({"continue": True}))
             return
 
-        # Test failed — check if we're in a loop
-        state["test_failures"] = state.get("test_failures", 0) + 1
-        state["last_test_pass"] = False
-
-        # Find files edited multiple times
-        loop_files = []
-        for filepath, entry in state.get("edits", {}).items():
-            if entry["count"] >= EDIT_THRESHOLD and now - entry["first_edit"] <= TIME_WINDOW:
-                loop_files.append((filepath, entry["count"]))
-
-        save_state(state)
+        # Test failed — find files edited multiple times since the last pass
+        loop_files = find_loop_files(now)
 
         if loop_files:
             files_str = ", ".join(f"{f} ({c}x)" for f, c in loop_files[:3])
@@ -17,11 +17,58 @@ If a tool isn't declared as available, that enforcement step is skipped.
 Also tracks research activity so other hooks can verify research happened.
 """
 
-import json
 import sys
+
+# --- Fast Path ---
+#
+# Registered with matcher "*", so this hook runs on every Read/Edit/Grep/Glob.
+# Those calls are classified before anything else is imported and before the
+# filesystem is touched: if none of the research markers appears anywhere in
+# the raw payload, the tool cannot be a research tool and the hook allows
+# immediately. Payloads that do contain a marker take the full path below.
+
+RESEARCH_MARKERS = (
+    "graphiti", "context7", "firecrawl",
+    "bridge_tool_request",
+    "websearch", "web_search", "webfetch", "web_fetch",
+)
+
+RESEARCH_TOOL_NAMES = (
+    "mcp__mcp-funnel__bridge_tool_request",
+    "WebSearch", "web_search", "WebFetch", "web_fetch",
+)
+
+# json.dumps(allow()) — precomputed so the fast path needs no json import
+ALLOW_OUTPUT = '{"hookSpecificOutput": {"hookEventName": "PreToolUse", "permissionDecision": "allow"}}'
+
+
+def could_be_research(raw_input):
+    """Cheap substring check on the raw hook payload (no parsing, no I/O)."""
+    lowered = raw_input.lower()
+    return any(marker in lowered for marker in RESEARCH_MARKERS)
+
+
+def is_research_tool(tool_name):
+    """Classify a tool name as research-related (no imports, no I/O)."""
+    if tool_name in RESEARCH_TOOL_NAMES:
+        return True
+    lowered = tool_name.lower()
+    return "graphiti" in lowered or "context7" in lowered or "firecrawl" in lowered
+
+
+if __name__ == "__main__":
+    _RAW_INPUT = sys.stdin.read()
+    if not could_be_research(_RAW_INPUT):
+        sys.stdout.write(ALLOW_OUTPUT + "\n")
+        sys.exit(0)
+
+import json
 import os
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "lib"))
+from atomic_state import read_json, update_json
+
 # --- Config Loading ---
 
 def get_project_root():
@@ -91,30 +138,29 @@ def get_state_path():
 
 
 def read_state():
-    sp = get_state_path()
-    try:
-        return json.loads(sp.read_text()) if sp.exists() else {}
-    except (json.JSONDecodeError, Exception):
-        return {}
+    state = read_json(get_state_path(), {})
+    return state if isinstance(state, dict) else {}
 
 
-def write_state(key, value):
-    sp = get_state_path()
-    sp.parent.mkdir(parents=True, exist_ok=True)
+def _update_state(update):
+    """Locked read-modify-write; state errors never block a tool call."""
     try:
-        state = read_state()
-        state[key] = value
-        sp.write_text(json.dumps(state, indent=2))
+        update_json(get_state_path(), update, indent=2)
     except Exception:
         pass
 
 
+def write_state(key, value):
+    _update_state(lambda state: state.update({key: value}))
+
+
 def append_to_list(key, value):
-    state = read_state()
-    lst = state.get(key, [])
-    if value not in lst:
-        lst.append(value)
-    write_state(key, lst)
+    def add(state):
+        lst = state.get(key, [])
+        if value not in lst:
+            lst.append(value)
+        state[key] = lst
+    _update_state(add)
 
 
 # --- Tool Detection ---
@@ -178,9 +224,11 @@ def deny(reason):
 
 # --- Main Hook Logic ---
 
-def main():
+def main(raw_input=None):
+    if raw_input is None:
+        raw_input = sys.stdin.read()
     try:
-        input_data = json.loads(sys.stdin.read())
+        input_data = json.loads(raw_input)
     except (json.JSONDecodeError, Exception):
         print(json.dumps(allow()))
         return
@@ -188,6 +236,11 @@ def main():
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
 
+    # Non-research tools: no config lookup, no state access
+    if not is_research_tool(tool_name):
+        print(json.dumps(allow()))
+        return
+
     # Load tool availability from config (declared at /stan init)
     tools = load_tools_config()
     has_graphiti = tools["graphiti"]
@@ -338,4 +391,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(_RAW_INPUT)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+STAN Dispatch (PreToolUse Hook - Bash)
+
+Single-process entry point for all Bash guards:
+- stan_gate (phase enforcement, worktree, learnings)
+- git_guard (Conventional Commits, branch protection)
+- credential_guard (secret scanning)
+
+The hook payload is parsed once and every guard runs in the same
+interpreter instead of three separate `python3` processes per Bash call.
+Decisions are merged the way Claude Code merges parallel hooks of one
+matcher group: every guard runs, deny wins over ask wins over allow, and
+the reasons of all blocking guards are reported together.
+"""
+
+import json
+import os
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib"))
+
+import stan_gate
+import git_guard
+import credential_guard
+
+# Same order as the former Bash matcher group in hooks.json
+GUARDS = [
+    ("stan_gate", stan_gate),
+    ("git_guard", git_guard),
+    ("credential_guard", credential_guard),
+]
+
+# Claude Code precedence for PreToolUse permission decisions
+DECISION_PRIORITY = {"allow": 0, "ask": 1, "deny": 2}
+
+
+def allow(message=None):
+    result = {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "allow"
+        }
+    }
+    if message:
+        result["hookSpecificOutput"]["message"] = message
+    return result
+
+
+def run_guards(hook_input, guards=None):
+    """
+    Run every guard against the parsed payload.
+
+    A guard that raises is treated like a hook process that exited with a
+    non-blocking error: the traceback goes to stderr and the guard
+    contributes no decision.
+
+    Returns:
+        List of (guard_name, output_dict) tuples in guard order.
+    """
+    results = []
+    for name, module in guards or GUARDS:
+        try:
+            results.append((name, module.evaluate(hook_input)))
+        except Exception:
+            print(f"[stan_dispatch] {name} failed:", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+    return results
+
+
+def merge_decisions(results):
+    """
+    Merge guard outputs into one PreToolUse response.
+
+    - The strictest permissionDecision wins (deny > ask > allow).
+    - Reasons of all guards that reached the winning decision are joined.
+    - Allow messages are joined when nothing blocks.
+    """
+    decision = "allow"
+    for _, output in results:
+        current = output.get("hookSpecificOutput", {}).get("permissionDecision", "allow")
+        if DECISION_PRIORITY.get(current, 0) > DECISION_PRIORITY[decision]:
+            decision = current
+
+    if decision == "allow":
+        messages = [
+            output["hookSpecificOutput"]["message"]
+            for _, output in results
+            if output.get("hookSpecificOutput", {}).get("message")
+        ]
+        return allow("\n\n".join(messages) if messages else None)
+
+    reasons = [
+        output["hookSpecificOutput"].get("permissionDecisionReason", "")
+        for _, output in results
+        if output.get("hookSpecificOutput", {}).get("permissionDecision") == decision
+    ]
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": decision,
+            "permissionDecisionReason": "\n\n".join(r for r in reasons if r)
+        }
+    }
+
+
+def evaluate(hook_input):
+    """Run all Bash guards for one parsed hook payload and return the merged decision."""
+    if hook_input.get("tool_name", "") != "Bash":
+        return allow()
+    return merge_decisions(run_guards(hook_input))
+
+
+def main():
+    try:
+        hook_input = json.loads(sys.stdin.read())
+    except (json.JSONDecodeError, Exception):
+        print(json.dumps(allow()))
+        return
+
+    print(json.dumps(evaluate(hook_input)))
+
+
+if __name__ == "__main__":
+    main()
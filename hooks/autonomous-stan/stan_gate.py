@@ -18,6 +18,7 @@ import os
 import re
 import subprocess
 import sys
+from functools import cached_property
 from pathlib import Path
 
 # Default max iterations (like Ralph)
@@ -26,17 +27,19 @@ DEFAULT_MAX_ITERATIONS = 10
 # Import modules from lib (same directory level)
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
 from session_state import (
+    transaction,
     get_pending_learnings,
     get_error_count,
     increment_error,
     get
 )
 from document import (
-    read_frontmatter,
+    parse_frontmatter,
     update_document_status,
     can_transition,
-    get_document_status
 )
+from git_reader import find_repo, GitUnsupported
+import event_journal
 
 
 def is_commit_command(command: str) -> bool:
@@ -44,8 +47,24 @@ def is_commit_command(command: str) -> bool:
     return bool(re.search(r'git\s+commit', command, re.IGNORECASE))
 
 
+def _native_repo():
+    """
+    Repository direkt aus .git lesen (ohne git-Prozess).
+
+    Returns: GitRepo, False wenn kein Repo gefunden, None wenn der Zustand
+    nicht sicher lesbar ist (dann git selbst fragen)
+    """
+    try:
+        return find_repo(os.getcwd()) or False
+    except (GitUnsupported, OSError):
+        return None
+
+
 def is_git_repo() -> bool:
     """Prüfe ob aktuelles Verzeichnis ein Git-Repo ist."""
+    repo = _native_repo()
+    if repo is not None:
+        return repo is not False
     try:
         subprocess.run(
             ["git", "rev-parse", "--git-dir"],
@@ -71,6 +90,12 @@ def is_main_worktree() -> bool:
 
 def get_current_branch() -> str | None:
     """Hole aktuellen Branch-Namen."""
+    repo = _native_repo()
+    if repo:
+        try:
+            return repo.branch()
+        except (GitUnsupported, OSError):
+            pass
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--abbrev-ref", "HEAD"],
@@ -84,6 +109,24 @@ def get_current_branch() -> str | None:
         return None
 
 
+def get_staged_files() -> list[str]:
+    """Gestagte Pfade, aus dem Index gelesen oder per `git diff --cached`."""
+    repo = _native_repo()
+    if repo:
+        try:
+            return repo.staged_paths()
+        except (GitUnsupported, OSError, ValueError):
+            pass
+    result = subprocess.run(
+        ["git", "diff", "--cached", "--name-only"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.getcwd()
+    )
+    return result.stdout.strip().split("\n") if result.stdout.strip() else []
+
+
 def is_feature_work() -> bool:
     """
     Heuristik: Ist das eine Feature-Arbeit oder triviale Änderung?
@@ -92,15 +135,7 @@ def is_feature_work() -> bool:
     Feature: viele Dateien, src/ betroffen, oder hooks/templates/criteria
     """
     try:
-        # Staged files
-        result = subprocess.run(
-            ["git", "diff", "--cached", "--name-only"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=os.getcwd()
-        )
-        staged = result.stdout.strip().split("\n") if result.stdout.strip() else []
+        staged = get_staged_files()
 
         # Feature-Indikatoren
         feature_patterns = [
@@ -169,11 +204,17 @@ Nach Fertigstellung:
 
 
 def get_last_test_status() -> bool | None:
-    """Hole Status des letzten Tests."""
+    """
+    Hole Status des letzten Tests.
+
+    Erst aus der Session-History, sonst aus dem Event-Journal
+    (z.B. nach einem Neustart in einer neuen Session).
+    """
     history = get("test_history", [])
-    if not history:
-        return None
-    return history[-1].get("passed", None)
+    if history:
+        return history[-1].get("passed", None)
+    event = event_journal.last("test")
+    return event.ok if event else None
 
 
 def check_pending_learnings() -> tuple[bool, str | None]:
@@ -244,20 +285,22 @@ def get_manifest_path() -> Path | None:
     return None
 
 
-def get_max_iterations() -> int:
+def get_max_iterations(snapshot: "ProjectSnapshot | None" = None) -> int:
     """
     Get max_iterations from manifest, fallback to DEFAULT_MAX_ITERATIONS.
 
     Reads the max_iterations field from stan.md frontmatter.
     If not present or invalid, returns DEFAULT_MAX_ITERATIONS (10).
     """
-    manifest_path = get_manifest_path()
-    if not manifest_path:
+    return (snapshot or ProjectSnapshot()).max_iterations
+
+
+def _parse_max_iterations(content: str | None) -> int:
+    """max_iterations aus dem Manifest-Text, sonst DEFAULT_MAX_ITERATIONS."""
+    if content is None:
         return DEFAULT_MAX_ITERATIONS
 
     try:
-        content = manifest_path.read_text(encoding='utf-8')
-
         # Parse frontmatter (between --- and ---)
         frontmatter_match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
         if not frontmatter_match:
@@ -272,17 +315,19 @@ def get_max_iterations() -> int:
 
         return DEFAULT_MAX_ITERATIONS
 
-    except (ValueError, OSError):
+    except ValueError:
         return DEFAULT_MAX_ITERATIONS
 
 
-def get_current_phase() -> str | None:
+def get_current_phase(snapshot: "ProjectSnapshot | None" = None) -> str | None:
     """Hole aktuelle Phase aus dem Manifest."""
-    manifest = get_manifest_path()
-    if not manifest:
-        return None
+    return (snapshot or ProjectSnapshot()).phase
+
 
-    content = manifest.read_text(encoding='utf-8')
+def _parse_phase(content: str | None) -> str | None:
+    """Phase aus der Status-Tabelle des Manifests."""
+    if content is None:
+        return None
 
     # Suche nach Phase-Zeile in der Status-Tabelle
     match = re.search(r'\|\s*\*\*Phase\*\*\s*\|\s*(\w+)\s*\|', content)
@@ -297,6 +342,82 @@ def get_docs_path() -> Path:
     return Path(os.getcwd()) / "docs"
 
 
+class ProjectSnapshot:
+    """
+    Projektdateien eines Gate-Aufrufs: stan.md, docs/prd.md, docs/plan.md.
+
+    Jede Datei wird beim ersten Zugriff höchstens einmal gelesen; Phase,
+    max_iterations, Frontmatter und Checkbox-Zählung werden daraus einmal
+    geparst und von allen Checks geteilt. Schreibt ein Check eine Datei
+    (Status-Übergang), verwirft invalidate() ihren Stand.
+    """
+
+    def __init__(self):
+        self._texts: dict[Path, str | None] = {}
+        self._frontmatter: dict[Path, dict | None] = {}
+
+    @cached_property
+    def manifest_path(self) -> Path | None:
+        return get_manifest_path()
+
+    @cached_property
+    def docs_path(self) -> Path:
+        return get_docs_path()
+
+    def read(self, path: Path | None) -> str | None:
+        """Dateiinhalt (gecacht), None wenn nicht vorhanden oder nicht lesbar."""
+        if path is None:
+            return None
+        if path not in self._texts:
+            try:
+                self._texts[path] = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                self._texts[path] = None
+        return self._texts[path]
+
+    def doc(self, name: str) -> Path:
+        """Pfad eines Dokuments unter docs/."""
+        return self.docs_path / name
+
+    def doc_text(self, name: str) -> str | None:
+        return self.read(self.doc(name))
+
+    def frontmatter(self, name: str) -> dict | None:
+        """Geparstes Frontmatter von docs/<name>."""
+        path = self.doc(name)
+        if path not in self._frontmatter:
+            text = self.read(path)
+            self._frontmatter[path] = parse_frontmatter(text) if text is not None else None
+        return self._frontmatter[path]
+
+    def document_status(self, name: str) -> str | None:
+        frontmatter = self.frontmatter(name)
+        return frontmatter.get("status") if frontmatter else None
+
+    def checkbox_counts(self, name: str) -> tuple[int, int]:
+        """(offene, erledigte) Checkboxen in docs/<name>."""
+        text = self.doc_text(name) or ""
+        return (len(re.findall(r'- \[ \]', text)),
+                len(re.findall(r'- \[x\]', text, re.IGNORECASE)))
+
+    def invalidate(self, path: Path):
+        """Nach einem Schreibzugriff: path beim nächsten Zugriff neu lesen."""
+        self._texts.pop(path, None)
+        self._frontmatter.pop(path, None)
+
+    @cached_property
+    def manifest(self) -> str | None:
+        return self.read(self.manifest_path)
+
+    @cached_property
+    def phase(self) -> str | None:
+        return _parse_phase(self.manifest)
+
+    @cached_property
+    def max_iterations(self) -> int:
+        return _parse_max_iterations(self.manifest)
+
+
 def check_research_done() -> tuple[bool, str | None]:
     """
     Prüfe ob Research in der Session stattgefunden hat.
@@ -329,7 +450,8 @@ def check_research_done() -> tuple[bool, str | None]:
     )
 
 
-def check_devils_advocate_completed(phase: str) -> tuple[bool, str | None]:
+def check_devils_advocate_completed(phase: str,
+                                    snapshot: ProjectSnapshot | None = None) -> tuple[bool, str | None]:
     """
     Check if Devil's Advocate review (2 passes) has been completed
     for the relevant document in the given phase.
@@ -341,26 +463,25 @@ def check_devils_advocate_completed(phase: str) -> tuple[bool, str | None]:
 
     Returns: (allowed, block_reason)
     """
-    docs_dir = get_docs_path()
+    snapshot = snapshot or ProjectSnapshot()
 
     # Determine which document to check
     if phase == "DEFINE":
-        doc_path = docs_dir / "prd.md"
+        doc_file = "prd.md"
         doc_name = "PRD"
         da_mode = "Evidence Audit"
     elif phase in ("PLAN", "CREATE"):
-        doc_path = docs_dir / "plan.md"
+        doc_file = "plan.md"
         doc_name = "Plan"
         da_mode = "Pre-Mortem" if phase == "PLAN" else "Conformity Review"
     else:
         return True, None
 
-    if not doc_path.exists():
+    content = snapshot.doc_text(doc_file)
+    if content is None:
         return True, None
 
     try:
-        content = doc_path.read_text(encoding='utf-8')
-
         # Parse frontmatter
         frontmatter_match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
         if not frontmatter_match:
@@ -442,106 +563,70 @@ def is_phase_transition_command(command: str) -> tuple[bool, str | None]:
     return False, None
 
 
-def auto_transition_on_create() -> str | None:
+def _transition_documents(snapshot: ProjectSnapshot, from_status: str, to_status: str) -> list[str]:
+    """PRD und Plan von from_status nach to_status bringen; gibt die Übergänge zurück."""
+    transitions = []
+    for doc_file, label in (("prd.md", "PRD"), ("plan.md", "Plan")):
+        if snapshot.document_status(doc_file) != from_status:
+            continue
+        allowed, _ = can_transition(from_status, to_status)
+        if not allowed:
+            continue
+        path = snapshot.doc(doc_file)
+        success, msg = update_document_status(path, to_status)
+        snapshot.invalidate(path)
+        if success:
+            transitions.append(f"{label}: {from_status} → {to_status}")
+    return transitions
+
+
+def auto_transition_on_create(snapshot: ProjectSnapshot | None = None) -> str | None:
     """
     Automatischer Status-Übergang wenn CREATE Phase startet.
     approved → in-progress für PRD und Plan.
 
     Returns: Message wenn Übergang passiert, sonst None
     """
-    phase = get_current_phase()
-    if phase != "CREATE":
+    snapshot = snapshot or ProjectSnapshot()
+    if snapshot.phase != "CREATE":
         return None
 
-    docs_dir = get_docs_path()
-    transitions = []
-
-    # PRD
-    prd_path = docs_dir / "prd.md"
-    if prd_path.exists():
-        status = get_document_status(prd_path)
-        if status == "approved":
-            allowed, _ = can_transition("approved", "in-progress")
-            if allowed:
-                success, msg = update_document_status(prd_path, "in-progress")
-                if success:
-                    transitions.append(f"PRD: approved → in-progress")
-
-    # Plan
-    plan_path = docs_dir / "plan.md"
-    if plan_path.exists():
-        status = get_document_status(plan_path)
-        if status == "approved":
-            allowed, _ = can_transition("approved", "in-progress")
-            if allowed:
-                success, msg = update_document_status(plan_path, "in-progress")
-                if success:
-                    transitions.append(f"Plan: approved → in-progress")
-
+    transitions = _transition_documents(snapshot, "approved", "in-progress")
     if transitions:
         return f"[STAN] Automatischer Status-Übergang:\n" + "\n".join(f"  • {t}" for t in transitions)
 
     return None
 
 
-def check_all_tasks_done() -> bool:
+def check_all_tasks_done(snapshot: ProjectSnapshot | None = None) -> bool:
     """
     Prüfe ob alle Tasks in plan.md als done markiert sind.
 
     Returns: True wenn alle done
     """
-    plan_path = get_docs_path() / "plan.md"
-    if not plan_path.exists():
+    snapshot = snapshot or ProjectSnapshot()
+    if snapshot.doc_text("plan.md") is None:
         return False
 
-    content = plan_path.read_text(encoding='utf-8')
-
     # Zähle offene vs. erledigte Akzeptanzkriterien
-    open_criteria = len(re.findall(r'- \[ \]', content))
-    done_criteria = len(re.findall(r'- \[x\]', content, re.IGNORECASE))
+    open_criteria, done_criteria = snapshot.checkbox_counts("plan.md")
 
     # Wenn es Kriterien gibt und keine offen sind
-    if done_criteria > 0 and open_criteria == 0:
-        return True
+    return done_criteria > 0 and open_criteria == 0
 
-    return False
 
-
-def auto_transition_on_done() -> str | None:
+def auto_transition_on_done(snapshot: ProjectSnapshot | None = None) -> str | None:
     """
     Automatischer Status-Übergang wenn alle Tasks done.
     in-progress → done für PRD und Plan.
 
     Returns: Message wenn Übergang passiert, sonst None
     """
-    if not check_all_tasks_done():
+    snapshot = snapshot or ProjectSnapshot()
+    if not check_all_tasks_done(snapshot):
         return None
 
-    docs_dir = get_docs_path()
-    transitions = []
-
-    # PRD
-    prd_path = docs_dir / "prd.md"
-    if prd_path.exists():
-        status = get_document_status(prd_path)
-        if status == "in-progress":
-            allowed, _ = can_transition("in-progress", "done")
-            if allowed:
-                success, msg = update_document_status(prd_path, "done")
-                if success:
-                    transitions.append(f"PRD: in-progress → done")
-
-    # Plan
-    plan_path = docs_dir / "plan.md"
-    if plan_path.exists():
-        status = get_document_status(plan_path)
-        if status == "in-progress":
-            allowed, _ = can_transition("in-progress", "done")
-            if allowed:
-                success, msg = update_document_status(plan_path, "done")
-                if success:
-                    transitions.append(f"Plan: in-progress → done")
-
+    transitions = _transition_documents(snapshot, "in-progress", "done")
     if transitions:
         return f"[STAN] Alle Tasks erledigt! Status-Übergang:\n" + "\n".join(f"  • {t}" for t in transitions)
 
@@ -572,78 +657,81 @@ def deny(reason):
     }
 
 
-def main():
-    # Lese Hook-Input
-    try:
-        input_data = json.loads(sys.stdin.read())
-    except (json.JSONDecodeError, Exception):
-        print(json.dumps(allow()))
-        return
-
+def evaluate(input_data: dict) -> dict:
+    """Führe alle Gate-Checks für einen geparsten Hook-Input aus und gib die Entscheidung zurück."""
     # Prüfe ob Bash-Tool
     tool_name = input_data.get("tool_name", "")
     if tool_name != "Bash":
-        print(json.dumps(allow()))
-        return
+        return allow()
 
     # Hole Command
     tool_input = input_data.get("tool_input", {})
     command = tool_input.get("command", "")
 
+    # stan.md, prd.md und plan.md höchstens einmal lesen, für alle Checks
+    snapshot = ProjectSnapshot()
+
     # Commit-spezifische Checks
     if is_commit_command(command):
         # Check 0: Worktree-Enforcement
         allowed_result, reason = check_worktree()
         if not allowed_result:
-            print(json.dumps(deny(reason.strip())))
-            return
+            return deny(reason.strip())
 
-        # Check 1: Pending Learnings
-        allowed_result, reason = check_pending_learnings()
-        if not allowed_result:
-            print(json.dumps(deny(reason.strip())))
-            return
+        # Check 1+2 lesen denselben Session State: einmal laden, nichts schreiben
+        with transaction():
+            # Check 1: Pending Learnings
+            allowed_result, reason = check_pending_learnings()
+            if not allowed_result:
+                return deny(reason.strip())
 
-        # Check 2: Tests (nur Warnung — allow but with message)
-        _, warning = check_tests_passed()
-        if warning:
-            print(json.dumps(allow(warning.strip())))
-            return
+            # Check 2: Tests (nur Warnung — allow but with message)
+            _, warning = check_tests_passed()
+            if warning:
+                return allow(warning.strip())
 
         # Check 3: Devil's Advocate (2-pass) for phase completion commits
-        phase = get_current_phase()
+        phase = snapshot.phase
         if phase:
-            da_ok, da_reason = check_devils_advocate_completed(phase)
+            da_ok, da_reason = check_devils_advocate_completed(phase, snapshot)
             if not da_ok:
-                print(json.dumps(deny(da_reason)))
-                return
+                return deny(da_reason)
 
     # Research-Check in CREATE Phase
     phase = get_current_phase() if 'get_current_phase' in dir() else "UNKNOWN"
     if phase == "CREATE":
         research_ok, research_warning = check_research_done()
         if not research_ok:
-            print(json.dumps(deny(research_warning)))
-            return
+            return deny(research_warning)
 
     # Automatische Status-Übergänge prüfen
     messages = []
 
     # CREATE Phase → approved → in-progress
-    transition_msg = auto_transition_on_create()
+    transition_msg = auto_transition_on_create(snapshot)
     if transition_msg:
         messages.append(transition_msg)
 
     # Alle Tasks done → in-progress → done
-    done_msg = auto_transition_on_done()
+    done_msg = auto_transition_on_done(snapshot)
     if done_msg:
         messages.append(done_msg)
 
     # Output
     if messages:
-        print(json.dumps(allow("\n\n".join(messages))))
-    else:
+        return allow("\n\n".join(messages))
+    return allow()
+
+
+def main():
+    # Lese Hook-Input
+    try:
+        input_data = json.loads(sys.stdin.read())
+    except (json.JSONDecodeError, Exception):
         print(json.dumps(allow()))
+        return
+
+    print(json.dumps(evaluate(input_data)))
 
 
 if __name__ == "__main__":
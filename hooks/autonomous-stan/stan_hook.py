@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+STAN Hook Shim (client for stan_hookd)
+
+Usage (hooks.json):
+    python3 stan_hook.py <hook_name>
+
+Forwards the hook's stdin JSON to the warm `stan_hookd` daemon over a
+Unix socket and prints its answer. If the daemon is not running, its
+socket is not private to this user, or it refuses the request because its
+code is stale, the hook is executed in-process exactly as if the script
+had been called directly.
+
+A request the daemon accepted is never run a second time: its worker may
+already have written state (strikes, push confirmations, journal events).
+If no answer arrives before the hook's own timeout, guards answer "ask"
+and the other hooks exit without output.
+
+Kept deliberately tiny: only stdlib modules that are cheap to import.
+"""
+import json
+import os
+import socket
+import stat
+import sys
+
+HOOKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Hooks that may be run through the shim/daemon (script name without .py)
+HOOKS = (
+    "stan_context",
+    "stan_dispatch",
+    "stan_gate",
+    "git_guard",
+    "credential_guard",
+    "research_guard",
+    "stan_track",
+    "loop_breaker",
+)
+
+# PreToolUse guards: on a missing answer the tool call needs confirmation
+GUARD_HOOKS = ("stan_dispatch", "stan_gate", "git_guard", "credential_guard", "research_guard")
+
+# Hook timeouts from hooks.json (seconds); research_guard has none there,
+# so Claude Code's default of 60 s applies
+HOOK_TIMEOUTS = {"stan_dispatch": 20, "research_guard": 60}
+DEFAULT_HOOK_TIMEOUT = 10
+
+# Seconds kept back from the hook timeout to print the fallback answer
+RESPONSE_MARGIN = 1
+
+
+def get_socket_path():
+    """Per-user socket path (override with STAN_HOOKD_SOCKET)."""
+    override = os.environ.get("STAN_HOOKD_SOCKET")
+    if override:
+        return override
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime_dir, f"stan-hookd-{os.getuid()}", "hookd.sock")
+
+
+def is_private_dir(path):
+    """True if path is a real directory (no symlink) owned by us with mode 0700."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and stat.S_IMODE(st.st_mode) == 0o700)
+
+
+def is_own_socket(path):
+    """True if path is a Unix socket owned by us."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def is_trusted_socket(path):
+    """
+    Only talk to a daemon of this user.
+
+    The request carries the full environment (API tokens) and the answer
+    decides for every guard, so the socket directory in a shared location
+    like /tmp must not be one another user created first.
+    """
+    return is_private_dir(os.path.dirname(path)) and is_own_socket(path)
+
+
+def response_timeout(name):
+    """Seconds to wait for the daemon's answer to hook name."""
+    return HOOK_TIMEOUTS.get(name, DEFAULT_HOOK_TIMEOUT) - RESPONSE_MARGIN
+
+
+def timeout_response(name):
+    """Answer for an accepted request the daemon did not finish in time."""
+    message = f"stan_hookd did not answer for {name} in time; the hook was not re-run"
+    if name not in GUARD_HOOKS:
+        return {"stdout": "", "stderr": f"[stan_hook] {message}\n", "exit_code": 0}
+    output = {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "ask",
+            "permissionDecisionReason": f"⏱️ STAN: {message} — please confirm this call.",
+        }
+    }
+    return {"stdout": json.dumps(output), "stderr": "", "exit_code": 0}
+
+
+def hook_path(name):
+    """Absolute path of a known hook script, None for unknown names."""
+    if name not in HOOKS:
+        return None
+    return os.path.join(HOOKS_DIR, f"{name}.py")
+
+
+def build_request(name, stdin_data):
+    """Everything the daemon needs to run the hook as this process would."""
+    return {
+        "hook": name,
+        "stdin": stdin_data,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+        "ppid": os.getppid(),
+    }
+
+
+def forward(request, socket_path=None, timeout=DEFAULT_HOOK_TIMEOUT):
+    """
+    Send a request to the daemon and wait up to timeout seconds for the answer.
+
+    Returns:
+        Response dict, or None if the daemon is unavailable, not trusted or
+        refused the request before running it (caller falls back to
+        in-process).
+
+    Raises:
+        socket.timeout if the daemon accepted the request but did not answer.
+    """
+    socket_path = socket_path or get_socket_path()
+    if not is_trusted_socket(socket_path):
+        return None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        return None  # No Unix sockets on this platform
+
+    with sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+        sock.settimeout(timeout)
+        try:
+            sock.sendall(json.dumps(request).encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            return None
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    if not chunks:
+        return None
+    try:
+        return json.loads(b"".join(chunks).decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def run_in_process(name, stdin_data):
+    """Run the hook script in this interpreter as if called directly."""
+    import io
+    import runpy
+
+    path = hook_path(name)
+    sys.stdin = io.StringIO(stdin_data)
+    sys.argv = [path]
+    runpy.run_path(path, run_name="__main__")
+
+
+def maybe_autostart():
+    """Start the daemon in the background when STAN_HOOKD_AUTOSTART=1."""
+    if os.environ.get("STAN_HOOKD_AUTOSTART") != "1":
+        return
+    import subprocess
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.join(HOOKS_DIR, "stan_hookd.py"), "start"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def main():
+    if len(sys.argv) < 2 or hook_path(sys.argv[1]) is None:
+        print(f"usage: stan_hook.py <{'|'.join(HOOKS)}>", file=sys.stderr)
+        sys.exit(1)
+
+    name = sys.argv[1]
+    stdin_data = sys.stdin.read()
+
+    if os.environ.get("STAN_HOOKD") != "0":
+        try:
+            response = forward(build_request(name, stdin_data), timeout=response_timeout(name))
+        except socket.timeout:
+            # The worker may still be running: re-running here would apply
+            # every side effect twice, skipping silently would skip the guard
+            response = timeout_response(name)
+
+        if response is not None:
+            sys.stdout.write(response.get("stdout", ""))
+            sys.stderr.write(response.get("stderr", ""))
+            sys.exit(response.get("exit_code", 0))
+
+        maybe_autostart()
+
+    run_in_process(name, stdin_data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+STAN Hook Daemon (optional)
+
+Usage:
+    python3 stan_hookd.py start [--foreground]
+    python3 stan_hookd.py stop
+    python3 stan_hookd.py status
+
+Long-lived process that keeps the expensive parts of the hooks warm:
+the compiled secret patterns, pyyaml and the lib/ modules. Hook calls
+arrive from the `stan_hook.py` shim over a per-user Unix socket.
+
+Each request is handled in a forked worker that switches to the caller's
+cwd and environment and executes the hook script as `__main__`, so hooks
+behave exactly as a cold `python3 hook.py` start would — minus the
+startup cost. The daemon exits after IDLE_TIMEOUT seconds without calls
+and refuses requests (the shim then runs the hook itself) as soon as any
+hook source file changed on disk.
+"""
+import builtins
+import fcntl
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib"))
+
+from stan_hook import HOOKS, HOOKS_DIR, get_socket_path, hook_path, is_private_dir
+
+IDLE_TIMEOUT = 30 * 60  # Seconds without requests before the daemon exits
+
+# lib modules imported up-front; hook scripts themselves run fresh per call
+WARM_MODULES = [
+    "secret_patterns",
+    "secret_scan",
+    "scan_cache",
+    "session_state",
+    "session_sqlite",
+    "event_journal",
+    "atomic_state",
+    "document",
+    "learnings",
+    "config",
+]
+
+
+def get_pid_file():
+    return os.path.join(os.path.dirname(get_socket_path()), "hookd.pid")
+
+
+def source_fingerprint():
+    """mtimes of all hook and lib sources — changes make the daemon stale."""
+    fingerprint = {}
+    for directory in (HOOKS_DIR, os.path.join(HOOKS_DIR, "lib")):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                fingerprint[path] = os.stat(path).st_mtime_ns
+    return fingerprint
+
+
+def warm_up():
+    """Import lib modules and precompile everything a cold start would."""
+    for name in WARM_MODULES:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    try:
+        import yaml  # noqa: F401
+    except ImportError:
+        pass
+    try:
+        sys.modules["secret_patterns"]._compile_patterns()
+    except Exception:
+        pass
+
+    code = {}
+    for name in HOOKS:
+        path = hook_path(name)
+        with open(path, encoding="utf-8") as f:
+            code[name] = compile(f.read(), path, "exec")
+    return code
+
+
+def run_hook(request, code):
+    """
+    Execute one hook request (runs inside the forked worker).
+
+    Returns:
+        Dict with stdout, stderr and exit_code of the hook run.
+    """
+    name = request["hook"]
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request.get("env", {}))
+    os.environ["STAN_HOOK_PPID"] = str(request.get("ppid", ""))
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    sys.stdin = io.StringIO(request.get("stdin", ""))
+    sys.stdout, sys.stderr = stdout, stderr
+    sys.argv = [hook_path(name)]
+
+    exit_code = 0
+    try:
+        exec(code[name], {"__name__": "__main__", "__file__": hook_path(name), "__builtins__": builtins})
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc(file=stderr)
+        exit_code = 1
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+class HookRequestHandler(socketserver.StreamRequestHandler):
+    """One request per connection: JSON in until EOF, JSON out."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read().decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return  # Empty answer: shim falls back to in-process
+        if request.get("hook") not in self.server.code:
+            return
+        response = run_hook(request, self.server.code)
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+
+class HookServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Forks one worker per hook call so cwd/env never leak between calls."""
+
+    timeout = IDLE_TIMEOUT
+
+    def __init__(self, socket_path, code):
+        self.code = code
+        self.fingerprint = source_fingerprint()
+        self.stopped = False
+        super().__init__(socket_path, HookRequestHandler)
+
+    def verify_request(self, request, client_address):
+        # Stale code: refuse (shim runs the hook itself) and shut down
+        try:
+            stale = source_fingerprint() != self.fingerprint
+        except OSError:
+            stale = True
+        if stale:
+            self.stopped = True
+            return False
+        return True
+
+    def handle_timeout(self):
+        super().handle_timeout()
+        self.stopped = True
+
+
+def is_running():
+    """True if a daemon holds the pid-file lock."""
+    try:
+        with open(get_pid_file()) as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(f, fcntl.LOCK_UN)
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def serve(foreground=False):
+    """Bind the socket and serve until idle, stale or SIGTERM."""
+    socket_path = get_socket_path()
+    socket_dir = os.path.dirname(socket_path)
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    if not is_private_dir(socket_dir):
+        # Possibly created by another user: never serve (or leak env) through it
+        print(f"stan_hookd: {socket_dir} must be a directory owned by you with mode 0700",
+              file=sys.stderr)
+        return 1
+
+    lock = open(get_pid_file(), "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print("stan_hookd already running", file=sys.stderr)
+        return 1
+
+    if not foreground:
+        if os.fork():
+            os._exit(0)
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+
+    lock.seek(0)
+    lock.truncate()
+    lock.write(str(os.getpid()))
+    lock.flush()
+
+    code = warm_up()
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+    old_umask = os.umask(0o077)
+    try:
+        server = HookServer(socket_path, code)
+    finally:
+        os.umask(old_umask)
+
+    def stop(signum, frame):
+        server.stopped = True
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while not server.stopped:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        lock.truncate(0)
+        lock.close()
+    return 0
+
+
+def stop_daemon():
+    try:
+        with open(get_pid_file()) as f:
+            pid = int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        pid = 0
+    if not pid or not is_running():
+        print("stan_hookd not running")
+        return 0
+    os.kill(pid, signal.SIGTERM)
+    print(f"stan_hookd stopped (pid {pid})")
+    return 0
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "start":
+        sys.exit(serve(foreground="--foreground" in sys.argv))
+    if command == "stop":
+        sys.exit(stop_daemon())
+    if command == "status":
+        running = is_running()
+        print(f"stan_hookd {'running' if running else 'not running'} ({get_socket_path()})")
+        sys.exit(0 if running else 1)
+    print("usage: stan_hookd.py start [--foreground] | stop | status", file=sys.stderr)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ from pathlib import Path
 # Import modules from lib (same directory level)
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
 from session_state import (
+    transaction,
     record_test_result,
     add_pending_learning,
     get_pending_learnings,
@@ -84,28 +85,31 @@ def main():
         print(json.dumps({"continue": True}))
         return
 
-    # Tracke Test-Ergebnis
-    exit_code = extract_exit_code(tool_result)
-    result = record_test_result(command, exit_code)
+    # Tracke Test-Ergebnis (ein Laden, ein Schreiben des Session State)
+    with transaction():
+        exit_code = extract_exit_code(tool_result)
+        result = record_test_result(command, exit_code)
+
+        # 3-Strikes Error Tracking
+        if exit_code != 0:
+            # Test fehlgeschlagen → Error Counter hochzählen
+            increment_error("test_failure")
+        else:
+            # Test erfolgreich → Error Counter zurücksetzen
+            reset_error_count("test_failure")
+
+        # ROT→GRÜN erkannt?
+        pending_count = None
+        if result.get("red_to_green"):
+            # Erstelle pending Learning
+            add_pending_learning(
+                content=f"Test '{command}' ging von ROT zu GRÜN",
+                context=f"Command: {command}"
+            )
+            pending_count = len(get_pending_learnings())
 
-    # 3-Strikes Error Tracking
-    if exit_code != 0:
-        # Test fehlgeschlagen → Error Counter hochzählen
-        increment_error("test_failure")
-    else:
-        # Test erfolgreich → Error Counter zurücksetzen
-        reset_error_count("test_failure")
-
-    # ROT→GRÜN erkannt?
     message = None
-    if result.get("red_to_green"):
-        # Erstelle pending Learning
-        add_pending_learning(
-            content=f"Test '{command}' ging von ROT zu GRÜN",
-            context=f"Command: {command}"
-        )
-
-        pending_count = len(get_pending_learnings())
+    if pending_count is not None:
         message = f"""
 [STAN] Learning erkannt! ROT→GRÜN bei: {command}
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for atomic_state — atomic writes, bounded locks, parallel hook processes."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR / "lib"))
+sys.path.insert(0, str(HOOKS_DIR))
+
+import atomic_state
+
+# Parallel hook processes in the stress tests
+WORKERS = 8
+
+
+class TestWriteAtomic:
+
+    def test_replaces_content_without_leftovers(self, tmp_path):
+        path = tmp_path / "state" / "x.json"
+        atomic_state.write_atomic(path, "old")
+        stat = atomic_state.write_atomic(path, b"new")
+        assert path.read_bytes() == b"new"
+        assert os.listdir(path.parent) == ["x.json"]
+        assert stat.st_ino == path.stat().st_ino
+
+    def test_failed_write_keeps_old_file(self, tmp_path):
+        path = tmp_path / "x.json"
+        atomic_state.write_json(path, {"a": 1})
+        with pytest.raises(TypeError):
+            atomic_state.write_atomic(path, 42)
+        assert atomic_state.read_json(path) == {"a": 1}
+        assert os.listdir(tmp_path) == ["x.json"]
+
+    def test_read_json_default(self, tmp_path):
+        path = tmp_path / "x.json"
+        assert atomic_state.read_json(path, {}) == {}
+        path.write_text("{torn")
+        assert atomic_state.read_json(path, {"d": 1}) == {"d": 1}
+
+
+class TestLocking:
+
+    def test_update_json_returns_result(self, tmp_path):
+        path = tmp_path / "x.json"
+        path.write_text("[1, 2]")  # not an object: start over
+        assert atomic_state.update_json(path, lambda s: s.setdefault("n", 5)) == 5
+        assert atomic_state.read_json(path) == {"n": 5}
+
+    def test_wait_is_bounded(self, tmp_path):
+        """A held lock delays the next writer by at most the timeout."""
+        path = tmp_path / "x.json"
+        with atomic_state.locked(path) as acquired:
+            assert acquired
+            start = time.monotonic()
+            with atomic_state.locked(path, timeout=0.1) as second:
+                assert not second
+            assert time.monotonic() - start < 1.0
+            atomic_state.update_json(path, lambda s: s.update(a=1), timeout=0.05)
+        assert atomic_state.read_json(path) == {"a": 1}
+
+    def test_shared_locks_coexist(self, tmp_path):
+        path = tmp_path / "x.json"
+        with atomic_state.locked(path, shared=True) as first:
+            with atomic_state.locked(path, shared=True, timeout=0) as second:
+                assert first and second
+
+
+def spawn(code, *args, cwd, env=None):
+    return subprocess.Popen(
+        [sys.executable, "-c", code, str(HOOKS_DIR), *map(str, args)],
+        cwd=cwd, env=dict(os.environ, **(env or {})),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+
+
+def wait_all(processes):
+    results = [p.communicate(timeout=120) for p in processes]
+    assert [p.returncode for p in processes] == [0] * len(processes), results
+    return [out for out, _ in results]
+
+
+class TestParallelHooks:
+    """N hook processes hammering the same state files at once."""
+
+    def test_update_json_loses_no_increments(self, tmp_path):
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1] + '/lib'); import atomic_state; "
+            "bump = lambda s: s.update(n=s.get('n', 0) + 1); "
+            "[atomic_state.update_json(sys.argv[2], bump) for _ in range(25)]"
+        )
+        path = tmp_path / "counter.json"
+        wait_all([spawn(code, path, cwd=tmp_path) for _ in range(WORKERS)])
+        assert atomic_state.read_json(path) == {"n": 25 * WORKERS}
+
+    def test_session_state_json_backend(self, tmp_path):
+        """Parallel session_state writers: exact counts, and a reader never sees torn JSON."""
+        session_file = tmp_path / "stan-session-stress.json"
+        writer = (
+            "import sys; sys.path.insert(0, sys.argv[1] + '/lib'); import session_state; "
+            "from pathlib import Path; session_state.get_session_file = lambda: Path(sys.argv[2]); "
+            "[session_state.increment_error('x') for _ in range(20)]; "
+            "[session_state.add_pending_learning(f'w{sys.argv[3]}-{i}') for i in range(5)]"
+        )
+        reader = (
+            "import json, sys, time; torn = reads = 0; end = time.time() + 30\n"
+            "while time.time() < end:\n"
+            "    try:\n"
+            "        data = open(sys.argv[2]).read()\n"
+            "    except FileNotFoundError:\n"
+            "        continue\n"
+            "    reads += 1\n"
+            "    try:\n"
+            "        state = json.loads(data)\n"
+            "    except ValueError:\n"
+            "        torn += 1\n"
+            "        continue\n"
+            "    if state.get('error_counts', {}).get('x') == 20 * int(sys.argv[3]):\n"
+            "        break\n"
+            "print(torn, reads)"
+        )
+        env = {"STAN_SESSION_BACKEND": "json"}
+        watcher = spawn(reader, session_file, WORKERS, cwd=tmp_path)
+        wait_all([spawn(writer, session_file, n, cwd=tmp_path, env=env) for n in range(WORKERS)])
+        torn, reads = map(int, wait_all([watcher])[0].split())
+
+        assert torn == 0 and reads > 0
+        state = json.loads(session_file.read_text())
+        assert state["error_counts"] == {"x": 20 * WORKERS}
+        assert sorted(l["content"] for l in state["pending_learnings"]) == \
+            sorted(f"w{n}-{i}" for n in range(WORKERS) for i in range(5))
+
+    def test_research_guard_hook_processes(self, tmp_path):
+        """Real research_guard runs in parallel: every looked-up library is recorded."""
+        processes = []
+        for n in range(WORKERS):
+            payload = json.dumps({
+                "tool_name": "mcp__mcp-funnel__bridge_tool_request",
+                "tool_input": {"tool": "context7__resolve-library-id",
+                               "arguments": {"libraryName": f"lib{n}"}},
+            })
+            process = subprocess.Popen(
+                [sys.executable, str(HOOKS_DIR / "research_guard.py")],
+                cwd=tmp_path, env=dict(os.environ, STAN_STATE_DIR=str(tmp_path)),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            process.stdin.write(payload)
+            process.stdin.close()
+            processes.append(process)
+        for process in processes:
+            assert process.wait(timeout=120) == 0
+
+        state = json.loads((tmp_path / ".stan" / "research_state.json").read_text())
+        assert sorted(state["context7_libs_checked"]) == sorted(f"lib{n}" for n in range(WORKERS))
+        assert state["research_done"] is True
+
+    def test_guard_state_files(self, tmp_path):
+        """credential_guard strikes and git_guard state from parallel processes."""
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); sys.path.insert(0, sys.argv[1] + '/lib'); "
+            "import credential_guard, git_guard; "
+            "[credential_guard.add_strike() for _ in range(10)]; "
+            "git_guard.write_state('worker_' + sys.argv[2], True)"
+        )
+        wait_all([spawn(code, n, cwd=tmp_path) for n in range(WORKERS)])
+
+        strikes = json.loads((tmp_path / ".stan" / "credential_strikes.json").read_text())
+        assert strikes == {"count": 10 * WORKERS}
+        session = json.loads((tmp_path / ".stan" / "session.json").read_text())
+        assert session == {f"worker_{n}": True for n in range(WORKERS)}
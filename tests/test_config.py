@@ -113,6 +113,37 @@ class TestConfigLoadSave:
         assert loaded.language.documents == "en"
         assert loaded.project.name == "MyProject"
 
+    def test_secret_scan_roundtrip(self, tmp_path, monkeypatch):
+        """Secret-Scan-Budget übersteht save/load."""
+        monkeypatch.chdir(tmp_path)
+
+        config.save_config(config.StanConfig(secret_scan=config.SecretScanConfig(budget_ms=50, tiers=2)))
+
+        assert config.get_secret_scan_config() == config.SecretScanConfig(budget_ms=50, tiers=2)
+
+    def test_secret_scan_defaults_to_full_scan(self, tmp_path, monkeypatch):
+        """Ohne Config laufen alle Stufen ohne Budget."""
+        monkeypatch.chdir(tmp_path)
+        assert config.get_secret_scan_config() == config.SecretScanConfig(budget_ms=None, tiers=3)
+
+    def test_secret_scan_invalid_values(self):
+        """Ungültige Werte fallen auf den vollen Scan zurück."""
+        assert config.SecretScanConfig(budget_ms=-5, tiers=7) == config.SecretScanConfig()
+
+    def test_secret_scan_entropy_roundtrip(self, tmp_path, monkeypatch):
+        """Entropie-Stufe samt Schwellwert übersteht save/load."""
+        monkeypatch.chdir(tmp_path)
+        settings = config.SecretScanConfig(entropy=True, entropy_threshold=4.2, entropy_min_length=32)
+
+        config.save_config(config.StanConfig(secret_scan=settings))
+
+        assert config.get_secret_scan_config() == settings
+
+    def test_secret_scan_entropy_invalid_values(self):
+        """Ungültige Entropie-Werte fallen auf die Defaults zurück."""
+        settings = config.SecretScanConfig(entropy_threshold=12, entropy_min_length=3)
+        assert (settings.entropy_threshold, settings.entropy_min_length) == (5.0, 20)
+
     def test_config_exists_true_after_save(self, tmp_path, monkeypatch):
         """config_exists gibt True zurück nach save."""
         monkeypatch.chdir(tmp_path)
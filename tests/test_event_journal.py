@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Tests for event_journal — append-only .stan/events.jsonl, tail reads, compaction."""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR / "lib"))
+sys.path.insert(0, str(HOOKS_DIR))
+
+import atomic_state
+import event_journal
+from event_journal import Event
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """Project root with cwd set to it (hooks write .stan/ into cwd)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestAppendAndRead:
+
+    def test_append_writes_one_fixed_schema_line(self, root):
+        event_journal.append("test", "pytest -q", ok=False, now=100.0)
+        line = event_journal.journal_path().read_text()
+        assert json.loads(line) == {"ts": 100.0, "kind": "test", "subject": "pytest -q", "ok": False}
+        assert line.endswith("\n") and line.count("\n") == 1
+
+    def test_unknown_kind_rejected(self, root):
+        with pytest.raises(ValueError):
+            event_journal.append("deploy", "prod")
+
+    def test_long_subject_is_cut(self, root):
+        event = event_journal.append("edit", "x" * 5000)
+        assert len(event.subject) == event_journal.MAX_SUBJECT
+
+    def test_tail_filters_and_keeps_order(self, root):
+        event_journal.append("edit", "a.py", now=1.0)
+        event_journal.append("test", "pytest", ok=False, now=2.0)
+        event_journal.append("error", "Bash", ok=False, now=3.0)
+        event_journal.append("edit", "b.py", now=4.0)
+
+        assert [e.subject for e in event_journal.tail()] == ["a.py", "pytest", "Bash", "b.py"]
+        assert [e.subject for e in event_journal.tail(limit=2)] == ["Bash", "b.py"]
+        assert [e.subject for e in event_journal.tail(kinds=("edit",))] == ["a.py", "b.py"]
+        assert [e.ts for e in event_journal.tail(since=2.5)] == [3.0, 4.0]
+
+    def test_last(self, root):
+        assert event_journal.last("test") is None
+        event_journal.append("test", "pytest", ok=False, now=1.0)
+        event_journal.append("test", "npm test", ok=True, now=2.0)
+        assert event_journal.last("test").subject == "npm test"
+        assert event_journal.last("test", "pytest").ok is False
+
+    def test_missing_journal_is_empty(self, root):
+        assert event_journal.tail() == []
+        assert event_journal.summary() == event_journal._empty_summary()
+
+    def test_reverse_read_across_blocks(self, root, monkeypatch):
+        """Lines spanning block boundaries come back whole."""
+        monkeypatch.setattr(event_journal, "_READ_BLOCK", 7)
+        for i in range(50):
+            event_journal.append("edit", f"src/file_{i}.py", now=float(i))
+        events = event_journal.tail()
+        assert [e.subject for e in events] == [f"src/file_{i}.py" for i in range(50)]
+
+    def test_partial_line_is_skipped(self, root):
+        event_journal.append("edit", "a.py", now=1.0)
+        with open(event_journal.journal_path(), "ab") as f:
+            f.write(b'{"ts": 2, "kind": "ed')
+        assert [e.subject for e in event_journal.tail()] == ["a.py"]
+
+    def test_reader_stops_at_since(self, root):
+        """Reading back to `since` does not parse older lines."""
+        for i in range(100):
+            event_journal.append("edit", "a.py", now=float(i))
+        with patch.object(Event, "from_line", wraps=Event.from_line) as parse:
+            assert len(event_journal.tail(since=95.0)) == 5
+        assert parse.call_count == 6
+
+
+class TestCompaction:
+
+    def test_compact_folds_old_events(self, root):
+        for i in range(6):
+            event_journal.append("edit", "a.py" if i % 2 else "b.py", now=float(i))
+        event_journal.append("test", "pytest", ok=False, now=6.0)
+        event_journal.append("error", "Bash", ok=False, now=7.0)
+        event_journal.append("test", "pytest", ok=True, now=8.0)
+
+        assert event_journal.compact(keep=2) == 7
+        assert [e.ts for e in event_journal.tail()] == [7.0, 8.0]
+        summary = event_journal.summary()
+        assert summary["events"] == 7
+        assert summary["until"] == 6.0
+        assert summary["tests"] == {"runs": 1, "failed": 1}
+        assert summary["edits"] == {"a.py": 3, "b.py": 3}
+        assert summary["errors"] == {}
+
+    def test_compact_accumulates(self, root):
+        for i in range(4):
+            event_journal.append("error", "Edit", ok=False, now=float(i))
+        event_journal.compact(keep=2)
+        event_journal.compact(keep=0)
+        assert event_journal.summary()["errors"] == {"Edit": 4}
+        assert event_journal.tail() == []
+
+    def test_small_journal_is_left_alone(self, root):
+        event_journal.append("edit", "a.py")
+        assert event_journal.compact(keep=5) == 0
+        assert not (event_journal.stan_dir() / event_journal.SUMMARY_FILE).exists()
+
+    def test_append_triggers_compaction(self, root, monkeypatch):
+        monkeypatch.setattr(event_journal, "COMPACT_BYTES", 2000)
+        monkeypatch.setattr(event_journal, "KEEP_EVENTS", 10)
+        for i in range(100):
+            event_journal.append("edit", "a.py", now=float(i))
+        assert event_journal.journal_path().stat().st_size <= 2000
+        summary = event_journal.summary()
+        assert summary["edits"]["a.py"] + len(event_journal.tail()) == 100
+
+    def test_kept_tail_fits_half_the_threshold(self, root, monkeypatch):
+        """Many small events: compaction leaves room instead of rewriting on every append."""
+        monkeypatch.setattr(event_journal, "COMPACT_BYTES", 2000)
+        with patch.object(event_journal, "compact", wraps=event_journal.compact) as compact:
+            for i in range(200):
+                event_journal.append("edit", "a.py", now=float(i))
+        assert event_journal.journal_path().stat().st_size <= 2000
+        line = len(Event(0.0, "edit", "a.py").to_line())
+        assert compact.call_count <= 200 * line // 1000 + 1
+        assert event_journal.summary()["edits"]["a.py"] + len(event_journal.tail()) == 200
+
+    def test_unlocked_appends_are_carried_over(self, root, monkeypatch):
+        """Appends that missed the lock land in the old file: before and after the swap."""
+        import os
+        for i in range(4):
+            event_journal.append("edit", "a.py", now=float(i))
+        path = event_journal.journal_path()
+        stale_fd = os.open(path, os.O_WRONLY | os.O_APPEND)  # opened before the swap
+        summary, write_atomic = event_journal.summary, event_journal.write_atomic
+
+        def summary_after_append(root=None):
+            os.write(stale_fd, Event(10.0, "edit", "during.py").to_line())
+            return summary(root)
+
+        def write_then_append(target, data):
+            stat = write_atomic(target, data)
+            if Path(target) == path:
+                os.write(stale_fd, Event(11.0, "edit", "after.py").to_line())
+            return stat
+
+        monkeypatch.setattr(event_journal, "summary", summary_after_append)
+        monkeypatch.setattr(event_journal, "write_atomic", write_then_append)
+        try:
+            assert event_journal.compact(keep=1) == 3
+        finally:
+            os.close(stale_fd)
+        assert [e.subject for e in event_journal.tail()] == ["a.py", "during.py", "after.py"]
+
+    def test_unlocked_append_into_swapped_file_is_repeated(self, root):
+        import os
+        first = event_journal.append("edit", "a.py", now=1.0)
+        path = event_journal.journal_path()
+        written = path.stat()
+        os.rename(path, path.with_name("old.jsonl"))
+        path.write_bytes(b"")  # swapped, line not carried over
+
+        event_journal._recover_unlocked(path, first.to_line(), written)
+        event_journal._recover_unlocked(path, first.to_line(), written)
+
+        assert path.read_bytes() == first.to_line()
+
+    def test_append_without_lock_still_writes(self, root, monkeypatch):
+        """Lock timeout: the append goes ahead and checks it reached the live file."""
+        event_journal.stan_dir().mkdir()
+        held = atomic_state.acquire(event_journal.stan_dir() / event_journal.LOCK_FILE)
+        monkeypatch.setattr(event_journal, "LOCK_TIMEOUT", 0)
+        try:
+            event_journal.append("edit", "a.py", now=1.0)
+        finally:
+            atomic_state.release(held)
+        assert [e.subject for e in event_journal.tail()] == ["a.py"]
+
+    def test_busy_lock_skips_compaction(self, root):
+        event_journal.append("edit", "a.py")
+        event_journal.append("edit", "b.py")
+        held = atomic_state.acquire(event_journal.stan_dir() / event_journal.LOCK_FILE, shared=True)
+        try:
+            assert event_journal.compact(keep=0) == 0
+        finally:
+            atomic_state.release(held)
+        assert len(event_journal.tail()) == 2
+
+
+class TestConcurrentAppends:
+
+    def test_parallel_writers_lose_nothing(self, root, monkeypatch):
+        """N processes appending (with compaction) keep every event, no torn lines."""
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import event_journal; "
+            "event_journal.COMPACT_BYTES = 4096; event_journal.KEEP_EVENTS = 20; "
+            "[event_journal.append('edit', 'w' + sys.argv[2]) for _ in range(50)]"
+        )
+        processes = [
+            subprocess.Popen([sys.executable, "-c", code, str(HOOKS_DIR / "lib"), str(n)], cwd=root)
+            for n in range(6)
+        ]
+        assert [p.wait(timeout=60) for p in processes] == [0] * 6
+
+        lines = event_journal.journal_path().read_bytes().splitlines()
+        assert all(Event.from_line(line) is not None for line in lines)
+        edits = dict(event_journal.summary()["edits"])
+        for event in event_journal.tail():
+            edits[event.subject] = edits.get(event.subject, 0) + 1
+        assert edits == {f"w{n}": 50 for n in range(6)}
+
+
+def run_loop_breaker(hook_input: dict, capsys) -> dict:
+    import loop_breaker
+    with patch("sys.stdin", io.StringIO(json.dumps(hook_input))):
+        loop_breaker.main()
+    return json.loads(capsys.readouterr().out)
+
+
+def edit(path):
+    return {"tool_name": "Edit", "tool_input": {"file_path": path}}
+
+
+def bash_test(exit_code):
+    return {"tool_name": "Bash", "tool_input": {"command": "pytest"},
+            "tool_result": {"exit_code": exit_code}}
+
+
+class TestLoopBreaker:
+    """loop_breaker records into the journal and reads its tail."""
+
+    def test_repeated_edits_with_failing_test(self, root, capsys):
+        for _ in range(3):
+            run_loop_breaker(edit("src/app.py"), capsys)
+        run_loop_breaker(edit("src/other.py"), capsys)
+        result = run_loop_breaker(bash_test(1), capsys)
+        assert "LOOP DETECTED" in result["systemMessage"]
+        assert "src/app.py (3x)" in result["systemMessage"]
+        assert "src/other.py" not in result["systemMessage"]
+        assert [e.kind for e in event_journal.tail()] == ["edit"] * 4 + ["test"]
+
+    def test_passing_test_resets(self, root, capsys):
+        for _ in range(3):
+            run_loop_breaker(edit("src/app.py"), capsys)
+        assert "systemMessage" not in run_loop_breaker(bash_test(0), capsys)
+        run_loop_breaker(edit("src/app.py"), capsys)
+        assert "systemMessage" not in run_loop_breaker(bash_test(1), capsys)
+
+    def test_old_edits_outside_window(self, root, capsys):
+        import loop_breaker
+        old = 1000.0
+        for _ in range(3):
+            event_journal.append("edit", "src/app.py", now=old)
+        assert loop_breaker.find_loop_files(old + loop_breaker.TIME_WINDOW + 1) == []
+        assert loop_breaker.find_loop_files(old + 1) == [("src/app.py", 3)]
+
+    def test_tool_error_is_recorded(self, root, capsys):
+        run_loop_breaker({"tool_name": "Bash", "tool_input": {"command": "ls"},
+                          "tool_error": "boom"}, capsys)
+        assert event_journal.last("error").subject == "Bash"
+
+
+class TestStanGateFallback:
+    """stan_gate falls back to the journal when the session has no test history."""
+
+    def test_last_test_status_from_journal(self, root):
+        import stan_gate
+        with patch.object(stan_gate, "get", return_value=[]):
+            assert stan_gate.get_last_test_status() is None
+            event_journal.append("test", "pytest", ok=False)
+            assert stan_gate.get_last_test_status() is False
+
+    def test_session_history_wins(self, root):
+        import stan_gate
+        event_journal.append("test", "pytest", ok=False)
+        with patch.object(stan_gate, "get", return_value=[{"passed": True}]):
+            assert stan_gate.get_last_test_status() is True
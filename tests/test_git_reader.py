@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Tests for git_reader — native HEAD/branch/index reads compared against git."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR / "lib"))
+sys.path.insert(0, str(HOOKS_DIR))
+
+import git_reader
+from git_reader import GitUnsupported, find_repo
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+
+def git_branch(cwd):
+    result = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=cwd,
+                            capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def git_staged(cwd):
+    return sorted(git(cwd, "diff", "--cached", "--name-only", "--no-renames").split())
+
+
+@pytest.fixture(autouse=True)
+def clean_git_env(monkeypatch):
+    for name in git_reader.GIT_ENV_OVERRIDES:
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "Test")
+    return tmp_path
+
+
+def commit_tree(repo):
+    """Ein paar Verzeichnisebenen, damit der Cache-Tree etwas zu überspringen hat."""
+    for path in ("README.md", "src/app.py", "src/lib/util.py", "docs/guide.md", "run.sh"):
+        (repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / path).write_text(f"# {path}\n" * 20)
+    (repo / "run.sh").chmod(0o755)
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "init")
+
+
+class TestDiscovery:
+    """Repository-Suche und Umgebung."""
+
+    def test_no_repository(self, tmp_path):
+        assert find_repo(str(tmp_path)) is None
+
+    def test_finds_repo_from_subdirectory(self, repo):
+        (repo / "a" / "b").mkdir(parents=True)
+        found = find_repo(str(repo / "a" / "b"))
+        assert found.worktree == repo
+        assert not found.is_linked_worktree
+
+    def test_empty_git_dir_is_unsupported(self, tmp_path):
+        (tmp_path / ".git").mkdir()
+        with pytest.raises(GitUnsupported):
+            find_repo(str(tmp_path))
+
+    def test_env_override_is_unsupported(self, repo, monkeypatch):
+        monkeypatch.setenv("GIT_DIR", str(repo / ".git"))
+        with pytest.raises(GitUnsupported):
+            find_repo(str(repo))
+
+
+class TestHead:
+    """HEAD/Branch wie `git rev-parse --abbrev-ref HEAD`."""
+
+    def test_unborn_branch(self, repo):
+        assert find_repo(str(repo)).branch() is None
+        assert git_branch(repo) is None
+
+    def test_branch_after_commit(self, repo):
+        commit_tree(repo)
+        assert find_repo(str(repo)).branch() == "main"
+
+    def test_packed_refs(self, repo):
+        commit_tree(repo)
+        git(repo, "checkout", "-q", "-b", "feature/x")
+        git(repo, "pack-refs", "--all")
+        assert not (repo / ".git" / "refs" / "heads" / "feature" / "x").exists()
+        found = find_repo(str(repo))
+        assert found.branch() == "feature/x"
+        assert found.head()[1] == git(repo, "rev-parse", "HEAD").strip()
+
+    def test_detached_head(self, repo):
+        commit_tree(repo)
+        git(repo, "checkout", "-q", "--detach")
+        assert find_repo(str(repo)).branch() == "HEAD" == git_branch(repo)
+
+    def test_linked_worktree(self, repo, tmp_path_factory):
+        commit_tree(repo)
+        other = tmp_path_factory.mktemp("wt") / "feature"
+        git(repo, "worktree", "add", "-q", "-b", "feature", str(other))
+        (other / "src" / "new.py").write_text("x = 1\n")
+        git(other, "add", "src/new.py")
+
+        found = find_repo(str(other / "src"))
+        assert found.is_linked_worktree
+        assert found.branch() == "feature"
+        assert found.staged_paths() == git_staged(other) == ["src/new.py"]
+        assert find_repo(str(repo)).staged_paths() == []
+
+
+class TestStagedPaths:
+    """Index gegen HEAD-Tree wie `git diff --cached --name-only --no-renames`."""
+
+    def test_unborn_with_staged_files(self, repo):
+        (repo / "a.txt").write_text("a\n")
+        (repo / "src").mkdir()
+        (repo / "src" / "b.py").write_text("b\n")
+        git(repo, "add", ".")
+        assert find_repo(str(repo)).staged_paths() == git_staged(repo) == ["a.txt", "src/b.py"]
+
+    def test_clean_after_commit(self, repo):
+        commit_tree(repo)
+        assert find_repo(str(repo)).staged_paths() == []
+
+    def test_modify_add_delete_rename_mode(self, repo):
+        commit_tree(repo)
+        (repo / "src" / "app.py").write_text("changed\n")
+        (repo / "src" / "lib" / "new.py").write_text("new\n")
+        (repo / "unstaged.txt").write_text("not added\n")
+        git(repo, "add", "src")
+        git(repo, "rm", "-q", "docs/guide.md")
+        git(repo, "mv", "README.md", "README.rst")
+        git(repo, "update-index", "--chmod=-x", "run.sh")
+
+        expected = git_staged(repo)
+        assert expected == ["README.md", "README.rst", "docs/guide.md", "run.sh",
+                            "src/app.py", "src/lib/new.py"]
+        assert find_repo(str(repo)).staged_paths() == expected
+        assert "unstaged.txt" not in expected
+
+    def test_intent_to_add_is_not_staged(self, repo):
+        commit_tree(repo)
+        (repo / "later.py").write_text("x\n")
+        git(repo, "add", "-N", "later.py")
+        assert find_repo(str(repo)).staged_paths() == git_staged(repo) == []
+
+    def test_packed_objects_with_deltas(self, repo):
+        commit_tree(repo)
+        for round_ in range(3):
+            for path in ("src/app.py", "src/lib/util.py"):
+                (repo / path).write_text((repo / path).read_text() + f"line {round_}\n")
+            git(repo, "commit", "-q", "-am", f"round {round_}")
+        git(repo, "gc", "-q", "--aggressive")
+        assert not list((repo / ".git" / "objects").glob("??/*"))
+
+        found = find_repo(str(repo))
+        objects = git(repo, "cat-file", "--batch-all-objects", "--batch-check").splitlines()
+        for sha, kind, _ in (line.split() for line in objects):
+            content = subprocess.run(["git", "cat-file", kind, sha], cwd=repo,
+                                     capture_output=True, check=True).stdout
+            assert found.read_object(sha) == (kind, content)
+
+        (repo / "src" / "lib" / "util.py").write_text("rewritten\n")
+        git(repo, "add", "src/lib/util.py")
+        # Cache-Tree verwerfen: der komplette HEAD-Tree muss aus dem Pack kommen
+        git(repo, "read-tree", "HEAD")
+        git(repo, "add", "src/lib/util.py")
+        assert find_repo(str(repo)).staged_paths() == git_staged(repo) == ["src/lib/util.py"]
+
+    def test_unmerged_paths_are_staged(self, repo):
+        commit_tree(repo)
+        git(repo, "checkout", "-q", "-b", "other")
+        (repo / "README.md").write_text("other\n")
+        git(repo, "commit", "-q", "-am", "other")
+        git(repo, "checkout", "-q", "main")
+        (repo / "README.md").write_text("main\n")
+        git(repo, "commit", "-q", "-am", "main")
+        subprocess.run(["git", "merge", "-q", "other"], cwd=repo, capture_output=True)
+        assert find_repo(str(repo)).staged_paths() == git_staged(repo) == ["README.md"]
+
+    @pytest.mark.parametrize("args", [["--split-index"], ["--index-version", "4"]])
+    def test_unsupported_index_formats(self, repo, args):
+        commit_tree(repo)
+        (repo / "src" / "app.py").write_text("changed\n")
+        git(repo, "add", "src/app.py")
+        git(repo, "update-index", *args)
+        with pytest.raises(GitUnsupported):
+            find_repo(str(repo)).staged_paths()
+
+
+class TestStanGate:
+    """stan_gate nutzt den Reader und fällt nur bei Bedarf auf git zurück."""
+
+    def test_check_worktree_without_subprocess(self, repo, monkeypatch):
+        import stan_gate
+
+        commit_tree(repo)
+        (repo / "src" / "feature.py").write_text("x = 1\n")
+        git(repo, "add", "src/feature.py")
+        monkeypatch.chdir(repo)
+
+        def no_subprocess(*args, **kwargs):
+            raise AssertionError("git subprocess called")
+
+        monkeypatch.setattr(stan_gate.subprocess, "run", no_subprocess)
+        allowed, reason = stan_gate.check_worktree()
+        assert not allowed
+        assert "Feature-Arbeit auf main" in reason
+
+    def test_split_index_falls_back_to_git(self, repo, monkeypatch):
+        import stan_gate
+
+        commit_tree(repo)
+        (repo / "src" / "feature.py").write_text("x = 1\n")
+        git(repo, "add", "src/feature.py")
+        git(repo, "update-index", "--split-index")
+        monkeypatch.chdir(repo)
+        assert stan_gate.get_staged_files() == ["src/feature.py"]
+        assert stan_gate.is_feature_work()
@@ -606,3 +606,88 @@ class TestWorktreeFunctions:
                         assert allowed is False
                         assert "BLOCKED" in reason
                         assert "Worktree" in reason
+
+
+class TestProjectSnapshot:
+    """Tests für den ProjectSnapshot in stan-gate (jede Datei einmal lesen)."""
+
+    @pytest.fixture
+    def project(self, tmp_path, monkeypatch):
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "stan.md").write_text(
+            "---\nmax_iterations: 7\n---\n| **Phase** | create |\n"
+        )
+        (tmp_path / "docs" / "prd.md").write_text("---\nstatus: approved\n---\n# PRD\n")
+        (tmp_path / "docs" / "plan.md").write_text(
+            "---\nstatus: approved\ntechniques_applied:\n"
+            "  - devils-advocate\n  - devils-advocate-verify\n---\n"
+            "- [x] Kriterium 1\n- [x] Kriterium 2\n"
+        )
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("STAN_STATE_DIR", str(tmp_path / "state"))
+        return tmp_path
+
+    def count_reads(self, monkeypatch):
+        reads = []
+        original = Path.read_text
+
+        def counting(path, *args, **kwargs):
+            reads.append(path.name)
+            return original(path, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "read_text", counting)
+        return reads
+
+    def test_parses_manifest_once(self, project, monkeypatch):
+        """Phase und max_iterations teilen sich einen Lesezugriff auf stan.md."""
+        import stan_gate
+
+        reads = self.count_reads(monkeypatch)
+        snapshot = stan_gate.ProjectSnapshot()
+        assert snapshot.phase == "CREATE"
+        assert snapshot.max_iterations == 7
+        assert stan_gate.get_current_phase(snapshot) == "CREATE"
+        assert snapshot.checkbox_counts("plan.md") == (0, 2)
+        assert snapshot.document_status("prd.md") == "approved"
+        assert sorted(reads) == ["plan.md", "prd.md", "stan.md"]
+
+    def gate_commit(self):
+        import stan_gate
+
+        with patch.object(stan_gate, 'check_worktree', return_value=(True, None)), \
+                patch.object(stan_gate, 'get_pending_learnings', return_value=[]), \
+                patch.object(stan_gate, 'get_last_test_status', return_value=True):
+            return stan_gate.evaluate({
+                "tool_name": "Bash",
+                "tool_input": {"command": "git commit -m 'test'"}
+            })
+
+    def test_gate_call_reads_each_file_once(self, project, monkeypatch):
+        """Ein Gate-Aufruf ohne Status-Übergang liest jede Projektdatei genau einmal."""
+        for name in ("prd.md", "plan.md"):
+            path = project / "docs" / name
+            path.write_text(path.read_text().replace("status: approved", "status: draft"))
+
+        reads = self.count_reads(monkeypatch)
+        result = self.gate_commit()
+        assert result["hookSpecificOutput"]["permissionDecision"] == "allow"
+        assert sorted(reads) == ["plan.md", "prd.md", "stan.md"]
+
+    def test_transitions_see_their_own_writes(self, project):
+        """Nach approved → in-progress sieht der Done-Check den neuen Status."""
+        message = self.gate_commit()["hookSpecificOutput"]["message"]
+        assert "PRD: approved → in-progress" in message
+        assert "Plan: in-progress → done" in message
+        assert "status: done" in (project / "docs" / "plan.md").read_text()
+
+    def test_research_check_stays_off_in_create(self, project):
+        """Research-Check bleibt wie bisher aus: `ls` in CREATE ohne Research ist erlaubt."""
+        import stan_gate
+
+        state = project / "state" / ".stan"
+        state.mkdir(parents=True)
+        (state / "research_state.json").write_text('{"research_done": false}')
+        assert stan_gate.check_research_done()[0] is False
+
+        result = stan_gate.evaluate({"tool_name": "Bash", "tool_input": {"command": "ls"}})
+        assert result["hookSpecificOutput"]["permissionDecision"] == "allow"
@@ -412,3 +412,49 @@ project:
             assert result["graphiti"] is True
             assert result["context7"] is True
             assert result["firecrawl"] is False
+
+
+class TestFastPath:
+    """Non-research tools are classified without config or state access."""
+
+    @pytest.mark.parametrize("tool_name", ["Read", "Edit", "Grep", "Glob", "Bash", "mcp__github__create_issue"])
+    def test_non_research_tools(self, tool_name):
+        assert research_guard.is_research_tool(tool_name) is False
+
+    @pytest.mark.parametrize("tool_name", [
+        "WebSearch", "WebFetch", "web_search",
+        "mcp__graphiti__search_nodes", "mcp__context7__query_docs", "mcp__firecrawl__scrape",
+        "mcp__mcp-funnel__bridge_tool_request",
+    ])
+    def test_research_tools(self, tool_name):
+        assert research_guard.is_research_tool(tool_name) is True
+
+    def test_raw_prefilter(self):
+        assert research_guard.could_be_research('{"tool_name": "Read"}') is False
+        assert research_guard.could_be_research('{"tool_name": "mcp__Graphiti__add"}') is True
+
+    def test_allow_output_matches_allow(self):
+        assert research_guard.ALLOW_OUTPUT == json.dumps(research_guard.allow())
+
+    def test_read_skips_config_and_state(self):
+        payload = json.dumps({"tool_name": "Read", "tool_input": {"file_path": "graphiti.md"}})
+        with patch('sys.stdin', StringIO(payload)), \
+             patch('sys.stdout', new_callable=StringIO) as out, \
+             patch.object(research_guard, 'load_tools_config') as load, \
+             patch.object(research_guard, 'read_state') as read:
+            research_guard.main()
+
+        assert get_decision(json.loads(out.getvalue())) == "allow"
+        load.assert_not_called()
+        read.assert_not_called()
+
+    def test_script_fast_path(self, tmp_path):
+        import subprocess
+        result = subprocess.run(
+            [sys.executable, str(Path(research_guard.__file__))],
+            input=json.dumps({"tool_name": "Glob", "tool_input": {"pattern": "*.py"}}),
+            capture_output=True, text=True, cwd=tmp_path,
+            env=dict(os.environ, STAN_STATE_DIR=str(tmp_path))
+        )
+        assert get_decision(json.loads(result.stdout)) == "allow"
+        assert not (tmp_path / ".stan").exists()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for secret_entropy — batched Shannon entropy of candidate tokens."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "hooks" / "autonomous-stan" / "lib"))
+
+import secret_entropy
+from secret_entropy import ENTROPY_FINDING, EntropySettings, entropy_hits, shannon_entropy
+
+RANDOM_TOKEN = "q8Zr2LxV0pNw4TbK7sYc1JmHd9UaGf3E"
+GIT_SHA = "3f786850e387550fdab836ed7e6dc881de23001b"
+
+
+def line_starts(buffer):
+    starts = [0]
+    for index, char in enumerate(buffer):
+        if char == "\n":
+            starts.append(index + 1)
+    return starts
+
+
+class TestShannonEntropy:
+    """Bits per character."""
+
+    @pytest.mark.parametrize("token, expected", [
+        ("", 0.0),
+        ("aaaa", 0.0),
+        ("abab", 1.0),
+        ("abcdefgh", 3.0),
+    ])
+    def test_known_values(self, token, expected):
+        assert shannon_entropy(token) == pytest.approx(expected)
+
+    def test_batch_matches_single(self):
+        tokens = [RANDOM_TOKEN, GIT_SHA, "a" * 30]
+        assert secret_entropy.token_entropies(tokens) == pytest.approx([shannon_entropy(t) for t in tokens])
+
+    def test_numpy_matches_fallback(self, monkeypatch):
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(secret_entropy, "BATCH_TOKENS", 2)
+        tokens = [RANDOM_TOKEN, GIT_SHA, "abab" * 6, "x" * 25, "getUserAccountSettings"]
+        expected = [shannon_entropy(t) for t in tokens]
+        assert secret_entropy._entropies_numpy(tokens) == pytest.approx(expected)
+
+    def test_threshold_scales_with_length(self):
+        """Below 64 chars the threshold shrinks to the reachable maximum log2(n)."""
+        assert secret_entropy._threshold_for("x" * 64, 5.0) == pytest.approx(5.0)
+        assert secret_entropy._threshold_for(RANDOM_TOKEN, 6.0) == pytest.approx(5.0)
+        assert secret_entropy._threshold_for("x" * 16 + "==", 6.0) == pytest.approx(4.0)
+
+    def test_hex_has_no_threshold(self):
+        assert secret_entropy._threshold_for(GIT_SHA, 5.0) is None
+        assert secret_entropy._threshold_for("550e8400-e29b-41d4-a716-446655440000", 5.0) is None
+
+
+class TestEntropyHits:
+    """Candidate extraction and line mapping."""
+
+    def test_random_token_is_flagged(self):
+        buffer = f"x = 1\nsession = '{RANDOM_TOKEN}'"
+        hits = entropy_hits(buffer, line_starts(buffer))
+        assert list(hits) == [1]
+        assert hits[1][0] == ENTROPY_FINDING
+        assert RANDOM_TOKEN not in hits[1][1]
+
+    @pytest.mark.parametrize("line", [
+        "def get_user_account_settings_for_tenant(self):",
+        "import org.springframework.boot.autoconfigure",
+        "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+        "short = 'q8Zr2LxV0p'",
+    ])
+    def test_ordinary_code_is_not_flagged(self, line):
+        assert entropy_hits(line, [0]) == {}
+
+    def test_short_random_token_is_flagged(self):
+        """A random token at the minimum length can reach the threshold."""
+        assert list(entropy_hits(f"pin = '{RANDOM_TOKEN[:20]}'", [0])) == [0]
+
+    @pytest.mark.parametrize("line", [
+        f"commit {GIT_SHA}",
+        "base = 'aa85960c4f0b9d7e21a3f5b8c6d0e9f1a2b3c4d5'",
+        "sha256: 9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+        "id = '550e8400e29b41d4a716446655440000'",
+        "id = '550e8400-e29b-41d4-a716-446655440000'",
+        "src/components/settings/AccountSettingsPanel.tsx",
+    ])
+    def test_hashes_and_uuids_are_not_flagged(self, line):
+        assert entropy_hits(line, [0]) == {}
+
+    def test_skip_lines_from_earlier_tiers(self):
+        buffer = f"{RANDOM_TOKEN}\n{RANDOM_TOKEN}"
+        assert list(entropy_hits(buffer, line_starts(buffer), skip={0: ("Other", "***")})) == [1]
+
+    def test_settings_are_respected(self):
+        assert entropy_hits(RANDOM_TOKEN, [0], EntropySettings(threshold=6.5)) == {}
+        assert entropy_hits(RANDOM_TOKEN, [0], EntropySettings(min_length=40)) == {}
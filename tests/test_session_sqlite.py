@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Tests für session_state-Backends (JSON/SQLite) und die JSON→SQLite-Migration."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Path configured in conftest.py
+
+import session_sqlite
+import session_state
+import task_sync
+
+LIB_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan" / "lib"
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    path = tmp_path / "stan-session-test.json"
+    session_state.clear_cache()
+    with patch.object(session_state, "get_session_file", return_value=path):
+        yield path
+    session_sqlite.close_all()
+    session_state.clear_cache()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, session_file, monkeypatch):
+    """Jeder Test läuft gegen beide Backends."""
+    monkeypatch.setenv(session_state.BACKEND_ENV, request.param)
+    return request.param
+
+
+@pytest.fixture
+def sqlite_backend(session_file, monkeypatch):
+    monkeypatch.setenv(session_state.BACKEND_ENV, "sqlite")
+    return session_file
+
+
+class TestBackendParity:
+    """Beide Backends verhalten sich über die öffentliche API gleich."""
+
+    def test_test_history_and_red_to_green(self, backend):
+        assert session_state.record_test_result("pytest", 1) == {"passed": False, "red_to_green": False}
+        assert session_state.record_test_result("npm test", 0)["red_to_green"] is False
+        assert session_state.record_test_result("pytest", 0) == {"passed": True, "red_to_green": True}
+        assert session_state.record_test_result("pytest", 0)["red_to_green"] is False
+        assert session_state.get_last_test_result()["command"] == "pytest"
+        assert session_state.get_last_test_result("npm test")["passed"] is True
+        assert session_state.get_last_test_result("cargo test") is None
+        assert [e["command"] for e in session_state.get("test_history")] == \
+            ["pytest", "npm test", "pytest", "pytest"]
+
+    def test_history_is_trimmed(self, backend, monkeypatch):
+        monkeypatch.setattr(session_state, "TEST_HISTORY_LIMIT", 5)
+        for code in range(8):
+            session_state.record_test_result(f"cmd{code}", code)
+        history = session_state.get("test_history")
+        assert [e["command"] for e in history] == [f"cmd{i}" for i in range(3, 8)]
+
+    def test_pending_learnings(self, backend):
+        session_state.add_pending_learning("Eins", "ctx")
+        session_state.add_pending_learning("Zwei")
+        session_state.mark_learning_saved(0)
+        session_state.mark_learning_saved(5)
+        assert [l["content"] for l in session_state.get_pending_learnings()] == ["Zwei"]
+        session_state.clear_pending_learnings()
+        assert session_state.get_pending_learnings() == []
+
+    def test_error_counts(self, backend):
+        assert session_state.increment_error("a") == 1
+        assert session_state.increment_error("a") == 2
+        assert session_state.increment_error("b") == 1
+        assert session_state.get("last_error_type") == "b"
+        session_state.reset_error_count("a")
+        assert session_state.get_error_count("a") == 0
+        assert session_state.get("error_counts") == {"b": 1}
+        session_state.reset_all_errors()
+        assert session_state.get("error_counts") == {}
+        assert session_state.get("last_error_type") is None
+
+    def test_iterations_and_task(self, backend):
+        assert session_state.increment_iteration() == 1
+        assert session_state.increment_iteration() == 2
+        session_state.set_current_task("T-001")
+        assert session_state.get_iteration_count() == 0
+        assert session_state.get_current_task() == "T-001"
+        assert session_state.get("missing", "fallback") == "fallback"
+
+    def test_task_sync_roundtrip(self, backend):
+        state = task_sync.TaskSyncState()
+        state.add_mapping("T-001", "42")
+        state.synced_at = "2026-01-01T00:00:00"
+        task_sync.save_sync_state(state)
+        loaded = task_sync.get_sync_state()
+        assert loaded.stan_to_claude == {"T-001": "42"}
+        assert loaded.claude_to_stan == {"42": "T-001"}
+        assert loaded.synced_at == "2026-01-01T00:00:00"
+
+    def test_transaction_rolls_back(self, backend):
+        session_state.increment_error("x")
+        with pytest.raises(RuntimeError):
+            with session_state.transaction():
+                session_state.increment_error("x")
+                session_state.add_pending_learning("verworfen")
+                raise RuntimeError("boom")
+        session_state.clear_cache()
+        assert session_state.get_error_count("x") == 1
+        assert session_state.get_pending_learnings() == []
+
+
+class TestSqliteStore:
+    """SQLite-spezifisch: WAL, Tabellen statt Blob, Migration."""
+
+    def test_uses_wal_and_tables(self, sqlite_backend):
+        session_state.increment_error("x")
+        store = session_sqlite.open_store(sqlite_backend)
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert store.conn.execute("SELECT count FROM error_counts WHERE error_type='x'").fetchone() == (1,)
+        assert not sqlite_backend.exists()  # keine JSON-Datei geschrieben
+
+    def test_no_returning_clause(self, sqlite_backend):
+        """RETURNING braucht SQLite 3.35 — increment_error kommt ohne aus."""
+        store = session_sqlite.open_store(sqlite_backend)
+        statements = []
+        store.conn.set_trace_callback(statements.append)
+        assert session_state.increment_error("x") == 1
+        assert session_state.increment_error("x") == 2
+        assert statements and not any("RETURNING" in sql.upper() for sql in statements)
+
+    def test_old_sqlite_falls_back_to_json(self, sqlite_backend, monkeypatch):
+        monkeypatch.setattr(session_sqlite.sqlite3, "sqlite_version_info", (3, 22, 0))
+        assert session_state.get_backend_name() == "json"
+        assert session_state.increment_error("x") == 1
+        assert json.loads(sqlite_backend.read_text())["error_counts"] == {"x": 1}
+
+    def test_task_sync_point_lookups(self, sqlite_backend):
+        session_state.set("task_sync_state", {"stan_to_claude": {"T-001": "7"}, "synced_at": None})
+        store = session_sqlite.open_store(sqlite_backend)
+        assert store.claude_task_for("T-001") == "7"
+        assert store.stan_task_for("7") == "T-001"
+        assert store.claude_task_for("T-404") is None
+
+    def test_migrates_json_session(self, session_file, monkeypatch):
+        """Bestehende JSON-Session wird beim ersten SQLite-Zugriff übernommen."""
+        session_state.record_test_result("pytest", 1)
+        session_state.add_pending_learning("Lesson")
+        session_state.increment_error("test_failure")
+        session_state.set("iteration_count", 4)
+        json_state = json.loads(session_file.read_text())
+
+        monkeypatch.setenv(session_state.BACKEND_ENV, "sqlite")
+        assert session_state.migrate_json_to_sqlite() is True
+        assert session_state.get("session_id") == json_state["session_id"]
+        assert session_state.get("iteration_count") == 4
+        assert session_state.get_error_count("test_failure") == 1
+        assert session_state.get_pending_learnings()[0]["content"] == "Lesson"
+        assert session_state.record_test_result("pytest", 0)["red_to_green"] is True
+        # JSON-Datei bleibt unverändert
+        assert json.loads(session_file.read_text()) == json_state
+
+        # Zweites Öffnen importiert nicht erneut
+        session_sqlite.close_all()
+        assert session_state.migrate_json_to_sqlite() is False
+        assert len(session_state.get("test_history")) == 2
+
+    def test_concurrent_processes_do_not_lose_increments(self, sqlite_backend):
+        """Parallele Prozesse zählen über UPSERT ohne verlorene Updates."""
+        code = (
+            "import os, sys; sys.path.insert(0, sys.argv[1]); "
+            "os.environ['STAN_SESSION_BACKEND'] = 'sqlite'; "
+            "import session_state; from pathlib import Path; "
+            "session_state.get_session_file = lambda: Path(sys.argv[2]); "
+            "[session_state.increment_error('x') for _ in range(20)]"
+        )
+        processes = [
+            subprocess.Popen([sys.executable, "-c", code, str(LIB_DIR), str(sqlite_backend)])
+            for _ in range(4)
+        ]
+        assert [p.wait(timeout=60) for p in processes] == [0] * 4
+        assert session_state.get_error_count("x") == 80
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Tests für session_state: mtime-validierter Lese-Cache und transaction()."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Path configured in conftest.py
+
+import session_state
+
+LIB_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan" / "lib"
+
+
+@pytest.fixture
+def session_file(tmp_path):
+    """Temporäre Session-Datei, Cache leer."""
+    path = tmp_path / "stan-session-test.json"
+    session_state.clear_cache()
+    with patch.object(session_state, "get_session_file", return_value=path):
+        yield path
+    session_state.clear_cache()
+
+
+@pytest.fixture
+def parses():
+    """Zählt json.load-Aufrufe in session_state."""
+    calls = []
+    original = json.load
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    with patch.object(session_state.json, "load", side_effect=counting):
+        yield calls
+
+
+def write_external(path: Path, state: dict):
+    """Schreibt wie ein anderer Hook-Prozess, mit garantiert neuer mtime."""
+    old = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(json.dumps(state, indent=2))
+    os.utime(path, ns=(old + 1_000_000, old + 1_000_000))
+
+
+class TestStateCache:
+    """Cache-Treffer und Invalidierung."""
+
+    def test_repeated_reads_parse_once(self, session_file, parses):
+        """Mehrere get()-Aufrufe parsen die Datei nur einmal."""
+        write_external(session_file, {"error_counts": {"x": 2}, "test_history": []})
+        assert session_state.get_error_count("x") == 2
+        assert session_state.get_pending_learnings() == []
+        assert session_state.get("test_history") == []
+        assert len(parses) == 1
+
+    def test_own_write_is_cached(self, session_file, parses):
+        """Nach _save_state() liefert der Cache den geschriebenen Stand ohne Re-Read."""
+        session_state.increment_error("x")
+        session_state.increment_error("x")
+        assert session_state.get_error_count("x") == 2
+        assert parses == []
+        assert json.loads(session_file.read_text())["error_counts"] == {"x": 2}
+
+    def test_external_write_invalidates(self, session_file, parses):
+        """Schreibt ein anderer Prozess, wird neu gelesen."""
+        session_state.increment_error("x")
+        write_external(session_file, {"error_counts": {"x": 7}})
+        assert session_state.get_error_count("x") == 7
+        assert len(parses) == 1
+
+    def test_same_size_write_with_new_mtime(self, session_file):
+        """Gleiche Größe, andere mtime: trotzdem neu gelesen."""
+        write_external(session_file, {"current_task": "T-001"})
+        assert session_state.get_current_task() == "T-001"
+        write_external(session_file, {"current_task": "T-002"})
+        assert session_state.get_current_task() == "T-002"
+
+    def test_write_from_another_process(self, session_file):
+        """Ein echter zweiter Prozess zwischen zwei Lesezugriffen."""
+        session_state.increment_error("x")
+        assert session_state.get_error_count("x") == 1
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); "
+            "import session_state; from pathlib import Path; "
+            "session_state.get_session_file = lambda: Path(sys.argv[2]); "
+            "session_state.increment_error('x')"
+        )
+        subprocess.run([sys.executable, "-c", code, str(LIB_DIR), str(session_file)], check=True)
+        assert session_state.get_error_count("x") == 2
+
+    def test_deleted_file_returns_defaults(self, session_file):
+        """Gelöschte Datei: Default-State statt Cache-Inhalt."""
+        session_state.increment_error("x")
+        session_file.unlink()
+        assert session_state.get_error_count("x") == 0
+
+    def test_corrupt_file_is_not_cached(self, session_file, parses):
+        """Kaputtes JSON: Default-State, beim nächsten Zugriff neuer Versuch."""
+        session_file.write_text("{not json")
+        assert session_state.get("error_counts") == {}
+        assert session_state.get("error_counts") == {}
+        assert len(parses) == 2
+
+
+@pytest.fixture
+def writes():
+    """Zählt Schreibzugriffe auf die Session-Datei."""
+    with patch.object(session_state, "_write_state", wraps=session_state._write_state) as spy:
+        yield spy
+
+
+class TestTransaction:
+    """session_state.transaction(): einmal laden, höchstens einmal schreiben."""
+
+    def test_batches_mutations_into_one_write(self, session_file, writes):
+        """Mehrere Mutationen, ein Schreibzugriff, alle Änderungen persistiert."""
+        with session_state.transaction():
+            session_state.record_test_result("pytest", 1)
+            session_state.increment_error("test_failure")
+            session_state.add_pending_learning("Lesson", "ctx")
+            # Lesen innerhalb der Transaktion sieht den In-Memory-Stand
+            assert session_state.get_error_count("test_failure") == 1
+            assert not session_file.exists()
+
+        assert writes.call_count == 1
+        state = json.loads(session_file.read_text())
+        assert state["error_counts"] == {"test_failure": 1}
+        assert len(state["test_history"]) == 1
+        assert state["pending_learnings"][0]["content"] == "Lesson"
+
+    def test_read_only_transaction_does_not_write(self, session_file, writes):
+        """Nur gelesen: keine Schreiboperation."""
+        session_state.increment_error("x")
+        writes.reset_mock()
+        with session_state.transaction():
+            assert session_state.get_error_count("x") == 1
+            assert session_state.get_pending_learnings() == []
+        assert writes.call_count == 0
+
+    def test_exception_discards_changes(self, session_file):
+        """Fehler im Block: nichts geschrieben, Cache verworfen."""
+        session_state.increment_error("x")
+        with pytest.raises(RuntimeError):
+            with session_state.transaction():
+                session_state.increment_error("x")
+                raise RuntimeError("boom")
+        assert session_state.get_error_count("x") == 1
+        assert json.loads(session_file.read_text())["error_counts"] == {"x": 1}
+
+    def test_nested_transaction_joins_outer(self, session_file, writes):
+        """Innere Transaktion schreibt nicht selbst."""
+        with session_state.transaction():
+            with session_state.transaction():
+                session_state.increment_error("x")
+            assert writes.call_count == 0
+        assert writes.call_count == 1
+
+    def test_stan_track_writes_once(self, session_file, writes, capsys):
+        """stan_track: Testlauf ROT→GRÜN mit Learning in einem Schreibzugriff."""
+        import io
+        sys.path.insert(0, str(LIB_DIR.parent))
+        import stan_track
+
+        session_state.record_test_result("pytest", 1)
+        writes.reset_mock()
+        hook_input = json.dumps({
+            "tool_name": "Bash",
+            "tool_input": {"command": "pytest"},
+            "tool_result": {"exit_code": 0},
+        })
+        with patch("sys.stdin", io.StringIO(hook_input)):
+            stan_track.main()
+
+        assert writes.call_count == 1
+        assert "ROT→GRÜN" in json.loads(capsys.readouterr().out)["systemMessage"]
+        assert session_state.get_pending_learnings()[0]["content"].startswith("Test 'pytest'")
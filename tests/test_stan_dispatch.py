@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for stan_dispatch — single-process runner for the Bash guards."""
+
+import json
+import sys
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR / "lib"))
+sys.path.insert(0, str(HOOKS_DIR))
+
+import stan_dispatch
+
+
+def allow(message=None):
+    return stan_dispatch.allow(message)
+
+
+def deny(reason):
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "deny",
+            "permissionDecisionReason": reason,
+        }
+    }
+
+
+class FakeGuard:
+    def __init__(self, output=None, error=None):
+        self.output = output
+        self.error = error
+        self.calls = []
+
+    def evaluate(self, hook_input):
+        self.calls.append(hook_input)
+        if self.error:
+            raise self.error
+        return self.output
+
+
+def get_decision(output):
+    return output["hookSpecificOutput"]["permissionDecision"]
+
+
+class TestMergeDecisions:
+    """Decisions are merged like Claude Code merges parallel hooks."""
+
+    def test_all_allow(self):
+        merged = stan_dispatch.merge_decisions([("a", allow()), ("b", allow())])
+        assert get_decision(merged) == "allow"
+        assert "message" not in merged["hookSpecificOutput"]
+
+    def test_deny_wins(self):
+        merged = stan_dispatch.merge_decisions([("a", allow("hi")), ("b", deny("nope"))])
+        assert get_decision(merged) == "deny"
+        assert merged["hookSpecificOutput"]["permissionDecisionReason"] == "nope"
+
+    def test_multiple_deny_reasons_joined(self):
+        merged = stan_dispatch.merge_decisions([("a", deny("first")), ("b", deny("second"))])
+        assert merged["hookSpecificOutput"]["permissionDecisionReason"] == "first\n\nsecond"
+
+    def test_deny_beats_ask(self):
+        ask = deny("maybe")
+        ask["hookSpecificOutput"]["permissionDecision"] = "ask"
+        merged = stan_dispatch.merge_decisions([("a", ask), ("b", deny("no"))])
+        assert get_decision(merged) == "deny"
+        assert merged["hookSpecificOutput"]["permissionDecisionReason"] == "no"
+
+    def test_allow_messages_joined(self):
+        merged = stan_dispatch.merge_decisions([("a", allow("one")), ("b", allow()), ("c", allow("two"))])
+        assert merged["hookSpecificOutput"]["message"] == "one\n\ntwo"
+
+
+class TestRunGuards:
+    """Every guard sees the same parsed payload."""
+
+    def test_all_guards_run_even_after_deny(self):
+        first = FakeGuard(deny("blocked"))
+        second = FakeGuard(allow())
+        payload = {"tool_name": "Bash", "tool_input": {"command": "git commit"}}
+
+        results = stan_dispatch.run_guards(payload, [("first", first), ("second", second)])
+
+        assert [name for name, _ in results] == ["first", "second"]
+        assert first.calls == [payload]
+        assert second.calls == [payload]
+
+    def test_failing_guard_is_non_blocking(self, capsys):
+        broken = FakeGuard(error=ValueError("boom"))
+        ok = FakeGuard(allow())
+
+        results = stan_dispatch.run_guards({}, [("broken", broken), ("ok", ok)])
+
+        assert [name for name, _ in results] == ["ok"]
+        assert "broken failed" in capsys.readouterr().err
+
+
+class TestMain:
+    """End-to-end through main() with the real guards."""
+
+    def run_main(self, payload):
+        with patch("sys.stdin", StringIO(payload)), \
+             patch("sys.stdout", new_callable=StringIO) as out:
+            stan_dispatch.main()
+        return json.loads(out.getvalue())
+
+    def test_non_bash_allowed(self):
+        assert get_decision(self.run_main(json.dumps({"tool_name": "Read"}))) == "allow"
+
+    def test_broken_json_allowed(self):
+        assert get_decision(self.run_main("{not json")) == "allow"
+
+    def test_plain_command_allowed(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        payload = json.dumps({"tool_name": "Bash", "tool_input": {"command": "ls -la"}})
+        assert get_decision(self.run_main(payload)) == "allow"
+
+    def test_git_guard_denial_is_reported(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        payload = json.dumps({
+            "tool_name": "Bash",
+            "tool_input": {"command": "git commit -m 'did stuff'"}
+        })
+        with patch.object(stan_dispatch.stan_gate, "evaluate", return_value=allow()), \
+             patch.object(stan_dispatch.credential_guard, "evaluate", return_value=allow()):
+            output = self.run_main(payload)
+
+        assert get_decision(output) == "deny"
+        assert "conventional_commits" in output["hookSpecificOutput"]["permissionDecisionReason"]
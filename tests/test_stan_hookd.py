@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Tests for stan_hookd (warm daemon) and the stan_hook client shim."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+HOOKS_DIR = Path(__file__).parent.parent / "hooks" / "autonomous-stan"
+sys.path.insert(0, str(HOOKS_DIR / "lib"))
+sys.path.insert(0, str(HOOKS_DIR))
+
+import stan_hook
+import stan_hookd
+
+BAD_COMMIT = json.dumps({
+    "tool_name": "Bash",
+    "tool_input": {"command": "git commit -m 'did stuff'"}
+})
+
+
+def run_shim(hook, stdin, cwd, env):
+    return subprocess.run(
+        [sys.executable, str(HOOKS_DIR / "stan_hook.py"), hook],
+        input=stdin, capture_output=True, text=True, cwd=cwd, env=env, timeout=30
+    )
+
+
+@pytest.fixture
+def socket_env(tmp_path):
+    # Short path: Unix socket paths are limited to ~104 characters
+    sock_dir = Path("/tmp") / f"stan-hookd-test-{os.getpid()}"
+    env = dict(os.environ, STAN_HOOKD_SOCKET=str(sock_dir / "hookd.sock"))
+    yield env
+    subprocess.run([sys.executable, str(HOOKS_DIR / "stan_hookd.py"), "stop"], env=env, capture_output=True)
+    for name in ("hookd.sock", "hookd.pid"):
+        (sock_dir / name).unlink(missing_ok=True)
+    if sock_dir.exists():
+        sock_dir.rmdir()
+
+
+class TestShim:
+    """Client shim without a running daemon."""
+
+    def test_unknown_hook_rejected(self, tmp_path):
+        result = run_shim("rm_rf", "{}", tmp_path, dict(os.environ, STAN_HOOKD="0"))
+        assert result.returncode == 1
+        assert "usage" in result.stderr
+
+    def test_forward_without_daemon_returns_none(self, tmp_path):
+        assert stan_hook.forward({"hook": "git_guard"}, str(tmp_path / "missing.sock")) is None
+
+    def test_fallback_runs_hook_in_process(self, tmp_path, socket_env):
+        result = run_shim("git_guard", BAD_COMMIT, tmp_path, socket_env)
+        output = json.loads(result.stdout)
+        assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+
+    def test_request_carries_cwd_and_parent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        request = stan_hook.build_request("stan_gate", "{}")
+        assert request["cwd"] == str(tmp_path)
+        assert request["ppid"] == os.getppid()
+
+
+class TestDaemon:
+    """Round-trips through a real daemon process."""
+
+    def start_daemon(self, env):
+        subprocess.run([sys.executable, str(HOOKS_DIR / "stan_hookd.py"), "start"], env=env, timeout=10)
+        socket_path = env["STAN_HOOKD_SOCKET"]
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                return
+            time.sleep(0.05)
+        pytest.fail("stan_hookd did not come up")
+
+    def test_daemon_matches_direct_run(self, tmp_path, socket_env):
+        self.start_daemon(socket_env)
+
+        via_daemon = run_shim("git_guard", BAD_COMMIT, tmp_path, socket_env)
+        direct = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "git_guard.py")],
+            input=BAD_COMMIT, capture_output=True, text=True, cwd=tmp_path
+        )
+
+        assert via_daemon.returncode == 0
+        assert json.loads(via_daemon.stdout) == json.loads(direct.stdout)
+
+    def test_daemon_runs_in_callers_cwd(self, tmp_path, socket_env):
+        self.start_daemon(socket_env)
+        push = json.dumps({"tool_name": "Bash", "tool_input": {"command": "git push origin main"}})
+
+        result = run_shim("git_guard", push, tmp_path, socket_env)
+
+        assert json.loads(result.stdout)["hookSpecificOutput"]["permissionDecision"] == "deny"
+        # Repeat-to-confirm state lands in the caller's project, not the daemon's cwd
+        assert (tmp_path / ".stan" / "session.json").exists()
+
+    def test_second_start_is_refused(self, socket_env):
+        self.start_daemon(socket_env)
+        result = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "stan_hookd.py"), "start", "--foreground"],
+            env=socket_env, capture_output=True, text=True, timeout=10
+        )
+        assert result.returncode == 1
+        assert "already running" in result.stderr
+
+
+class TestRunHook:
+    """Worker-side execution of a single request."""
+
+    def test_system_exit_code_is_reported(self, tmp_path):
+        code = {"stan_track": compile("import sys\nprint('x')\nsys.exit(3)", "stan_track.py", "exec")}
+        request = {"hook": "stan_track", "cwd": str(tmp_path), "env": dict(os.environ), "ppid": 1}
+
+        pid = os.fork()
+        if pid == 0:  # run_hook mutates process state, keep it out of the test runner
+            response = stan_hookd.run_hook(request, code)
+            os._exit(0 if response == {"stdout": "x\n", "stderr": "", "exit_code": 3} else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+
+class TestSocketTrust:
+    """The shim only talks to a daemon socket private to this user."""
+
+    def listening_socket(self, directory):
+        import socket
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        path = str(directory / "hookd.sock")
+        server.bind(path)
+        server.listen(1)
+        server.setblocking(False)
+        return server, path
+
+    def test_shared_directory_is_not_trusted(self, tmp_path):
+        sock_dir = tmp_path / "s"
+        sock_dir.mkdir(mode=0o755)
+        os.chmod(sock_dir, 0o755)
+        server, path = self.listening_socket(sock_dir)
+        with server:
+            assert stan_hook.forward({"hook": "git_guard"}, path) is None
+            with pytest.raises(BlockingIOError):
+                server.accept()  # never connected
+
+    def test_private_directory_and_own_socket(self, tmp_path):
+        sock_dir = tmp_path / "s"
+        sock_dir.mkdir(mode=0o700)
+        os.chmod(sock_dir, 0o700)
+        server, path = self.listening_socket(sock_dir)
+        with server:
+            assert stan_hook.is_trusted_socket(path)
+        (sock_dir / "plain").write_text("")
+        assert not stan_hook.is_own_socket(str(sock_dir / "plain"))
+
+    def test_symlinked_directory_is_not_trusted(self, tmp_path):
+        real = tmp_path / "real"
+        real.mkdir(mode=0o700)
+        (tmp_path / "link").symlink_to(real)
+        assert not stan_hook.is_private_dir(str(tmp_path / "link"))
+
+    @pytest.mark.skipif(os.getuid() != 0, reason="chown to another user needs root")
+    def test_foreign_socket_is_not_trusted(self, tmp_path):
+        sock_dir = tmp_path / "s"
+        sock_dir.mkdir(mode=0o700)
+        os.chmod(sock_dir, 0o700)
+        server, path = self.listening_socket(sock_dir)
+        with server:
+            os.chown(path, 12345, -1)
+            assert not stan_hook.is_trusted_socket(path)
+
+    def test_daemon_refuses_shared_directory(self, tmp_path):
+        sock_dir = Path("/tmp") / f"stan-hookd-shared-{os.getpid()}"
+        sock_dir.mkdir(mode=0o755)
+        os.chmod(sock_dir, 0o755)
+        try:
+            env = dict(os.environ, STAN_HOOKD_SOCKET=str(sock_dir / "hookd.sock"))
+            result = subprocess.run(
+                [sys.executable, str(HOOKS_DIR / "stan_hookd.py"), "start", "--foreground"],
+                env=env, capture_output=True, text=True, timeout=10
+            )
+            assert result.returncode == 1
+            assert "mode 0700" in result.stderr
+            assert not (sock_dir / "hookd.sock").exists()
+        finally:
+            for child in sock_dir.iterdir():
+                child.unlink()
+            sock_dir.rmdir()
+
+    def hung_daemon(self, directory):
+        """Daemon that accepts and reads a request but never answers."""
+        import threading
+        server, path = self.listening_socket(directory)
+        server.setblocking(True)
+        received = []
+
+        def worker():
+            conn, _ = server.accept()
+            received.append(conn.recv(65536))
+            threading.Event().wait(2)
+            conn.close()
+
+        threading.Thread(target=worker, daemon=True).start()
+        return server, path, received
+
+    @pytest.mark.parametrize("hook", ["git_guard", "loop_breaker"])
+    def test_slow_worker_runs_hook_exactly_once(self, hook, tmp_path, monkeypatch, capsys):
+        """An accepted request that times out is not run again in-process."""
+        import io
+        sock_dir = tmp_path / "s"
+        sock_dir.mkdir(mode=0o700)
+        os.chmod(sock_dir, 0o700)
+        server, path, received = self.hung_daemon(sock_dir)
+        ran = []
+        monkeypatch.setattr(stan_hook, "response_timeout", lambda name: 0.3)
+        monkeypatch.setattr(stan_hook, "run_in_process", lambda name, data: ran.append((name, data)))
+        monkeypatch.setenv("STAN_HOOKD_SOCKET", path)
+        monkeypatch.delenv("STAN_HOOKD", raising=False)
+        monkeypatch.delenv("STAN_HOOKD_AUTOSTART", raising=False)
+        monkeypatch.setattr(sys, "argv", ["stan_hook.py", hook])
+        monkeypatch.setattr(sys, "stdin", io.StringIO(BAD_COMMIT))
+        with server:
+            with pytest.raises(SystemExit) as exit_info:
+                stan_hook.main()
+
+        assert ran == []
+        assert len(received) == 1
+        assert exit_info.value.code == 0
+        out, err = capsys.readouterr()
+        if hook == "git_guard":
+            assert json.loads(out)["hookSpecificOutput"]["permissionDecision"] == "ask"
+        else:
+            assert out == "" and "not re-run" in err
+
+    def test_timeout_leaves_room_within_hook_timeouts(self):
+        config = json.loads((HOOKS_DIR.parent / "hooks.json").read_text())
+        for groups in config["hooks"].values():
+            for group in groups:
+                for hook in group["hooks"]:
+                    if hook["type"] != "command":
+                        continue
+                    name = hook["command"].split()[-1]
+                    assert stan_hook.response_timeout(name) < hook.get("timeout", 60)